@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+In-process mock of the Brayns HTTP REST interface, serving synthetic frames of configurable
+size with an optional artificial latency. Camera, viewport and settings are kept in memory and
+answered with an ETag, so that conditional requests get 304 Not Modified like with Brayns.
+
+Frames are sent as base64 in Json, or as binary data with their metadata in headers when the
+client accepts it, and responses are compressed with gzip, deflate or zstd as negotiated with
+Accept-Encoding. Both can be disabled to emulate older Brayns versions.
+
+Encoded frames are cached per size, quality, format and encoding, so that the mock server costs
+as little as possible and the measurements reflect the client.
+"""
+
+import base64
+import gzip
+import json
+import threading
+import time
+import zlib
+from io import BytesIO
+from PIL import Image
+from brayns.brayns import CONTENT_TYPE_JPEG, CONTENT_TYPE_BINARY, HEADER_WIDTH, \
+    HEADER_HEIGHT, HEADER_COLOR_SIZE, HEADER_DEPTH_SIZE
+from brayns.server import RequestHandler, ThreadingServer, accepts
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_FRAME_SIZE = [800, 600]
+
+# Content encodings the mock server can send, in order of preference
+ENCODINGS = (('zstd',) if zstandard is not None else ()) + ('gzip', 'deflate')
+
+# Endpoints whose state is kept by the mock server, with the state Brayns starts with
+_DEFAULT_STATE = {
+    '/v1/camera': {
+        'origin': [0, 0, -1], 'look_at': [0, 0, 0], 'up': [0, 1, 0], 'aperture': 0,
+        'focal_length': 0, 'field_of_view': 45.0
+    },
+    '/v1/viewport': {'size': DEFAULT_FRAME_SIZE},
+    '/v1/settings': {
+        'background_color': [0, 0, 0], 'samples_per_pixel': 1, 'shader': 'basic',
+        'shading': 'diffuse', 'shadows': 0.0, 'soft_shadows': 0.0, 'ambient_occlusion': 0.0,
+        'epsilon': 1e-6, 'jpeg_compression': 100, 'jpeg_size': DEFAULT_FRAME_SIZE
+    }
+}
+
+
+def synthetic_image(size):
+    """
+    :param size: (width, height) of the image
+    :return: RGBA Pillow Image object with gradients and noise, which compresses about as well
+    as a rendered scene
+    """
+    ramp = Image.new('L', (256, 1))
+    ramp.putdata(list(range(256)))
+    horizontal = ramp.resize(tuple(size))
+    vertical = ramp.rotate(90, expand=True).resize(tuple(size))
+    noise = Image.effect_noise(tuple(size), 32).convert('L')
+    opaque = Image.new('L', tuple(size), 255)
+    return Image.merge('RGBA', (horizontal, vertical, noise, opaque))
+
+
+def _json_response(payload):
+    return json.dumps(payload).encode('utf-8')
+
+
+def _compress(body, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor().compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, 6)
+    return zlib.compress(body, 6)
+
+
+class _Handler(RequestHandler):
+    def do_GET(self):  # pylint: disable=C0103
+        mock = self.server.mock
+        mock.wait()
+        status = mock.failure()
+        if status is not None:
+            self._reply(status)
+            return
+        response = mock.get(self.path, self.headers.get('If-None-Match'),
+                            self.headers.get('Accept'), self.headers.get('Accept-Encoding'))
+        if response is None:
+            self._reply(404)
+        else:
+            self._reply(*response)
+
+    def do_PUT(self):  # pylint: disable=C0103
+        mock = self.server.mock
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        mock.wait()
+        status = mock.failure()
+        if status is not None:
+            self._reply(status)
+            return
+        self._reply(200 if mock.put(self.path, body) else 404)
+
+
+class MockBrayns(object):
+    """
+    Mock Brayns server running in a background thread:
+
+        with MockBrayns(frame_size=[1920, 1080], latency=0.001) as mock:
+            brayns = Brayns(mock.url)
+    """
+    def __init__(self, frame_size=None, latency=0.0, host='127.0.0.1', port=0, binary=True,
+                 encodings=ENCODINGS):
+        """
+        :param frame_size: Initial viewport and JPEG size, defaults to DEFAULT_FRAME_SIZE
+        :param latency: Delay in seconds added to every request, to emulate a remote server
+        :param host: Address to listen on
+        :param port: Port to listen on, 0 picks a free one
+        :param binary: If False, frames are always sent as base64 in Json
+        :param encodings: Content encodings offered, in order of preference, empty to never
+        compress
+        """
+        self.latency = latency
+        self.binary = binary
+        self.encodings = tuple(encodings)
+        self._lock = threading.Lock()
+        self._state = json.loads(json.dumps(_DEFAULT_STATE))
+        self._versions = dict((path, 0) for path in self._state)
+        self._frames = {}
+        self._images = {}
+        self._failures = []
+        self.requests = {}
+        if frame_size is not None:
+            self.set_frame_size(frame_size)
+        self._server = ThreadingServer((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        """
+        Starts serving requests in a background thread
+        :return: self
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-brayns')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving requests and closes the listening socket
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def set_frame_size(self, size):
+        """
+        Sets the size of both the frame buffers and the JPEG images
+        :param size: (width, height) in pixels
+        """
+        self.put('/v1/viewport', _json_response({'size': list(size)}), count=False)
+        self.put('/v1/settings', _json_response({'jpeg_size': list(size)}), count=False)
+
+    def state(self, path):
+        """
+        :param path: '/v1/camera', '/v1/viewport' or '/v1/settings'
+        :return: Copy of the current state of the endpoint
+        """
+        with self._lock:
+            return json.loads(json.dumps(self._state[path]))
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fail(self, count=1, status=503):
+        """
+        Makes the next requests fail, to emulate an overloaded or restarting server
+        :param count: Number of requests to fail
+        :param status: HTTP status of the failed requests
+        """
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def failure(self):
+        """
+        :return: Status of the failure to answer the current request with, None to serve it
+        """
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def _count(self, method, path):
+        with self._lock:
+            key = '{} {}'.format(method, path)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def put(self, path, body, count=True):
+        """
+        Updates the state of an endpoint
+        :param path: Path of the endpoint
+        :param body: Json bytes with the keys to update
+        :param count: If False, the request is not accounted for in requests
+        :return: False if the endpoint does not exist
+        """
+        if path not in self._state:
+            return False
+        if count:
+            self._count('PUT', path)
+        values = json.loads(body.decode('utf-8')) if body else {}
+        with self._lock:
+            self._state[path].update(values)
+            self._versions[path] += 1
+        return True
+
+    def get(self, path, etag=None, accept=None, accept_encoding=None):
+        """
+        :param path: Path of the endpoint
+        :param etag: Value of the If-None-Match header, if any
+        :param accept: Value of the Accept header, if any
+        :param accept_encoding: Value of the Accept-Encoding header, if any
+        :return: (status, body, headers) tuple, None if the endpoint does not exist
+        """
+        self._count('GET', path)
+        with self._lock:
+            if path in self._state:
+                version = '"{}"'.format(self._versions[path])
+                if etag == version:
+                    return 304, b'', {'ETag': version}
+                return 200, _json_response(self._state[path]), \
+                    {'ETag': version, 'Content-Type': 'application/json'}
+            viewport = tuple(self._state['/v1/viewport']['size'])
+            jpeg_size = tuple(self._state['/v1/settings']['jpeg_size'])
+            quality = self._state['/v1/settings']['jpeg_compression']
+        encoding = None
+        for candidate in self.encodings:
+            if accepts(accept_encoding, candidate):
+                encoding = candidate
+                break
+        if path == '/v1/image-jpeg':
+            binary = self.binary and accepts(accept, CONTENT_TYPE_JPEG)
+            key = ('jpeg', jpeg_size, quality, binary, encoding)
+        elif path == '/v1/frame-buffers':
+            binary = self.binary and accepts(accept, CONTENT_TYPE_BINARY)
+            key = ('buffers', viewport, binary, encoding)
+        else:
+            return None
+        with self._lock:
+            response = self._frames.get(key)
+        if response is None:
+            if key[0] == 'jpeg':
+                body, headers = self._encode_jpeg(jpeg_size, quality, binary)
+            else:
+                body, headers = self._encode_frame_buffers(viewport, binary)
+            if encoding is not None:
+                body = _compress(body, encoding)
+                headers['Content-Encoding'] = encoding
+            response = 200, body, headers
+            with self._lock:
+                self._frames[key] = response
+        return response
+
+    def _image(self, size):
+        """
+        :return: Synthetic image of the given size, the same for every format and encoding
+        """
+        with self._lock:
+            image = self._images.get(size)
+        if image is None:
+            image = synthetic_image(size)
+            with self._lock:
+                image = self._images.setdefault(size, image)
+        return image
+
+    def _encode_jpeg(self, size, quality, binary):
+        data = BytesIO()
+        self._image(size).convert('RGB').save(data, 'JPEG', quality=max(1, min(quality, 95)))
+        if binary:
+            return data.getvalue(), {'Content-Type': CONTENT_TYPE_JPEG}
+        return _json_response({'data': base64.b64encode(data.getvalue()).decode('ascii')}), \
+            {'Content-Type': 'application/json'}
+
+    def _encode_frame_buffers(self, size, binary):
+        image = self._image(size)
+        color = image.tobytes()
+        # 16 bits depth, the ramp of the red channel scaled to the full range
+        depth = bytearray(2 * size[0] * size[1])
+        depth[1::2] = image.split()[0].tobytes()
+        depth = bytes(depth)
+        if binary:
+            return color + depth, {
+                'Content-Type': CONTENT_TYPE_BINARY,
+                HEADER_WIDTH: str(size[0]),
+                HEADER_HEIGHT: str(size[1]),
+                HEADER_COLOR_SIZE: str(len(color)),
+                HEADER_DEPTH_SIZE: str(len(depth))
+            }
+        return _json_response({
+            'width': size[0],
+            'height': size[1],
+            'diffuse': base64.b64encode(color).decode('ascii'),
+            'depth': base64.b64encode(depth).decode('ascii')
+        }), {'Content-Type': 'application/json'}
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Benchmarks of the Brayns client against the mock server, e.g.:
+
+    python -m benchmarks.run --resolutions 640x480 1920x1080 --output results.json
+
+Results are written as Json, so that runs of different releases can be compared.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from brayns.brayns import Brayns, OUTPUT_ARRAY, OUTPUT_IMAGE, FRAME_JPEG, np, fast_json
+from brayns.stats import Histogram, PHASE_NETWORK, PHASE_JSON, PHASE_BASE64, PHASE_IMAGE
+from brayns.version import VERSION
+from benchmarks.mock_server import MockBrayns
+
+DEFAULT_RESOLUTIONS = ['256x256', '1024x768', '1920x1080']
+DEFAULT_ITERATIONS = 50
+
+
+def _timed(name, iterations, function, **extra):
+    """
+    Calls a function repeatedly
+    :param name: Name of the benchmark
+    :param iterations: Number of calls
+    :param function: Callable taking the iteration index
+    :param extra: Additional values stored in the result
+    :return: Result dictionary with the total time, the rate and the latency summary
+    """
+    histogram = Histogram()
+    start = time.time()
+    for index in range(iterations):
+        call_start = time.time()
+        function(index)
+        histogram.add(time.time() - call_start)
+    elapsed = time.time() - start
+    result = {
+        'benchmark': name,
+        'iterations': iterations,
+        'seconds': elapsed,
+        'rate': iterations / elapsed if elapsed else None,
+        'latency': histogram.summary()
+    }
+    result.update(extra)
+    return result
+
+
+def bench_setters(mock, iterations):
+    """
+    Measures how many camera updates per second are sent one by one, in batches, and coalesced
+    """
+    results = []
+    with Brayns(mock.url) as brayns:
+        camera = brayns.camera
+
+        def single(index):
+            camera.origin = [index, 0, 0]
+
+        def batch(index):
+            with camera.batch():
+                camera.origin = [index, 0, 0]
+                camera.look_at = [index, 0, 1]
+                camera.up_vector = [0, 1, 0]
+
+        for name, function in (('setter_single', single), ('setter_batch', batch)):
+            brayns.stats(reset=True)
+            result = _timed(name, iterations, function)
+            result['requests'] = _requests(brayns, '/v1/camera')
+            results.append(result)
+
+        brayns.coalesce(True, max_rate=None)
+        brayns.stats(reset=True)
+        result = _timed('setter_coalesced', iterations, single)
+        start = time.time()
+        brayns.flush()
+        result['flush_seconds'] = time.time() - start
+        result['requests'] = _requests(brayns, '/v1/camera')
+        results.append(result)
+    return results
+
+
+def _requests(brayns, endpoint):
+    return brayns.stats().get(endpoint, {}).get('requests', 0)
+
+
+def bench_fetch(mock, resolution, iterations, **client):
+    """
+    Measures frame throughput, without decoding the frames beyond the Json envelope
+    """
+    results = []
+    mock.set_frame_size(resolution)
+    with Brayns(mock.url, **client) as brayns:
+        for name, endpoint, fetch in (
+                ('fetch_jpeg', '/v1/image-jpeg', lambda _: brayns.image_jpeg_data),
+                ('fetch_frame_buffers', '/v1/frame-buffers', lambda _: brayns.frame_buffers)):
+            brayns.stats(reset=True)
+            result = _timed(name, iterations, fetch, resolution=resolution)
+            received = brayns.stats()[endpoint]['bytes_received']
+            result['bytes_per_second'] = received / result['seconds'] if result['seconds'] \
+                else None
+            results.append(result)
+
+        with brayns.stream(FRAME_JPEG, max_frames=iterations, workers=2) as frames:
+            start = time.time()
+            count = sum(1 for _ in frames)
+            elapsed = time.time() - start
+        results.append({
+            'benchmark': 'stream_jpeg',
+            'resolution': resolution,
+            'iterations': count,
+            'seconds': elapsed,
+            'rate': count / elapsed if elapsed else None
+        })
+    return results
+
+
+def bench_decode(mock, resolution, iterations, **client):
+    """
+    Measures the client-side cost of each decoding phase, from the request statistics
+    """
+    results = []
+    mock.set_frame_size(resolution)
+    output = OUTPUT_ARRAY if np is not None else OUTPUT_IMAGE
+    with Brayns(mock.url, output=output, **client) as brayns:
+        for name, endpoint, fetch in (
+                ('decode_jpeg', '/v1/image-jpeg', lambda: brayns.image_jpeg),
+                ('decode_color', '/v1/frame-buffers', lambda: brayns.color_frame_buffer),
+                ('decode_depth', '/v1/frame-buffers', lambda: brayns.depth_frame_buffer)):
+            brayns.stats(reset=True)
+            for _ in range(iterations):
+                fetch()
+            stats = brayns.stats()[endpoint]
+            result = {
+                'benchmark': name,
+                'resolution': resolution,
+                'iterations': iterations,
+                'output': output
+            }
+            for phase in (PHASE_NETWORK, PHASE_JSON, PHASE_BASE64, PHASE_IMAGE):
+                if phase in stats:
+                    result[phase] = stats[phase]
+            results.append(result)
+    return results
+
+
+def _resolution(text):
+    try:
+        width, height = text.lower().split('x')
+        return [int(width), int(height)]
+    except ValueError:
+        raise argparse.ArgumentTypeError('Expected WIDTHxHEIGHT, got {}'.format(text))
+
+
+def run(resolutions, iterations, latency=0.0, benchmarks=('setters', 'fetch', 'decode'),
+        binary=True, compression=True):
+    """
+    Runs the benchmarks against a mock server started for the occasion
+    :param resolutions: List of (width, height) frame sizes
+    :param iterations: Number of iterations of each benchmark
+    :param latency: Delay in seconds added by the mock server to every request
+    :param benchmarks: Names of the benchmark groups to run
+    :param binary: If False, frames are fetched as base64 in Json
+    :param compression: If False, responses are not compressed
+    :return: Dictionary with the environment and the list of results
+    """
+    client = {'binary': binary, 'compression': compression}
+    results = []
+    with MockBrayns(latency=latency) as mock:
+        if 'setters' in benchmarks:
+            results.extend(bench_setters(mock, iterations))
+        for resolution in resolutions:
+            if 'fetch' in benchmarks:
+                results.extend(bench_fetch(mock, resolution, iterations, **client))
+            if 'decode' in benchmarks:
+                results.extend(bench_decode(mock, resolution, iterations, **client))
+    return {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'json': fast_json.__name__ if fast_json is not None else 'json',
+        'numpy': np.__version__ if np is not None else None,
+        'timestamp': time.time(),
+        'latency': latency,
+        'client': client,
+        'results': results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the Brayns python client')
+    parser.add_argument('--resolutions', nargs='+', type=_resolution,
+                        default=[_resolution(text) for text in DEFAULT_RESOLUTIONS],
+                        help='Frame sizes, as WIDTHxHEIGHT')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help='Number of iterations of each benchmark')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Delay in seconds added by the mock server to every request')
+    parser.add_argument('--benchmarks', nargs='+', choices=['setters', 'fetch', 'decode'],
+                        default=['setters', 'fetch', 'decode'], help='Benchmarks to run')
+    parser.add_argument('--json', action='store_true',
+                        help='Fetch frames as base64 in Json instead of binary data')
+    parser.add_argument('--no-compression', action='store_true',
+                        help='Ask for uncompressed responses')
+    parser.add_argument('--output', default='-',
+                        help='Json file receiving the results, - for the standard output')
+    args = parser.parse_args(argv)
+
+    report = run(args.resolutions, args.iterations, args.latency, args.benchmarks,
+                 not args.json, not args.no_compression)
+    for result in report['results']:
+        resolution = 'x'.join(str(value) for value in result.get('resolution') or []) or '-'
+        if result.get('rate'):
+            value = '{:10.1f} /s'.format(result['rate'])
+        else:
+            decode = sum(result[phase]['mean'] for phase in (PHASE_JSON, PHASE_BASE64, PHASE_IMAGE)
+                         if phase in result)
+            value = '{:10.2f} ms decode'.format(decode * 1000)
+        sys.stderr.write('{:<20} {:>10} {}\n'.format(result['benchmark'], resolution, value))
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
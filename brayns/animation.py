@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Camera path animation: keyframes are interpolated for the whole sequence at once with numpy,
+then rendered to disk while frames are encoded in a process pool.
+
+    frames = interpolate(keyframes, 1000, method=INTERPOLATION_CATMULL_ROM)
+    render(brayns, frames, 'movie')
+"""
+
+import numpy as np
+from brayns.brayns import FRAME_JPEG
+from brayns.sink import FrameSink, SINK_PROCESSES
+
+INTERPOLATION_LINEAR = 'linear'
+INTERPOLATION_CATMULL_ROM = 'catmull_rom'
+
+# Slerp of the camera orientation, or interpolation of look-at and up like positions
+ORIENTATION_SLERP = 'slerp'
+ORIENTATION_LOOK_AT = 'look_at'
+
+# Camera properties set for every frame, and their defaults when missing from keyframes
+CAMERA_PROPERTIES = ('origin', 'look_at', 'up_vector', 'aperture', 'focal_length')
+_DEFAULTS = {'up_vector': [0, 1, 0], 'aperture': 0.0, 'focal_length': 0.0}
+
+
+def _column(values, ndim):
+    """
+    :param values: 1D array
+    :param ndim: Number of dimensions of the array values will be broadcast with
+    :return: values reshaped to broadcast along the first axis
+    """
+    return values.reshape((-1,) + (1,) * (ndim - 1))
+
+
+def _segments(times, samples):
+    """
+    :param times: Increasing keyframe times
+    :param samples: Times of the frames
+    :return: Index of the segment containing each sample and position within that segment
+    """
+    index = np.clip(np.searchsorted(times, samples, side='right') - 1, 0, len(times) - 2)
+    position = (samples - times[index]) / (times[index + 1] - times[index])
+    return index, position
+
+
+def _linear(values, times, index, position):
+    position = _column(position, values.ndim)
+    return values[index] * (1.0 - position) + values[index + 1] * position
+
+
+def _catmull_rom(values, times, index, position):
+    """
+    Cubic Hermite spline whose tangents are Catmull-Rom finite differences, which supports
+    keyframes that are not evenly spaced in time
+    """
+    tangents = np.empty_like(values)
+    tangents[1:-1] = (values[2:] - values[:-2]) / _column(times[2:] - times[:-2], values.ndim)
+    tangents[0] = (values[1] - values[0]) / (times[1] - times[0])
+    tangents[-1] = (values[-1] - values[-2]) / (times[-1] - times[-2])
+    span = _column(times[index + 1] - times[index], values.ndim)
+    t = _column(position, values.ndim)
+    t2 = t * t
+    t3 = t2 * t
+    return (2 * t3 - 3 * t2 + 1) * values[index] + (t3 - 2 * t2 + t) * span * tangents[index] + \
+        (3 * t2 - 2 * t3) * values[index + 1] + (t3 - t2) * span * tangents[index + 1]
+
+
+_INTERPOLATIONS = {INTERPOLATION_LINEAR: _linear, INTERPOLATION_CATMULL_ROM: _catmull_rom}
+
+
+def _normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def _frames_to_quaternions(forward, up):
+    """
+    :param forward: (n, 3) viewing directions
+    :param up: (n, 3) up vectors
+    :return: (n, 4) unit quaternions (w, x, y, z) rotating the camera frame to world space
+    """
+    forward = _normalize(forward)
+    right = _normalize(np.cross(forward, up))
+    m = np.stack([right, np.cross(right, forward), -forward], axis=-1)
+    quaternions = np.empty((len(m), 4))
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    # Shepperd's method: use the largest of w, x, y, z as pivot for numerical stability
+    pivot = np.argmax(np.stack([trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=1), axis=1)
+    k = pivot == 0
+    s = np.sqrt(trace[k] + 1.0) * 2
+    quaternions[k] = np.stack([0.25 * s, (m[k, 2, 1] - m[k, 1, 2]) / s,
+                               (m[k, 0, 2] - m[k, 2, 0]) / s, (m[k, 1, 0] - m[k, 0, 1]) / s], 1)
+    k = pivot == 1
+    s = np.sqrt(1.0 + m[k, 0, 0] - m[k, 1, 1] - m[k, 2, 2]) * 2
+    quaternions[k] = np.stack([(m[k, 2, 1] - m[k, 1, 2]) / s, 0.25 * s,
+                               (m[k, 0, 1] + m[k, 1, 0]) / s, (m[k, 0, 2] + m[k, 2, 0]) / s], 1)
+    k = pivot == 2
+    s = np.sqrt(1.0 + m[k, 1, 1] - m[k, 0, 0] - m[k, 2, 2]) * 2
+    quaternions[k] = np.stack([(m[k, 0, 2] - m[k, 2, 0]) / s, (m[k, 0, 1] + m[k, 1, 0]) / s,
+                               0.25 * s, (m[k, 1, 2] + m[k, 2, 1]) / s], 1)
+    k = pivot == 3
+    s = np.sqrt(1.0 + m[k, 2, 2] - m[k, 0, 0] - m[k, 1, 1]) * 2
+    quaternions[k] = np.stack([(m[k, 1, 0] - m[k, 0, 1]) / s, (m[k, 0, 2] + m[k, 2, 0]) / s,
+                               (m[k, 1, 2] + m[k, 2, 1]) / s, 0.25 * s], 1)
+    return quaternions
+
+
+def _quaternions_to_frames(quaternions):
+    """
+    :param quaternions: (n, 4) unit quaternions (w, x, y, z)
+    :return: (n, 3) viewing directions and (n, 3) up vectors
+    """
+    w, x, y, z = quaternions.T
+    up = np.stack([2 * (x * y - w * z), 1 - 2 * (x * x + z * z), 2 * (y * z + w * x)], axis=1)
+    back = np.stack([2 * (x * z + w * y), 2 * (y * z - w * x), 1 - 2 * (x * x + y * y)], axis=1)
+    return -back, up
+
+
+def _slerp(quaternions, index, position):
+    """
+    Spherical linear interpolation between consecutive keyframe orientations, along the
+    shortest arc
+    """
+    start = quaternions[index]
+    end = quaternions[index + 1]
+    dot = np.sum(start * end, axis=1)
+    end = np.where(_column(dot < 0, 2), -end, end)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+    angle = np.arccos(dot)
+    sin = np.sin(angle)
+    nearly_equal = sin < 1e-6
+    safe_sin = np.where(nearly_equal, 1.0, sin)
+    start_weight = np.where(nearly_equal, 1.0 - position,
+                            np.sin((1.0 - position) * angle) / safe_sin)
+    end_weight = np.where(nearly_equal, position, np.sin(position * angle) / safe_sin)
+    return _normalize(_column(start_weight, 2) * start + _column(end_weight, 2) * end)
+
+
+def interpolate(keyframes, num_frames, times=None, method=INTERPOLATION_LINEAR,
+                orientation=ORIENTATION_SLERP):
+    """
+    Interpolates camera keyframes for a whole sequence in a single vectorized pass
+    :param keyframes: List of dictionaries indexed by camera property name (origin, look_at,
+    up_vector, aperture, focal_length). origin and look_at are mandatory
+    :param num_frames: Number of frames of the sequence, keyframes included
+    :param times: Increasing time of each keyframe, evenly spaced if None
+    :param method: INTERPOLATION_LINEAR or INTERPOLATION_CATMULL_ROM, used for positions and
+    scalar properties
+    :param orientation: ORIENTATION_SLERP to slerp the viewing direction and up vector while
+    interpolating the distance to the look-at point, ORIENTATION_LOOK_AT to interpolate look-at
+    and up vector like positions
+    :return: Dictionary of arrays indexed by camera property name, with one row per frame
+    """
+    if len(keyframes) < 2:
+        raise ValueError('At least two keyframes are required')
+    if method not in _INTERPOLATIONS:
+        raise ValueError('Invalid interpolation method: {}'.format(method))
+    if orientation not in (ORIENTATION_SLERP, ORIENTATION_LOOK_AT):
+        raise ValueError('Invalid orientation interpolation: {}'.format(orientation))
+    function = _INTERPOLATIONS[method]
+    times = np.arange(len(keyframes), dtype=float) if times is None else \
+        np.asarray(times, dtype=float)
+    if len(times) != len(keyframes) or np.any(np.diff(times) <= 0):
+        raise ValueError('Keyframe times must be increasing and match the keyframes')
+
+    values = dict((name, np.array([keyframe.get(name, _DEFAULTS.get(name))
+                                   for keyframe in keyframes], dtype=float))
+                  for name in CAMERA_PROPERTIES)
+    index, position = _segments(times, np.linspace(times[0], times[-1], num_frames))
+    frames = dict((name, function(values[name], times, index, position))
+                  for name in ('origin', 'aperture', 'focal_length'))
+
+    if orientation == ORIENTATION_LOOK_AT:
+        frames['look_at'] = function(values['look_at'], times, index, position)
+        frames['up_vector'] = _normalize(function(values['up_vector'], times, index, position))
+        return frames
+
+    direction = values['look_at'] - values['origin']
+    distance = np.linalg.norm(direction, axis=1)
+    quaternions = _frames_to_quaternions(direction, values['up_vector'])
+    forward, up = _quaternions_to_frames(_slerp(quaternions, index, position))
+    distance = function(distance, times, index, position)
+    frames['look_at'] = frames['origin'] + forward * _column(distance, 2)
+    frames['up_vector'] = up
+    return frames
+
+
+def render(brayns, frames, directory, kind=FRAME_JPEG, image_format=None,
+           pattern='frame_{:06d}.{}', processes=None, max_pending=None):
+    """
+    Renders a camera sequence to disk. For each frame, the camera is updated in a single
+    request and the frame is fetched, while previous frames are decoded and encoded in a pool
+    of processes. JPEG frames saved as JPEG are written as sent by Brayns, without re-encoding
+    :param brayns: Brayns object
+    :param frames: Dictionary of arrays returned by interpolate
+    :param directory: Output directory, created if needed
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :param image_format: File extension selecting the format, e.g. 'jpg', 'png', 'tiff' or
+    'npy'. Defaults to 'jpg' for JPEG frames, 'png' for color and 'tiff' for depth buffers
+    :param pattern: File name pattern, formatted with the frame number and the extension
+    :param processes: Number of encoding processes, defaults to the number of CPUs
+    :param max_pending: Maximum number of frames waiting to be encoded, bounds memory usage.
+    Defaults to twice the number of processes
+    :return: List of the paths of the written files
+    """
+    count = len(frames['origin'])
+    camera = brayns.camera
+    paths = []
+    with FrameSink(directory, image_format, pattern, workers=processes, pool=SINK_PROCESSES,
+                   max_pending=max_pending) as sink:
+        for number in range(count):
+            with camera.batch():
+                for name in CAMERA_PROPERTIES:
+                    setattr(camera, name, frames[name][number].tolist())
+            # Undecoded frames, decoded by the workers
+            frame = brayns.image_jpeg_data if kind == FRAME_JPEG else brayns.frame_buffers
+            if frame is None:
+                raise IOError('Failed to fetch frame {} from Brayns'.format(number))
+            paths.append(sink.write(frame, kind))
+            if sink.failures:
+                break
+    if sink.failures:
+        raise sink.failures[0][1]
+    return paths
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Append-only archive of color and depth buffers for long captures. Frames of a capture all have
+the same size, hence they are stored back to back in chunk files of a fixed number of frames,
+which are memory-mapped when read: any frame is found in constant time and read as numpy views
+over the mapping, without copy nor decoding. A compact index records the number, timestamp and
+camera of every frame:
+
+    with FrameArchive('capture', 'w') as archive:
+        capture(brayns, archive, 10000)
+    archive = FrameArchive('capture')
+    depth = archive.depth(5000)
+    origins = archive.index['origin']
+
+Frame data is written before its index record, and an archive opened for appending is cut back
+to the frames complete in both, so that an interrupted capture loses at most its last frame.
+"""
+
+import json
+import os
+import time
+import numpy as np
+from brayns.brayns import FrameBufferSnapshot
+
+# Default number of frames per chunk file
+DEFAULT_FRAMES_PER_CHUNK = 256
+
+ARCHIVE_READ = 'r'
+ARCHIVE_APPEND = 'a'
+ARCHIVE_WRITE = 'w'
+
+_METADATA = 'archive.json'
+_INDEX = 'index.bin'
+_CHUNK = 'chunk_{:06d}.bin'
+_VERSION = 1
+
+# Index record of a frame. Camera values are NaN when the camera is unknown
+INDEX_DTYPE = np.dtype([('number', '<i8'), ('timestamp', '<f8'), ('origin', '<f4', (3,)),
+                        ('look_at', '<f4', (3,)), ('up', '<f4', (3,)),
+                        ('field_of_view', '<f4')])
+
+
+def _buffers(frame):
+    """
+    :param frame: FrameBufferSnapshot, or (color, depth) tuple of numpy arrays
+    :return: (width, height, color bytes-like, depth bytes-like, depth dtype) tuple
+    """
+    if isinstance(frame, FrameBufferSnapshot):
+        color = frame._buffer('diffuse')  # pylint: disable=W0212
+        depth = frame._buffer('depth')  # pylint: disable=W0212
+        depth_dtype = '<u2' if len(depth) == 2 * frame.width * frame.height else '<f4'
+        return frame.width, frame.height, color, depth, depth_dtype
+    color, depth = [np.ascontiguousarray(array) for array in frame]
+    if color.dtype != np.uint8 or color.ndim != 3 or color.shape[2] != 4:
+        raise ValueError('Color buffer must be a (height, width, 4) uint8 array')
+    if depth.shape != color.shape[:2]:
+        raise ValueError('Depth buffer of shape {} does not match color buffer of shape {}'
+                         .format(depth.shape, color.shape))
+    depth = depth.astype(depth.dtype.newbyteorder('<'), copy=False)
+    if depth.dtype.str not in ('<u2', '<f4'):
+        raise ValueError('Depth buffer must be uint16 or float32, not {}'.format(depth.dtype))
+    return color.shape[1], color.shape[0], color.data, depth.data, depth.dtype.str
+
+
+class FrameArchive(object):
+    """
+    Directory holding the frames of a capture, see module documentation
+    """
+    def __init__(self, directory, mode=ARCHIVE_READ, frames_per_chunk=DEFAULT_FRAMES_PER_CHUNK):
+        """
+        :param directory: Directory of the archive, created if needed when writing
+        :param mode: ARCHIVE_READ, ARCHIVE_APPEND to add frames to an existing or new
+        archive, or ARCHIVE_WRITE to start a new archive, removing the frames of an existing one
+        :param frames_per_chunk: Number of frames per chunk file of a new archive
+        :raise IOError: if the archive to read does not exist
+        """
+        if mode not in (ARCHIVE_READ, ARCHIVE_APPEND, ARCHIVE_WRITE):
+            raise ValueError('Invalid archive mode: {}'.format(mode))
+        self.directory = directory
+        self.mode = mode
+        self.width = None
+        self.height = None
+        self.depth_dtype = None
+        self.frames_per_chunk = frames_per_chunk
+        self._record = None
+        self._count = 0
+        self._chunks = {}
+        self._index = None
+        self._chunk_file = None
+        self._chunk_number = None
+        self._index_file = None
+        metadata = os.path.join(directory, _METADATA)
+        if mode == ARCHIVE_READ and not os.path.exists(metadata):
+            raise IOError('No frame archive in {}'.format(directory))
+        if mode == ARCHIVE_WRITE:
+            self._remove()
+        elif os.path.exists(metadata):
+            with open(metadata) as data:
+                self._configure(**json.load(data))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        if mode == ARCHIVE_READ:
+            self._count = self._complete_frames()
+        else:
+            self._recover()
+            self._index_file = open(self._path(_INDEX), 'ab')
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _remove(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name in (_METADATA, _INDEX) or (name.startswith('chunk_') and
+                                               name.endswith('.bin')):
+                os.remove(self._path(name))
+
+    def _configure(self, width, height, depth_dtype, frames_per_chunk, version=_VERSION):
+        if version > _VERSION:
+            raise ValueError('Unsupported frame archive version {}'.format(version))
+        self.width = width
+        self.height = height
+        self.depth_dtype = depth_dtype
+        self.frames_per_chunk = frames_per_chunk
+        self._record = np.dtype([('color', 'u1', (height, width, 4)),
+                                 ('depth', depth_dtype, (height, width))])
+
+    def _complete_frames(self):
+        """
+        :return: Number of frames whose data and index record are both complete
+        """
+        records = os.path.getsize(self._path(_INDEX)) // INDEX_DTYPE.itemsize \
+            if os.path.exists(self._path(_INDEX)) else 0
+        if self._record is None:
+            return 0
+        frames = 0
+        while True:
+            path = self._path(_CHUNK.format(frames // self.frames_per_chunk))
+            if not os.path.exists(path):
+                break
+            in_chunk = os.path.getsize(path) // self._record.itemsize
+            frames += min(in_chunk, self.frames_per_chunk)
+            if in_chunk < self.frames_per_chunk:
+                break
+        return min(records, frames)
+
+    def _recover(self):
+        """
+        Cuts the index and the chunk files back to the frames complete in both
+        """
+        self._count = self._complete_frames()
+        if os.path.exists(self._path(_INDEX)):
+            with open(self._path(_INDEX), 'r+b') as index:
+                index.truncate(self._count * INDEX_DTYPE.itemsize)
+        if self._record is None:
+            return
+        last = self._count // self.frames_per_chunk
+        chunk = last
+        while os.path.exists(self._path(_CHUNK.format(chunk))):
+            path = self._path(_CHUNK.format(chunk))
+            if chunk == last:
+                with open(path, 'r+b') as data:
+                    data.truncate((self._count % self.frames_per_chunk) * self._record.itemsize)
+            else:
+                os.remove(path)
+            chunk += 1
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def frame_size(self):
+        """
+        :return: Size in bytes of a frame, None until the first frame is appended
+        """
+        return None if self._record is None else self._record.itemsize
+
+    def append(self, frame, camera=None, timestamp=None, number=None):
+        """
+        Adds a frame at the end of the archive
+        :param frame: FrameBufferSnapshot as returned by Brayns.frame_buffers, or (color,
+        depth) tuple of (height, width, 4) uint8 and (height, width) uint16 or float32 arrays
+        :param camera: Camera object, or any object with origin, look_at, up_vector and
+        field_of_view attributes, recorded in the index
+        :param timestamp: Time of the frame in seconds since the epoch, defaults to now
+        :param number: Number of the frame in the capture, defaults to its position
+        :return: Position of the frame in the archive
+        :raise ValueError: if the frame differs in size or type from the previous ones
+        """
+        if self.mode == ARCHIVE_READ:
+            raise IOError('Frame archive {} is open for reading'.format(self.directory))
+        width, height, color, depth, depth_dtype = _buffers(frame)
+        if self._record is None:
+            self._configure(width, height, depth_dtype, self.frames_per_chunk)
+            with open(self._path(_METADATA), 'w') as metadata:
+                json.dump({'width': width, 'height': height, 'depth_dtype': depth_dtype,
+                           'frames_per_chunk': self.frames_per_chunk, 'version': _VERSION},
+                          metadata)
+        elif (width, height, depth_dtype) != (self.width, self.height, self.depth_dtype):
+            raise ValueError('Frame of size {}x{} and depth {} does not match the archive, '
+                             'of size {}x{} and depth {}'.format(
+                                 width, height, depth_dtype, self.width, self.height,
+                                 self.depth_dtype))
+        position = self._count
+        chunk = position // self.frames_per_chunk
+        if self._chunk_number != chunk:
+            if self._chunk_file is not None:
+                self._chunk_file.close()
+            self._chunk_file = open(self._path(_CHUNK.format(chunk)), 'ab')
+            self._chunk_number = chunk
+        self._chunk_file.write(color)
+        self._chunk_file.write(depth)
+        self._chunk_file.flush()
+
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        record['number'] = position if number is None else number
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        if camera is None:
+            for field in ('origin', 'look_at', 'up', 'field_of_view'):
+                record[field] = np.nan
+        else:
+            record['origin'] = camera.origin
+            record['look_at'] = camera.look_at
+            record['up'] = camera.up_vector
+            record['field_of_view'] = camera.field_of_view
+        self._index_file.write(record.tobytes())
+        self._index_file.flush()
+        self._count += 1
+        return position
+
+    def _chunk(self, chunk, needed):
+        """
+        :param chunk: Number of the chunk file
+        :param needed: Number of frames the mapping must hold
+        :return: Read-only memory-mapped structured array of the frames of the chunk
+        """
+        mapped = self._chunks.get(chunk)
+        if mapped is None or len(mapped) < needed:
+            path = self._path(_CHUNK.format(chunk))
+            frames = min(os.path.getsize(path) // self._record.itemsize, self.frames_per_chunk)
+            mapped = np.memmap(path, dtype=self._record, mode='r', shape=(frames,))
+            self._chunks[chunk] = mapped
+        return mapped
+
+    def _frame(self, position):
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError('Frame {} out of range'.format(position))
+        chunk, offset = divmod(position, self.frames_per_chunk)
+        return self._chunk(chunk, offset + 1)[offset]
+
+    def color(self, position):
+        """
+        :param position: Position of the frame in the archive, negative from the end
+        :return: (height, width, 4) uint8 read-only numpy view over the archive
+        """
+        return self._frame(position)['color']
+
+    def depth(self, position):
+        """
+        :param position: Position of the frame in the archive, negative from the end
+        :return: (height, width) uint16 or float32 read-only numpy view over the archive
+        """
+        return self._frame(position)['depth']
+
+    def __getitem__(self, position):
+        """
+        :param position: Position of the frame in the archive, negative from the end
+        :return: FrameBufferSnapshot over the archive, e.g. to hand to a FrameSink
+        """
+        frame = self._frame(position)
+        return FrameBufferSnapshot.from_buffers(self.width, self.height,
+                                                memoryview(frame['color']).cast('B'),
+                                                memoryview(frame['depth']).cast('B'))
+
+    def __iter__(self):
+        return (self[position] for position in range(self._count))
+
+    @property
+    def index(self):
+        """
+        :return: Read-only structured numpy array of INDEX_DTYPE with one record per frame
+        """
+        if self._index is None or len(self._index) != self._count:
+            if not self._count:
+                return np.zeros(0, dtype=INDEX_DTYPE)
+            self._index = np.memmap(self._path(_INDEX), dtype=INDEX_DTYPE, mode='r',
+                                    shape=(self._count,))
+        return self._index
+
+    def find(self, number):
+        """
+        :param number: Number of a frame in the capture
+        :return: Position of the first frame with that number, None if there is none
+        """
+        positions = np.flatnonzero(self.index['number'] == number)
+        return int(positions[0]) if len(positions) else None
+
+    def close(self):
+        """
+        Closes the files of the archive. Views returned so far remain valid
+        """
+        for output in (self._chunk_file, self._index_file):
+            if output is not None:
+                output.close()
+        self._chunk_file = self._index_file = None
+        self._chunk_number = None
+        self._chunks = {}
+        self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def capture(brayns, archive, frames, interval=0.0, start=None):
+    """
+    Appends frames fetched from Brayns to an archive, along with the camera of each
+    :param brayns: Brayns object
+    :param archive: FrameArchive open for writing or appending
+    :param frames: Number of frames to capture
+    :param interval: Minimum time in seconds between two frames
+    :param start: Number of the first frame captured, defaults to the number of frames already
+    in the archive so that successive captures keep numbering the frames in sequence
+    :return: Number of frames captured
+    """
+    if start is None:
+        start = len(archive)
+    for number in range(start, start + frames):
+        fetched = time.time()
+        snapshot = brayns.frame_buffers
+        if snapshot is None:
+            raise IOError('Failed to fetch frame {} from Brayns'.format(number))
+        archive.append(snapshot, brayns.camera, fetched, number)
+        remaining = interval - (time.time() - fetched)
+        if remaining > 0:
+            time.sleep(remaining)
+    return frames
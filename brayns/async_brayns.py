@@ -0,0 +1,704 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import contextvars
+import copy
+import json
+import time
+import warnings
+import aiohttp
+from brayns.brayns import Camera, Viewport, Settings, ImageJPEG, FrameBuffers, \
+    HTTP_METHOD_GET, HTTP_METHOD_PUT, OUTPUT_IMAGE, OUTPUT_ARRAY, _require_numpy
+from brayns.errors import BraynsConnectionError, BraynsTimeoutError, BraynsHTTPError
+from brayns.retry import RetryPolicy, Deadline
+from brayns.stats import Statistics, PHASE_NETWORK
+from brayns.transport import DEFAULT_POOL_SIZE, DEFAULT_HEDGE_PERCENTILE, _HEDGE_MIN_SAMPLES
+
+# Time budget of the calls made in the current context, see AsyncBrayns.deadline
+_NO_DEADLINE = object()
+_DEADLINE = contextvars.ContextVar('brayns_deadline', default=_NO_DEADLINE)
+
+
+async def _run_in_executor(function, *args):
+    """
+    Runs a blocking decode step in the default executor so that it does not stall the loop
+    :param function: Function to call
+    :param args: Arguments of the function
+    :return: Result of the function
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+def _request_timeout(timeout, remaining):
+    """
+    :param timeout: aiohttp.ClientTimeout object of the session
+    :param remaining: Time left before the deadline, None if there is no deadline
+    :return: Timeout of a request, bounded by the time left
+    """
+    if remaining is None:
+        return timeout
+    total = remaining if timeout.total is None else min(timeout.total, remaining)
+    return aiohttp.ClientTimeout(total=total, connect=timeout.connect,
+                                 sock_read=timeout.sock_read, sock_connect=timeout.sock_connect)
+
+
+class AsyncTransport(object):
+    """
+    Asyncio counterpart of brayns.transport.Transport: failed GETs are retried according to
+    the retry policy, every call is bounded by its deadline, updates are sent to the replicas
+    and slow GETs are duplicated to a replica
+    """
+    def __init__(self, session, statistics=None, retry=None, deadline=None, replicas=None,
+                 hedge_percentile=DEFAULT_HEDGE_PERCENTILE):
+        """
+        :param session: aiohttp session
+        :param statistics: Statistics object recording the requests, a new one if None
+        :param retry: RetryPolicy object, defaults to RetryPolicy()
+        :param deadline: Default time budget in seconds of every call, None for no limit
+        :param replicas: Urls of Brayns instances serving the same scene
+        :param hedge_percentile: Latency percentile after which a GET is duplicated to a
+        replica, None to never hedge
+        """
+        self.session = session
+        self.statistics = statistics if statistics is not None else Statistics()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.default_deadline = deadline
+        self.replicas = [replica.rstrip('/') for replica in replicas or []]
+        self.hedge_percentile = hedge_percentile
+        self._stale = set()
+        self._next_replica = 0
+
+    def _deadline(self):
+        seconds = _DEADLINE.get()
+        return Deadline(self.default_deadline if seconds is _NO_DEADLINE else seconds)
+
+    def _record(self, endpoint, start, data, received, error):
+        self.statistics.record(endpoint, PHASE_NETWORK, time.time() - start,
+                               len(data) if data else 0, received, error)
+
+    async def _attempt(self, method, url, endpoint, data, headers, deadline):
+        """
+        Sends a single request and reads the whole response
+        :return: (status, headers, content) tuple
+        :raise BraynsError: if the request failed or Brayns answered with an error status
+        """
+        timeout = _request_timeout(self.session.timeout, deadline.remaining())
+        if timeout.total is not None and timeout.total <= 0:
+            raise BraynsTimeoutError(url, 'deadline exceeded')
+        start = time.time()
+        try:
+            async with self.session.request(method, url, data=data, headers=headers,
+                                            timeout=timeout) as response:
+                content = await response.read()
+        except asyncio.TimeoutError as error:
+            self._record(endpoint, start, data, 0, True)
+            raise BraynsTimeoutError(url, error)
+        except aiohttp.ClientConnectionError as error:
+            self._record(endpoint, start, data, 0, True)
+            raise BraynsConnectionError(url, error)
+        length = response.headers.get('Content-Length')
+        self._record(endpoint, start, data, int(length) if length else len(content),
+                     response.status >= 400)
+        if response.status >= 400:
+            raise BraynsHTTPError(url, response.status)
+        return response.status, response.headers, content
+
+    def _replica(self):
+        replicas = [replica for replica in self.replicas if replica not in self._stale]
+        if not replicas:
+            return None
+        self._next_replica += 1
+        return replicas[self._next_replica % len(replicas)]
+
+    async def _hedged(self, method, url, endpoint, data, headers, deadline):
+        """
+        Sends a GET, and a duplicate to a replica if the first one takes longer than the
+        hedging percentile of the endpoint. The slower request is cancelled
+        :return: First successful response
+        """
+        replica = self._replica() if self.hedge_percentile is not None else None
+        delay = None
+        if replica is not None:
+            delay = self.statistics.percentile(endpoint, PHASE_NETWORK, self.hedge_percentile,
+                                               _HEDGE_MIN_SAMPLES)
+        if delay is None:
+            return await self._attempt(method, url, endpoint, data, headers, deadline)
+        remaining = deadline.remaining()
+        first = asyncio.ensure_future(
+            self._attempt(method, url, endpoint, data, headers, deadline))
+        pending = set([first])
+        try:
+            done, _ = await asyncio.wait(
+                pending, timeout=delay if remaining is None else min(delay, remaining))
+            if done:
+                return first.result()
+            pending.add(asyncio.ensure_future(
+                self._attempt(method, replica + endpoint, endpoint, data, headers, deadline)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _replicate(self, method, replica, endpoint, data, headers, deadline):
+        try:
+            await self._attempt(method, replica + endpoint, endpoint, data, headers, deadline)
+        except (BraynsConnectionError, BraynsTimeoutError, BraynsHTTPError):
+            # The replica is no longer in sync, it is not used for hedging anymore
+            self._stale.add(replica)
+
+    async def request(self, method, url, endpoint, data=None, headers=None):
+        """
+        Sends a request to Brayns, retrying failed GETs according to the retry policy, within
+        the deadline of the call
+        :param method: 'GET' or 'PUT'
+        :param url: Url of the resource
+        :param endpoint: Path of the endpoint, used for statistics and replica urls
+        :param data: Body of the request
+        :param headers: Optional additional headers
+        :return: (status, headers, content) tuple
+        :raise BraynsError: once the retries are exhausted, or if the deadline is exceeded
+        """
+        deadline = self._deadline()
+        replicated = []
+        if method != HTTP_METHOD_GET:
+            replicated = [asyncio.ensure_future(
+                self._replicate(method, replica, endpoint, data, headers, deadline))
+                          for replica in self.replicas if replica not in self._stale]
+        attempt = 0
+        try:
+            while True:
+                try:
+                    if method == HTTP_METHOD_GET and self.replicas:
+                        return await self._hedged(method, url, endpoint, data, headers,
+                                                  deadline)
+                    return await self._attempt(method, url, endpoint, data, headers, deadline)
+                except (BraynsConnectionError, BraynsTimeoutError, BraynsHTTPError) as error:
+                    if attempt >= self.retry.retries or \
+                            not self.retry.retryable(method, error):
+                        raise
+                    delay = self.retry.delay(attempt)
+                    remaining = deadline.remaining()
+                    if remaining is not None and remaining <= delay:
+                        raise
+                    await asyncio.sleep(delay)
+                    attempt += 1
+        finally:
+            if replicated:
+                await asyncio.gather(*replicated)
+
+
+class AsyncHTTPWrapper(object):
+    """
+    Replaces the blocking HTTP communication of HTTPWrapper with coroutines. Classes deriving
+    from it also derive from their synchronous counterpart, from which they get the fields,
+    the properties and the serialization logic.
+
+    Properties cannot be awaited, hence assigning one only records the change locally. Changes
+    are sent to Brayns in a single request by commit() or flush(), by update() which assigns
+    and commits in one go, or when an async batch() block exits:
+
+        camera.origin = [0, 0, 1]
+        await camera.commit()
+        await camera.update(origin=[0, 0, 1])
+        async with camera.batch():
+            camera.origin = [0, 0, 1]
+
+    AsyncBrayns commits the pending changes before fetching a frame, and warns about the ones
+    still pending when it is closed.
+    """
+    def __init__(self, url, transport):
+        """
+        :param url: Brayns' url
+        :param transport: AsyncTransport shared with the other objects of the same Brayns
+        instance
+        """
+        self._url = url
+        self._transport = transport
+        self._statistics = transport.statistics
+        self._commit_lock = asyncio.Lock()
+        self._init_fields()
+
+    def _set(self, attribute, value):
+        """
+        Updates an attribute. The change is sent to Brayns by the next commit
+        :param attribute: Name of the attribute
+        :param value: New value of the attribute
+        """
+        self._record(attribute, value)
+
+    def _changed(self):
+        """
+        Changes are only sent by commit(), which has to be awaited
+        """
+        pass
+
+    def _commit(self):
+        """
+        :raise TypeError: always, changes can only be sent from a coroutine, see commit()
+        """
+        raise TypeError('{} changes are sent by awaiting commit()'.format(type(self).__name__))
+
+    def _restore(self, values):
+        """
+        Assigns field values, marking only the ones that differ from the cached state as
+        modified. They are sent by the next commit
+        :param values: Dictionary of field values indexed by Json key, missing keys are left
+        untouched
+        :return: Json keys of the fields that changed
+        """
+        return [key for attribute, key, _ in self._FIELDS
+                if key in values and self._record(attribute, values[key])]
+
+    @property
+    def pending(self):
+        """
+        :return: True if changes were made that are not sent to Brayns yet
+        """
+        return bool(self._dirty)
+
+    def coalesce(self, coalescer):
+        """
+        :raise NotImplementedError: always, commit() already sends only the latest state
+        """
+        raise NotImplementedError('Updates of the asyncio client cannot be coalesced')
+
+    async def flush(self):
+        """
+        Sends the pending changes of this object now, same as commit()
+        """
+        await self.commit()
+
+    @asynccontextmanager
+    async def batch(self):
+        """
+        Records the changes made inside the block and sends them to Brayns in a single request
+        when the block exits. Changes are discarded if the block raises an exception:
+
+            async with camera.batch():
+                camera.origin = [0, 0, 1]
+                camera.look_at = [0, 0, 0]
+        """
+        with super(AsyncHTTPWrapper, self).batch():
+            yield self
+        await self.commit()
+
+    async def _request(self, method, body=None, headers=None):
+        """
+        Queries the HTTP REST interface of Brayns for a given url and method
+        :param method: PUT or GET
+        :param body: Content to be sent along with the request
+        :param headers: Optional additional headers
+        :return: (status, headers, content) tuple
+        :raise BraynsError: if Brayns could not be reached, did not answer within the deadline
+        or answered with an error status
+        """
+        data = None
+        if method == HTTP_METHOD_PUT and body != '':
+            data = json.dumps(body)
+        return await self._transport.request(method, self._url, self._PATH, data, headers)
+
+    async def _request_frame(self):
+        """
+        Fetches a frame without decoding the response as text, which avoids copies of large
+        frame payloads. Binary frames are asked for if enabled
+        :return: Bytes containing the response from Brayns, and the response headers
+        """
+        headers = {'Accept': self._BINARY_ACCEPT} if self.binary else None
+        _, headers, content = await self._request(HTTP_METHOD_GET, headers=headers)
+        return content, headers
+
+    def _check_property(self, name):
+        """
+        :param name: Name of a property
+        :raise AttributeError: if the object has no property with the given name
+        """
+        if not isinstance(getattr(type(self), name, None), property):
+            raise AttributeError('{} has no property {}'.format(type(self).__name__, name))
+
+    def _get(self, attribute):
+        """
+        Reads an attribute from the cached state, which is refreshed by sync()
+        :param attribute: Name of the attribute
+        :return: Copy of the value of the attribute, see HTTPWrapper._get
+        """
+        with self._lock:
+            return copy.deepcopy(getattr(self, attribute))
+
+    async def sync(self):
+        """
+        Fetches the state of the object from Brayns. The request carries the ETag of the cached
+        state, if any, so that Brayns can answer 304 Not Modified without sending it again
+        """
+        headers = {'If-None-Match': self._etag} if self._etag else None
+        status, headers, content = await self._request(HTTP_METHOD_GET, headers=headers)
+        if status != 304:
+            self._deserialize(content)
+            self._etag = headers.get('ETag')
+
+    async def commit(self):
+        """
+        Sends the fields modified since the last commit to Brayns in a single request
+        """
+        async with self._commit_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                body = self._serialize(self._dirty)
+                self._dirty = set()
+                self._etag = None
+            try:
+                await self._request(HTTP_METHOD_PUT, body)
+            except BaseException:
+                # Sent again with the next commit, see HTTPWrapper._commit
+                with self._lock:
+                    self._dirty.update(body)
+                raise
+
+    async def fetch(self, name):
+        """
+        Fetches the state of the object from Brayns and returns the value of a property
+        :param name: Name of the property, e.g. 'origin'
+        :return: Current value of the property
+        """
+        self._check_property(name)
+        await self.sync()
+        return getattr(self, name)
+
+    async def update(self, **values):
+        """
+        Assigns the given properties and sends the changes to Brayns in a single request
+        :param values: New values indexed by property name, e.g. origin=[0, 0, 1]
+        """
+        for name in values:
+            self._check_property(name)
+        for name, value in values.items():
+            setattr(self, name, value)
+        await self.commit()
+
+
+class AsyncCamera(AsyncHTTPWrapper, Camera):
+
+    def __init__(self, brayns_url, transport):
+        """
+        :param brayns_url: Brayns' url
+        :param transport: AsyncTransport shared with the other objects of the same Brayns
+        instance
+        """
+        super(AsyncCamera, self).__init__(brayns_url + self._PATH, transport)
+
+
+class AsyncViewport(AsyncHTTPWrapper, Viewport):
+
+    def __init__(self, brayns_url, transport):
+        """
+        :param brayns_url: Brayns' url
+        :param transport: AsyncTransport shared with the other objects of the same Brayns
+        instance
+        """
+        super(AsyncViewport, self).__init__(brayns_url + self._PATH, transport)
+
+
+class AsyncSettings(AsyncHTTPWrapper, Settings):
+
+    def __init__(self, brayns_url, transport):
+        """
+        :param brayns_url: Brayns' url
+        :param transport: AsyncTransport shared with the other objects of the same Brayns
+        instance
+        """
+        super(AsyncSettings, self).__init__(brayns_url + self._PATH, transport)
+
+
+class AsyncImageJPEG(AsyncHTTPWrapper, ImageJPEG):
+
+    def __init__(self, brayns_url, transport):
+        """
+        :param brayns_url: Brayns' url
+        :param transport: AsyncTransport shared with the other objects of the same Brayns
+        instance
+        """
+        super(AsyncImageJPEG, self).__init__(brayns_url + self._PATH, transport)
+
+    async def get(self):
+        return await _run_in_executor(self._decode, *await self._request_frame())
+
+    async def get_data(self):
+        """
+        :return: Encoded JPEG bytes as sent by Brayns
+        """
+        return await _run_in_executor(self._decode_data, *await self._request_frame())
+
+    async def get_array(self, out=None):
+        content, headers = await self._request_frame()
+        return await _run_in_executor(self._decode_array, content, headers, out)
+
+
+class AsyncFrameBuffers(AsyncHTTPWrapper, FrameBuffers):
+
+    def __init__(self, brayns_url, transport):
+        """
+        :param brayns_url: Brayns' url
+        :param transport: AsyncTransport shared with the other objects of the same Brayns
+        instance
+        """
+        super(AsyncFrameBuffers, self).__init__(brayns_url + self._PATH, transport)
+
+    async def snapshot(self):
+        return await _run_in_executor(self._decode_snapshot, *await self._request_frame())
+
+    async def color(self):
+        return await _run_in_executor(self._decode_color, *await self._request_frame())
+
+    async def depth(self):
+        return await _run_in_executor(self._decode_depth, *await self._request_frame())
+
+    async def color_array(self, out=None):
+        snapshot = await self.snapshot()
+        if snapshot is None:
+            return None
+        return await _run_in_executor(snapshot.color_array, out)
+
+    async def depth_array(self, dtype=None, out=None):
+        snapshot = await self.snapshot()
+        if snapshot is None:
+            return None
+        return await _run_in_executor(snapshot.depth_array, dtype, out)
+
+
+def _client_timeout(timeout):
+    """
+    :param timeout: Timeout in seconds, either a number or a (connect, read) tuple. None waits
+    forever
+    :return: aiohttp.ClientTimeout object
+    """
+    if isinstance(timeout, (tuple, list)):
+        return aiohttp.ClientTimeout(total=None, sock_connect=timeout[0], sock_read=timeout[1])
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+class AsyncBrayns(object):
+    """
+    Asyncio counterpart of Brayns. All the objects of an instance share one pooled session so
+    that many requests can be in flight at the same time:
+
+        async with AsyncBrayns('http://localhost:5000') as brayns:
+            await brayns.camera.update(origin=[0.5, 0.5, 2.0])
+            image = await brayns.image_jpeg
+
+    Assigning a property only records the change, see AsyncHTTPWrapper: changes are sent by
+    commit(), and before every frame is fetched.
+    """
+    def __init__(self, url, pool_size=DEFAULT_POOL_SIZE, timeout=None, output=OUTPUT_IMAGE,
+                 binary=True, compression=True, retry=None, deadline=None, replicas=None,
+                 hedge_percentile=DEFAULT_HEDGE_PERCENTILE):
+        """
+        :param url: Brayns' url
+        :param pool_size: Maximum number of simultaneous connections to Brayns
+        :param timeout: Timeout in seconds for every request, either a number or a
+        (connect, read) tuple. None waits forever
+        :param output: OUTPUT_IMAGE to get images and frame buffers as Pillow Image objects,
+        OUTPUT_ARRAY to get them as numpy arrays
+        :param binary: If True, frames are asked for as binary data, see Brayns
+        :param compression: If True, responses may be compressed with any encoding aiohttp
+        decodes, otherwise uncompressed responses are asked for
+        :param retry: RetryPolicy object for failed requests, defaults to RetryPolicy()
+        :param deadline: Default time budget in seconds of every call, None for no limit
+        :param replicas: Urls of other Brayns instances serving the same scene, see Brayns
+        :param hedge_percentile: Latency percentile after which a GET is duplicated to a
+        replica, None to never hedge
+        """
+        if output == OUTPUT_ARRAY:
+            _require_numpy()
+        self._url = url
+        self.output = output
+        self._binary = binary
+        self._compression = compression
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._retry = retry
+        self._deadline = deadline
+        self._replicas = replicas
+        self._hedge_percentile = hedge_percentile
+        self._session = None
+        self.statistics = Statistics()
+        self.viewport = None
+        self.camera = None
+        self.settings = None
+        self._image_jpeg = None
+        self._frame_buffers = None
+
+    async def open(self):
+        """
+        Opens the connection pool and initializes viewport, camera and settings from Brayns
+        :return: self
+        """
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self._pool_size),
+            timeout=_client_timeout(self._timeout),
+            headers=None if self._compression else {'Accept-Encoding': 'identity'})
+        transport = AsyncTransport(self._session, self.statistics, self._retry, self._deadline,
+                                   self._replicas, self._hedge_percentile)
+        self.viewport = AsyncViewport(self._url, transport)
+        self.camera = AsyncCamera(self._url, transport)
+        self.settings = AsyncSettings(self._url, transport)
+        self._image_jpeg = AsyncImageJPEG(self._url, transport)
+        self._frame_buffers = AsyncFrameBuffers(self._url, transport)
+        self._image_jpeg.binary = self._frame_buffers.binary = self._binary
+        try:
+            await self.sync()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def close(self):
+        """
+        Closes all connections to Brayns
+        """
+        pending = [wrapper._PATH for wrapper in  # pylint: disable=W0212
+                   (self.viewport, self.camera, self.settings)
+                   if wrapper is not None and wrapper.pending]
+        if pending:
+            warnings.warn('Changes to {} were never sent to Brayns, see commit()'.format(
+                ', '.join(pending)), RuntimeWarning, stacklevel=2)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @staticmethod
+    @contextmanager
+    def deadline(seconds):
+        """
+        Bounds every call made by the current task inside the block, retries included:
+
+            with brayns.deadline(0.5):
+                image = await brayns.image_jpeg
+
+        :param seconds: Time budget of each call, None for no limit
+        """
+        token = _DEADLINE.set(seconds)
+        try:
+            yield
+        finally:
+            _DEADLINE.reset(token)
+
+    def stats(self, reset=False):
+        """
+        :param reset: If True, clears the statistics once they are read
+        :return: Statistics of the requests sent to Brayns, see Brayns.stats
+        """
+        return self.statistics.summary(reset)
+
+    async def sync(self):
+        """
+        Fetches viewport, camera and settings from Brayns concurrently
+        """
+        await asyncio.gather(self.viewport.sync(), self.camera.sync(), self.settings.sync())
+
+    async def commit(self):
+        """
+        Sends the pending viewport, camera and settings changes concurrently, with at most one
+        request per endpoint
+        """
+        await asyncio.gather(self.viewport.commit(), self.camera.commit(), self.settings.commit())
+
+    async def flush(self):
+        """
+        Sends the pending changes now, same as commit()
+        """
+        await self.commit()
+
+    async def _frame(self, fetch, *args):
+        """
+        Sends the pending changes, so that the frame reflects them, then fetches it
+        :param fetch: Coroutine function fetching the frame
+        :param args: Arguments of fetch
+        :return: Frame returned by fetch
+        """
+        await self.commit()
+        return await fetch(*args)
+
+    @property
+    def image_jpeg(self):
+        """
+        Get JPEG image from Brayns
+        :return: Awaitable resolving to a Pillow Image object or a numpy array depending on the
+        output mode
+        """
+        if self.output == OUTPUT_ARRAY:
+            return self._frame(self._image_jpeg.get_array)
+        return self._frame(self._image_jpeg.get)
+
+    @property
+    def image_jpeg_data(self):
+        """
+        Get JPEG image from Brayns without decoding it
+        :return: Awaitable resolving to the encoded JPEG bytes
+        """
+        return self._frame(self._image_jpeg.get_data)
+
+    @property
+    def frame_buffers(self):
+        """
+        Get color and depth frame buffers of the same frame in a single request
+        :return: Awaitable resolving to a FrameBufferSnapshot object
+        """
+        return self._frame(self._frame_buffers.snapshot)
+
+    @property
+    def color_frame_buffer(self):
+        """
+        Get color frame buffer for Brayns
+        :return: Awaitable resolving to a Pillow Image object or a numpy array depending on the
+        output mode
+        """
+        if self.output == OUTPUT_ARRAY:
+            return self._frame(self._frame_buffers.color_array)
+        return self._frame(self._frame_buffers.color)
+
+    @property
+    def depth_frame_buffer(self):
+        """
+        Get depth frame buffer for Brayns
+        :return: Awaitable resolving to a Pillow Image object or a numpy array depending on the
+        output mode
+        """
+        if self.output == OUTPUT_ARRAY:
+            return self._frame(self._frame_buffers.depth_array)
+        return self._frame(self._frame_buffers.depth)
@@ -23,10 +23,37 @@
 # All rights reserved. Do not distribute without further notice.
 
 import base64
+import binascii
+from contextlib import contextmanager
+import copy
 from io import BytesIO
 import json
+import threading
+import time
 from PIL import Image
-import requests
+from brayns.coalescer import Coalescer, DEFAULT_MAX_RATE
+# Errors and retry policies are part of the API of this module
+from brayns.errors import BraynsError, BraynsConnectionError, BraynsTimeoutError, \
+    BraynsHTTPError
+from brayns.retry import RetryPolicy, NO_RETRY
+from brayns.snapshot import Snapshot
+from brayns.stats import timer, PHASE_JSON, PHASE_BASE64, PHASE_IMAGE
+from brayns.stream import FrameStream, STREAM_BLOCK
+from brayns.transport import Transport, DEFAULT_POOL_SIZE, DEFAULT_HEDGE_PERCENTILE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Faster Json parsers are used for frame payloads when available
+try:
+    import orjson as fast_json
+except ImportError:
+    try:
+        import ujson as fast_json
+    except ImportError:
+        fast_json = None
 
 BRAYNS_SHADING_DIFFUSE = 'diffuse'
 BRAYNS_SHADING_ELECTRON = 'electron'
@@ -37,52 +64,383 @@ BRAYNS_SHADER_PROXIMITY_DETECTION = 'proximity'
 BRAYNS_SHADER_SIMULATION = 'simulation'
 BRAYNS_SHADER_SCIENTIFIC_VISUALIZATION = 'scientific_visualization'
 
+# Types of objects returned for images and frame buffers
+OUTPUT_IMAGE = 'image'
+OUTPUT_ARRAY = 'array'
+
+# Kinds of frames that can be fetched from Brayns
+FRAME_JPEG = 'jpeg'
+FRAME_COLOR = 'color'
+FRAME_DEPTH = 'depth'
+
+# Number of base64 characters decoded at once when decoding into a preallocated buffer
+BASE64_CHUNK_SIZE = 1 << 20
+
 # Brayns supported HTTP REST method
 HTTP_METHOD_PUT = 'PUT'
 HTTP_METHOD_GET = 'GET'
 
+# Content types of frames sent as binary data instead of base64 in Json
+CONTENT_TYPE_JPEG = 'image/jpeg'
+CONTENT_TYPE_BINARY = 'application/octet-stream'
+
+# Headers describing binary frame buffers. The body holds the color buffer followed by the
+# depth buffer
+HEADER_WIDTH = 'X-Brayns-Width'
+HEADER_HEIGHT = 'X-Brayns-Height'
+HEADER_COLOR_SIZE = 'X-Brayns-Color-Size'
+HEADER_DEPTH_SIZE = 'X-Brayns-Depth-Size'
+
+
+def _to_array(array, out=None):
+    """
+    :param array: Numpy array to return
+    :param out: Optional preallocated array, reused across frames, that receives a copy of array
+    :return: out if given, array otherwise
+    """
+    if out is None:
+        return array
+    np.copyto(out, array, casting='unsafe')
+    return out
+
+
+def _loads(content):
+    """
+    Parses Json with the fastest parser installed
+    :param content: Bytes or string containing Json
+    :return: Decoded object
+    """
+    if fast_json is not None:
+        return fast_json.loads(content)
+    return json.loads(content)
+
+
+def _b64_decoded_size(data):
+    """
+    :param data: Base64 string or bytes without line breaks
+    :return: Number of bytes data decodes to
+    """
+    padding = data[-2:].count('=' if isinstance(data, str) else b'=')
+    return len(data) // 4 * 3 - padding
+
+
+def _b64decode_into(data, buffer):
+    """
+    Decodes base64 data into a preallocated buffer, one chunk at a time, so that the whole
+    decoded data is never held in a temporary object
+    :param data: Base64 string or bytes without line breaks
+    :param buffer: Writable contiguous buffer of exactly the decoded size, e.g. a numpy array
+    :return: True on success, False if data could not be decoded in chunks
+    """
+    if len(data) % 4:
+        return False
+    view = memoryview(buffer).cast('B')
+    offset = 0
+    for start in range(0, len(data), BASE64_CHUNK_SIZE):
+        chunk = binascii.a2b_base64(data[start:start + BASE64_CHUNK_SIZE])
+        if offset + len(chunk) > len(view):
+            return False
+        view[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    return offset == len(view)
+
+
+def _content_type(headers):
+    """
+    :param headers: Response headers, None for a Json response
+    :return: Media type of the response, without parameters, lower case
+    """
+    if headers is None:
+        return ''
+    return (headers.get('Content-Type') or '').split(';')[0].strip().lower()
+
+
+def _untimed(phase):
+    """
+    :return: Context manager recording nothing, for decoding outside of any Brayns object
+    """
+    return timer(None, None, phase)
+
+
+def _require_numpy():
+    """
+    :raise ImportError: if numpy is not installed
+    """
+    if np is None:
+        raise ImportError('numpy is required for array output, install it with the numpy extra')
+
 
 class HTTPWrapper(object):
     """
     Base class that wraps HTTP communication to python objects
     """
-    def __init__(self, url):
+    # Path of the endpoint, relative to Brayns' url
+    _PATH = ''
+    # Accept header of frame requests when binary frames are enabled
+    _BINARY_ACCEPT = None
+
+    binary = False
+    # (attribute, json key, default value) triplets describing the state of the object
+    _FIELDS = ()
+
+    def __init__(self, url, transport=None):
         """
         :param url: Brayns' url
+        :param transport: Transport shared with the other objects of the same Brayns instance.
+        A private one is created if None
         """
         self._url = url
+        self._transport = transport if transport is not None else Transport()
+        self._statistics = self._transport.statistics
+        self._init_fields()
+
+    def _init_fields(self):
+        """
+        Sets every field to its default value and resets the change tracking
+        """
+        for attribute, _, default in self._FIELDS:
+            setattr(self, attribute, copy.deepcopy(default))
+        self._lock = threading.RLock()
+        self._send_lock = threading.Lock()
+        # Held by the thread in a batch, and by setters, so that changes made by other threads
+        # are neither held back nor discarded by a batch they are not part of
+        self._batch_lock = threading.RLock()
+        self._dirty = set()
+        self._batch_depth = 0
+        self._batch_backup = None
+        self._coalescer = None
+        self._etag = None
+        self._synced_at = 0.0
+        self.ttl = None
+
+    def _timer(self, phase):
+        """
+        :param phase: PHASE_NETWORK, PHASE_JSON, PHASE_BASE64 or PHASE_IMAGE
+        :return: Context manager recording the duration of a phase for this endpoint
+        """
+        return timer(self._statistics, self._PATH, phase)
 
-    def _serialize(self):
+    def _serialize(self, keys=None):
         """
+        :param keys: Json keys to serialize, all of them if None
         :return: Json representation of the object
         """
-        pass
+        return dict((key, getattr(self, attribute)) for attribute, key, _ in self._FIELDS
+                    if keys is None or key in keys)
+
+    def _deserialize(self, content):
+        """
+        Updates the object from its Json representation. Keys missing from the content, and
+        fields modified locally but not sent yet, are left untouched
+        :param content: String containing the Json representation of the object
+        """
+        with self._timer(PHASE_JSON):
+            obj = json.loads(content)
+        with self._lock:
+            for attribute, key, _ in self._FIELDS:
+                if key in obj and key not in self._dirty:
+                    setattr(self, attribute, obj[key])
+
+    def _get(self, attribute):
+        """
+        Reads an attribute from the cached state, which is synchronized with Brayns first if it
+        is older than the time to live
+        :param attribute: Name of the attribute
+        :return: Copy of the value of the attribute, so that modifying it in place and assigning
+        it back is seen as a change
+        """
+        if self.ttl is not None and time.time() - self._synced_at > self.ttl:
+            self.sync()
+        with self._lock:
+            return copy.deepcopy(getattr(self, attribute))
+
+    def sync(self):
+        """
+        Fetches the state of the object from Brayns. The request carries the ETag of the cached
+        state, if any, so that Brayns can answer 304 Not Modified without sending it again
+        """
+        headers = {'If-None-Match': self._etag} if self._etag else None
+        request = self._send(HTTP_METHOD_GET, headers=headers)
+        with self._lock:
+            if request.status_code != 304:
+                self._deserialize(request.text)
+                self._etag = request.headers.get('ETag')
+            self._synced_at = time.time()
+
+    def _values(self):
+        """
+        :return: Dictionary of copies of the field values indexed by Json key, synchronized
+        with Brayns first if older than the time to live
+        """
+        if self.ttl is not None and time.time() - self._synced_at > self.ttl:
+            self.sync()
+        with self._lock:
+            return copy.deepcopy(self._serialize())
+
+    def _restore(self, values):
+        """
+        Assigns field values, sending only the ones that differ from the cached state
+        :param values: Dictionary of field values indexed by Json key, missing keys are left
+        untouched
+        :return: Json keys of the fields that changed
+        """
+        changed = []
+        with self.batch():
+            for attribute, key, _ in self._FIELDS:
+                if key in values and self._record(attribute, values[key]):
+                    changed.append(key)
+        return changed
+
+    def _record(self, attribute, value):
+        """
+        Updates an attribute and marks its field as modified if the value changes
+        :param attribute: Name of the attribute
+        :param value: New value of the attribute
+        :return: True if the value changed
+        """
+        if hasattr(value, 'tolist'):
+            # numpy arrays and scalars
+            value = value.tolist()
+        with self._lock:
+            if getattr(self, attribute) == value:
+                return False
+            setattr(self, attribute, copy.deepcopy(value))
+            self._dirty.update(key for name, key, _ in self._FIELDS if name == attribute)
+            return True
+
+    def _set(self, attribute, value):
+        """
+        Updates an attribute and sends it to Brayns, unless a batch is pending. Nothing is sent
+        if the value does not change and Brayns has it already. Waits for the batches of other
+        threads to exit
+        :param attribute: Name of the attribute
+        :param value: New value of the attribute
+        """
+        with self._batch_lock, self._lock:
+            changed = self._record(attribute, value) or \
+                any(name == attribute and key in self._dirty for name, key, _ in self._FIELDS)
+            changed = changed and self._batch_depth == 0
+        if changed:
+            self._changed()
+
+    def _changed(self):
+        """
+        Sends the pending changes, or schedules them when updates are coalesced
+        """
+        if self._coalescer is not None:
+            self._coalescer.schedule(self)
+        else:
+            self._commit()
+
+    def _commit(self):
+        """
+        Sends the fields modified since the last commit to Brayns in a single request
+        """
+        with self._send_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                body = self._serialize(self._dirty)
+                self._dirty = set()
+                # The cached state no longer matches any version known to Brayns
+                self._etag = None
+            try:
+                self._request(HTTP_METHOD_PUT, body)
+            except BaseException:
+                # Brayns may not have the values, they are sent again with the next commit.
+                # Fields modified since are already marked
+                with self._lock:
+                    self._dirty.update(body)
+                raise
+
+    def coalesce(self, coalescer):
+        """
+        Makes setters return immediately and leaves sending the changes to a background
+        flusher, which only sends the latest state
+        :param coalescer: Coalescer object, None to send changes synchronously again
+        """
+        previous = self._coalescer
+        self._coalescer = coalescer
+        if previous is not None:
+            previous.flush()
+
+    def flush(self):
+        """
+        Sends the pending changes of this object now
+        """
+        self._commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Records the changes made inside the block and sends them to Brayns in a single request
+        when the block exits. Changes are discarded if the block raises an exception. Other
+        threads wait for the block to exit before modifying the object
+        """
+        with self._batch_lock:
+            with self._lock:
+                if self._batch_depth == 0:
+                    self._batch_backup = (
+                        dict((attribute, copy.deepcopy(getattr(self, attribute)))
+                             for attribute, _, _ in self._FIELDS), set(self._dirty))
+                self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                with self._lock:
+                    self._batch_depth -= 1
+                    if self._batch_depth == 0:
+                        values, self._dirty = self._batch_backup
+                        for attribute, value in values.items():
+                            setattr(self, attribute, value)
+                        self._batch_backup = None
+                raise
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth > 0:
+                    return
+                self._batch_backup = None
+        self._changed()
+
+    def _send(self, method, body=None, headers=None):
+        """
+        Sends a request to the HTTP REST interface of Brayns and reads the whole response
+        :param method: PUT or GET
+        :param body: Content to be sent along with the request
+        :param headers: Optional additional headers
+        :return: requests.Response object
+        :raise BraynsError: if Brayns could not be reached, did not answer within the deadline
+        or answered with an error status
+        """
+        data = None
+        if method == HTTP_METHOD_PUT and body != '':
+            data = json.dumps(body)
+        return self._transport.request(method, self._url, self._PATH, data, headers)
 
     def _request(self, method, body=None):
         """
         Queries the HTTP REST interface of Brayns for a given url and method
         :param method: PUT or GET
         :param body: Content to be sent along with the request
-        :return: String containing the response from Brayns, None method is PUT of if Brayns
-        could not be reached
-        """
-        response = None
-        request = None
-        try:
-            if method == HTTP_METHOD_PUT:
-                if body == '':
-                    request = requests.put(self._url)
-                else:
-                    request = requests.put(self._url, data=json.dumps(body))
-            elif method == HTTP_METHOD_GET:
-                request = requests.get(self._url)
-                response = str(request.text)
-            request.close()
-        except requests.exceptions.ConnectionError:
-            print('ERROR: Failed to connect to Brayns, did you start it with the '\
-                  '--zeroeq-http-server command line option?')
-            exit(1)
-        return response
+        :return: String containing the response from Brayns, None if method is PUT
+        :raise BraynsError: if Brayns could not be reached, did not answer within the deadline
+        or answered with an error status
+        """
+        request = self._send(method, body)
+        if method == HTTP_METHOD_GET:
+            return str(request.text)
+        return None
+
+    def _request_frame(self):
+        """
+        Fetches a frame without decoding the response as text, which avoids copies of large
+        frame payloads. Binary frames are asked for if enabled, Brayns answers with Json if it
+        does not support them
+        :return: Bytes containing the response from Brayns, and the response headers
+        """
+        headers = {'Accept': self._BINARY_ACCEPT} if self.binary else None
+        request = self._send(HTTP_METHOD_GET, headers=headers)
+        return request.content, request.headers
 
     def __str__(self):
         """
@@ -93,310 +451,945 @@ class HTTPWrapper(object):
 
 class Camera(HTTPWrapper):
 
-    def __init__(self, brayns_url):
+    _PATH = '/v1/camera'
+
+    _FIELDS = (
+        ('_origin', 'origin', [0, 0, -1]),
+        ('_look_at', 'look_at', [0, 0, 0]),
+        ('_up', 'up', [0, 1, 0]),
+        ('_aperture', 'aperture', 0),
+        ('_focal_length', 'focal_length', 0),
+        ('_field_of_view', 'field_of_view', 45.0)
+    )
+
+    def __init__(self, brayns_url, transport=None):
         """
         :param brayns_url: Brayns' url
+        :param transport: Transport shared with the other objects of the same Brayns instance
         """
-        super(Camera, self).__init__(brayns_url + '/v1/camera')
-        self._origin = [0, 0, -1]
-        self._look_at = [0, 0, 0]
-        self._up = [0, 1, 0]
-        self._aperture = 0
-        self._focal_length = 0
+        super(Camera, self).__init__(brayns_url + self._PATH, transport)
         ''' Initialize values from Brayns '''
-        self._deserialize(self._request(HTTP_METHOD_GET))
+        self.sync()
 
     @property
     def origin(self):
-        return self._origin
+        return self._get('_origin')
 
     @origin.setter
     def origin(self, origin):
-        self._origin = origin
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_origin', origin)
 
     @property
     def look_at(self):
-        return self._look_at
+        return self._get('_look_at')
 
     @look_at.setter
     def look_at(self, look_at):
-        self._look_at = look_at
+        self._set('_look_at', look_at)
 
     @property
     def up_vector(self):
-        return self._up
+        return self._get('_up')
 
     @up_vector.setter
     def up_vector(self, up_vector):
-        self._up = up_vector
+        self._set('_up', up_vector)
 
     @property
     def aperture(self):
-        return self._aperture
+        return self._get('_aperture')
 
     @aperture.setter
     def aperture(self, aperture):
-        self._aperture = aperture
+        self._set('_aperture', aperture)
 
     @property
     def focal_length(self):
-        return self._focal_length
+        return self._get('_focal_length')
 
     @focal_length.setter
     def focal_length(self, focal_length):
-        self._focal_length = focal_length
+        self._set('_focal_length', focal_length)
 
-    def _serialize(self):
-        return {
-            "origin": self._origin,
-            "lookAt": self._look_at,
-            "up": self._up,
-            "aperture": self._aperture,
-            "focal_length": self._focal_length
-        }
+    @property
+    def field_of_view(self):
+        """
+        Vertical field of view in degrees
+        """
+        return self._get('_field_of_view')
 
-    def _deserialize(self, content):
-        obj = json.loads(content)
-        self._origin = obj['origin']
-        self._look_at = obj['look_at']
-        self._up = obj['up']
-        self._aperture = obj['aperture']
-        self._focal_length = obj['focal_length']
+    @field_of_view.setter
+    def field_of_view(self, field_of_view):
+        self._set('_field_of_view', field_of_view)
 
 
 class Viewport(HTTPWrapper):
 
-    def __init__(self, brayns_url):
+    _PATH = '/v1/viewport'
+
+    _FIELDS = (
+        ('_size', 'size', [800, 600]),
+    )
+
+    def __init__(self, brayns_url, transport=None):
         """
         :param brayns_url: Brayns' url
+        :param transport: Transport shared with the other objects of the same Brayns instance
         """
-        super(Viewport, self).__init__(brayns_url + '/v1/viewport')
-        self._size = [800, 600]
-        self._deserialize(self._request(HTTP_METHOD_GET))
+        super(Viewport, self).__init__(brayns_url + self._PATH, transport)
+        ''' Initialize values from Brayns '''
+        self.sync()
 
     @property
     def size(self):
-        return self._size
+        return self._get('_size')
 
     @size.setter
     def size(self, size):
-        self._size = size
-        self._request(HTTP_METHOD_PUT, self._serialize())
-
-    def _serialize(self):
-        return {"size": self._size}
-
-    def _deserialize(self, content):
-        obj = json.loads(content)
-        self._size = obj['size']
+        self._set('_size', size)
 
 
 class Settings(HTTPWrapper):
 
-    def __init__(self, brayns_url):
+    _PATH = '/v1/settings'
+
+    _FIELDS = (
+        ('_bg_color', 'background_color', [0, 0, 0]),
+        ('_samples_per_pixel', 'samples_per_pixel', 1),
+        ('_shader', 'shader', BRAYNS_SHADER_BASIC),
+        ('_shading', 'shading', BRAYNS_SHADING_DIFFUSE),
+        ('_shadows', 'shadows', 0.0),
+        ('_soft_shadows', 'soft_shadows', 0.0),
+        ('_ambient_occlusion', 'ambient_occlusion', 0.0),
+        ('_epsilon', 'epsilon', 1e-6),
+        ('_jpeg_compression', 'jpeg_compression', 100),
+        ('_jpeg_size', 'jpeg_size', [800, 600])
+    )
+
+    def __init__(self, brayns_url, transport=None):
         """
         :param brayns_url: Brayns' url
+        :param transport: Transport shared with the other objects of the same Brayns instance
         """
-        super(Settings, self).__init__(brayns_url + '/v1/settings')
-        self._ambient_occlusion = 0.0
-        self._shadows = 0.0
-        self._soft_shadows = 0.0
-        self._jpeg_compression = 100
-        self._jpeg_size = [800, 600]
-        self._samples_per_pixel = 1
-        self._bg_color = [0, 0, 0]
-        self._epsilon = 1e-6
-        self._shader = BRAYNS_SHADER_BASIC
-        self._shading = BRAYNS_SHADING_DIFFUSE
+        super(Settings, self).__init__(brayns_url + self._PATH, transport)
         ''' Initialize values from Brayns '''
-        self._deserialize(self._request(HTTP_METHOD_GET))
+        self.sync()
 
     @property
     def ambient_occlusion(self):
-        return self._ambient_occlusion
+        return self._get('_ambient_occlusion')
 
     @ambient_occlusion.setter
     def ambient_occlusion(self, strength):
-        self._ambient_occlusion = strength
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_ambient_occlusion', strength)
 
     @property
     def jpeg_compression(self):
-        return self._jpeg_compression
+        return self._get('_jpeg_compression')
 
     @jpeg_compression.setter
     def jpeg_compression(self, compression):
-        self._jpeg_compression = compression
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_jpeg_compression', compression)
 
     @property
     def samples_per_pixel(self):
-        return self._samples_per_pixel
+        return self._get('_samples_per_pixel')
 
     @samples_per_pixel.setter
     def samples_per_pixel(self, samples_per_pixel):
-        self._samples_per_pixel = samples_per_pixel
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_samples_per_pixel', samples_per_pixel)
 
     @property
     def background_color(self):
-        return self._bg_color
+        return self._get('_bg_color')
 
     @background_color.setter
     def background_color(self, color):
-        self._bg_color = color
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_bg_color', color)
 
     @property
     def jpeg_size(self):
-        return self._jpeg_size
+        return self._get('_jpeg_size')
 
     @jpeg_size.setter
     def jpeg_size(self, size):
-        self._jpeg_size = size
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_jpeg_size', size)
 
     @property
     def shadows(self):
-        return self._shadows
+        return self._get('_shadows')
 
     @shadows.setter
     def shadows(self, strength):
-        self._shadows = strength
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_shadows', strength)
 
     @property
     def soft_shadows(self):
-        return self._soft_shadows
+        return self._get('_soft_shadows')
 
     @soft_shadows.setter
     def soft_shadows(self, strength):
-        self._soft_shadows = strength
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_soft_shadows', strength)
 
     @property
     def epsilon(self):
-        return self._epsilon
+        return self._get('_epsilon')
 
     @epsilon.setter
     def epsilon(self, epsilon):
-        self._epsilon = epsilon
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_epsilon', epsilon)
 
     @property
     def shading(self):
-        return self._shading
+        return self._get('_shading')
 
     @shading.setter
     def shading(self, shading):
-        self._shading = shading
-        self._request(HTTP_METHOD_PUT, self._serialize())
+        self._set('_shading', shading)
 
     @property
     def shader(self):
-        return self._shader
+        return self._get('_shader')
 
     @shader.setter
     def shader(self, shader):
-        self._shader = shader
-        self._request(HTTP_METHOD_PUT, self._serialize())
-
-    def _serialize(self):
-        return {
-            "background_color": self._bg_color,
-            "samples_per_pixel": self._samples_per_pixel,
-            "shader": self._shader,
-            "shading": self._shading,
-            "shadows": self._shadows,
-            "soft_shadows": self._soft_shadows,
-            "ambient_occlusion": self._ambient_occlusion,
-            "epsilon": self._epsilon
-        }
-
-    def _deserialize(self, content):
-        obj = json.loads(content)
-        self._ambient_occlusion = obj["ambient_occlusion"]
-        self._jpeg_quality = obj["jpeg_compression"]
-        self._samples_per_pixel = obj["samples_per_pixel"]
-        self._bg_color = obj["background_color"]
-        self._epsilon = obj["epsilon"]
-        self._shadows = obj["shadows"]
-        self._soft_shadows = obj["soft_shadows"]
+        self._set('_shader', shader)
 
 
 class ImageJPEG(HTTPWrapper):
 
-    def __init__(self, brayns_url):
+    _PATH = '/v1/image-jpeg'
+    _BINARY_ACCEPT = CONTENT_TYPE_JPEG + ', application/json;q=0.5'
+
+    # Ask for the encoded image as is instead of base64 in Json
+    binary = True
+
+    def __init__(self, brayns_url, transport=None):
         """
         :param brayns_url: Brayns' url
+        :param transport: Transport shared with the other objects of the same Brayns instance
         """
-        super(ImageJPEG, self).__init__(brayns_url + '/v1/image-jpeg')
+        super(ImageJPEG, self).__init__(brayns_url + self._PATH, transport)
 
     def get(self):
-        response = self._request(HTTP_METHOD_GET)
+        return self._decode(*self._request_frame())
+
+    def get_data(self):
+        """
+        :return: Encoded JPEG bytes as sent by Brayns, None if Brayns did not answer
+        """
+        return self._decode_data(*self._request_frame())
+
+    def get_array(self, out=None):
+        """
+        :param out: Optional preallocated (height, width, 3) uint8 array reused across frames
+        :return: (height, width, 3) uint8 numpy array, None if Brayns did not answer
+        """
+        content, headers = self._request_frame()
+        return self._decode_array(content, headers, out)
+
+    def _decode(self, response, headers=None):
+        """
+        :param response: Bytes or string containing the response from Brayns
+        :param headers: Response headers, None for a Json response
+        :return: Pillow Image object, None if response is None
+        """
+        data = self._decode_data(response, headers)
+        if data is None:
+            return None
+        with self._timer(PHASE_IMAGE):
+            image = Image.open(BytesIO(data))
+            # Pillow decodes lazily, load now so that decoding is accounted for here
+            image.load()
+        return image
+
+    def _decode_data(self, response, headers=None):
+        """
+        :param response: Bytes or string containing the response from Brayns
+        :param headers: Response headers, None for a Json response
+        :return: Encoded JPEG bytes, None if response is None
+        """
         if response is None:
             return None
-        payload = json.loads(response)
-        return Image.open(BytesIO(base64.b64decode(payload['data'])))
+        if _content_type(headers) == CONTENT_TYPE_JPEG:
+            return response
+        with self._timer(PHASE_JSON):
+            data = _loads(response)['data']
+        with self._timer(PHASE_BASE64):
+            return base64.b64decode(data)
+
+    def _decode_array(self, response, headers=None, out=None):
+        """
+        :param response: Bytes or string containing the response from Brayns
+        :param headers: Response headers, None for a Json response
+        :param out: Optional preallocated array receiving the decoded image
+        :return: Numpy array, None if response is None
+        """
+        _require_numpy()
+        image = self._decode(response, headers)
+        if image is None:
+            return None
+        return _to_array(np.asarray(image), out)
+
+
+class FrameBufferSnapshot(object):
+    """
+    Color and depth buffers of a single frame, fetched from Brayns in one request. Each buffer
+    is decoded the first time it is accessed
+    """
+    def __init__(self, payload, timer=None):
+        """
+        :param payload: Decoded Json response of the frame-buffers endpoint
+        :param timer: Optional callable taking a phase and returning a context manager that
+        records its duration, see HTTPWrapper._timer
+        """
+        self._payload = payload
+        self._timer = timer if timer is not None else _untimed
+        self._data = {}
+        self._color = None
+        self._depth = None
+        self.width = payload['width']
+        self.height = payload['height']
+
+    @classmethod
+    def from_buffers(cls, width, height, color, depth, timer=None):
+        """
+        :param width: Width of the frame in pixels
+        :param height: Height of the frame in pixels
+        :param color: Raw RGBA bytes of the color buffer, or a memoryview over them
+        :param depth: Raw bytes of the depth buffer, or a memoryview over them
+        :param timer: See __init__
+        :return: FrameBufferSnapshot object over already decoded buffers
+        """
+        snapshot = cls({'width': width, 'height': height}, timer)
+        snapshot._data = {'diffuse': color, 'depth': depth}
+        return snapshot
+
+    @property
+    def size(self):
+        return [self.width, self.height]
+
+    def _buffer(self, key):
+        """
+        Decodes a base64 buffer of the payload, once
+        :param key: 'diffuse' or 'depth'
+        :return: Raw bytes of the buffer, or a memoryview over them
+        """
+        if key not in self._data:
+            with self._timer(PHASE_BASE64):
+                self._data[key] = base64.b64decode(self._payload.pop(key))
+        return self._data[key]
+
+    def _buffer_size(self, key):
+        """
+        :param key: 'diffuse' or 'depth'
+        :return: Size in bytes of the decoded buffer, without decoding it
+        """
+        if key in self._data:
+            return len(self._data[key])
+        return _b64_decoded_size(self._payload[key])
+
+    def _decode_into(self, key, out):
+        """
+        Decodes a base64 buffer of the payload straight into a preallocated array. The decoded
+        bytes are not kept
+        :param key: 'diffuse' or 'depth'
+        :param out: Contiguous numpy array of the decoded size
+        :return: True on success, False if the buffer has to be decoded the regular way
+        """
+        if key in self._data or not out.flags.c_contiguous or not out.flags.writeable:
+            return False
+        with self._timer(PHASE_BASE64):
+            return _b64decode_into(self._payload[key], out)
+
+    @property
+    def color_data(self):
+        """
+        :return: Raw RGBA bytes of the color buffer
+        """
+        return bytes(self._buffer('diffuse'))
+
+    @property
+    def depth_data(self):
+        """
+        :return: Raw bytes of the depth buffer
+        """
+        return bytes(self._buffer('depth'))
+
+    @property
+    def color(self):
+        """
+        :return: Pillow Image object holding the color buffer
+        """
+        if self._color is None:
+            data = self._buffer('diffuse')
+            with self._timer(PHASE_IMAGE):
+                self._color = Image.frombytes('RGBA', self.size, data)
+        return self._color
+
+    @property
+    def depth(self):
+        """
+        :return: Pillow Image object holding the depth buffer
+        """
+        if self._depth is None:
+            data = self._buffer('depth')
+            with self._timer(PHASE_IMAGE):
+                self._depth = Image.frombytes('I;16', self.size, data)
+        return self._depth
+
+    def color_array(self, out=None):
+        """
+        :param out: Optional preallocated (height, width, 4) uint8 array reused across frames.
+        The buffer is base64-decoded straight into it when possible
+        :return: (height, width, 4) uint8 RGBA numpy array. Unless out is given, this is a
+        read-only view over the decoded bytes, no copy is made
+        """
+        _require_numpy()
+        if out is not None and out.dtype == np.uint8 and \
+                out.shape == (self.height, self.width, 4) and self._decode_into('diffuse', out):
+            return out
+        array = np.frombuffer(self._buffer('diffuse'), dtype=np.uint8)
+        return _to_array(array.reshape(self.height, self.width, 4), out)
+
+    def depth_array(self, dtype=None, out=None):
+        """
+        :param dtype: numpy.uint16 or numpy.float32. Defaults to the type of the buffer sent by
+        Brayns, deduced from its size. Values are converted if the types differ
+        :param out: Optional preallocated (height, width) array reused across frames. The
+        buffer is base64-decoded straight into it when it has the type sent by Brayns
+        :return: (height, width) numpy array. Unless out is given or a conversion is needed,
+        this is a read-only view over the decoded bytes, no copy is made
+        """
+        _require_numpy()
+        if self._buffer_size('depth') == 4 * self.width * self.height:
+            native = np.dtype('<f4')
+        else:
+            native = np.dtype('<u2')
+        if out is not None and out.dtype == native and out.shape == (self.height, self.width) \
+                and self._decode_into('depth', out):
+            return out
+        array = np.frombuffer(self._buffer('depth'), dtype=native).reshape(self.height, self.width)
+        if out is None and dtype is not None and np.dtype(dtype) != native:
+            array = array.astype(dtype)
+        return _to_array(array, out)
 
 
 class FrameBuffers(HTTPWrapper):
 
-    def __init__(self, brayns_url):
+    _PATH = '/v1/frame-buffers'
+    _BINARY_ACCEPT = CONTENT_TYPE_BINARY + ', application/json;q=0.5'
+
+    # Ask for raw buffers described by headers instead of base64 in Json
+    binary = True
+
+    def __init__(self, brayns_url, transport=None):
         """
         :param brayns_url: Brayns' url
+        :param transport: Transport shared with the other objects of the same Brayns instance
         """
-        super(FrameBuffers, self).__init__(brayns_url + '/v1/frame-buffers')
+        super(FrameBuffers, self).__init__(brayns_url + self._PATH, transport)
+
+    def snapshot(self):
+        """
+        Fetches color and depth buffers of the same frame in a single request
+        :return: FrameBufferSnapshot object, None if Brayns did not answer
+        """
+        return self._decode_snapshot(*self._request_frame())
 
     def color(self):
-        response = self._request(HTTP_METHOD_GET)
-        if response is None:
-            return None
-        payload = json.loads(response)
-        size = [payload['width'], payload['height']]
-        return Image.frombytes('RGBA', size, base64.b64decode(payload['diffuse']))
+        return self._decode_color(*self._request_frame())
 
     def depth(self):
-        response = self._request(HTTP_METHOD_GET)
+        return self._decode_depth(*self._request_frame())
+
+    def color_array(self, out=None):
+        """
+        :param out: Optional preallocated (height, width, 4) uint8 array reused across frames
+        :return: (height, width, 4) uint8 numpy array, None if Brayns did not answer
+        """
+        snapshot = self.snapshot()
+        return None if snapshot is None else snapshot.color_array(out)
+
+    def depth_array(self, dtype=None, out=None):
+        """
+        :param dtype: numpy.uint16 or numpy.float32, defaults to the type sent by Brayns
+        :param out: Optional preallocated (height, width) array reused across frames
+        :return: (height, width) numpy array, None if Brayns did not answer
+        """
+        snapshot = self.snapshot()
+        return None if snapshot is None else snapshot.depth_array(dtype, out)
+
+    def _decode_snapshot(self, response, headers=None):
+        """
+        :param response: Bytes or string containing the response from Brayns
+        :param headers: Response headers, None for a Json response
+        :return: FrameBufferSnapshot object, None if response is None
+        """
         if response is None:
             return None
-        payload = json.loads(response)
-        size = [payload['width'], payload['height']]
-        return Image.frombytes('I;16', size, base64.b64decode(payload['depth']))
+        if _content_type(headers) == CONTENT_TYPE_BINARY:
+            color_size = int(headers[HEADER_COLOR_SIZE])
+            depth_size = int(headers[HEADER_DEPTH_SIZE])
+            if color_size + depth_size != len(response):
+                raise ValueError('Frame buffers of {} bytes announced, {} received'.format(
+                    color_size + depth_size, len(response)))
+            # Views over the response, the buffers are not copied
+            view = memoryview(response)
+            return FrameBufferSnapshot.from_buffers(
+                int(headers[HEADER_WIDTH]), int(headers[HEADER_HEIGHT]), view[:color_size],
+                view[color_size:], self._timer)
+        with self._timer(PHASE_JSON):
+            payload = _loads(response)
+        return FrameBufferSnapshot(payload, self._timer)
+
+    def _decode_color(self, response, headers=None):
+        """
+        :param response: Bytes or string containing the response from Brayns
+        :param headers: Response headers, None for a Json response
+        :return: Pillow Image object, None if response is None
+        """
+        snapshot = self._decode_snapshot(response, headers)
+        return None if snapshot is None else snapshot.color
+
+    def _decode_depth(self, response, headers=None):
+        """
+        :param response: Bytes or string containing the response from Brayns
+        :param headers: Response headers, None for a Json response
+        :return: Pillow Image object, None if response is None
+        """
+        snapshot = self._decode_snapshot(response, headers)
+        return None if snapshot is None else snapshot.depth
 
 
 class Brayns(object):
 
-    def __init__(self, url):
+    def __init__(self, url, pool_size=DEFAULT_POOL_SIZE, timeout=None, output=OUTPUT_IMAGE,
+                 ttl=None, coalesce=False, max_rate=DEFAULT_MAX_RATE, binary=True,
+                 compression=True, retry=None, deadline=None, replicas=None,
+                 hedge_percentile=DEFAULT_HEDGE_PERCENTILE, cache=None):
         """
         :param url: Brayns' url
+        :param pool_size: Number of keep-alive connections kept open to Brayns
+        :param timeout: Timeout in seconds for every request, either a number or a
+        (connect, read) tuple. None waits forever
+        :param output: OUTPUT_IMAGE to get images and frame buffers as Pillow Image objects,
+        OUTPUT_ARRAY to get them as numpy arrays
+        :param ttl: Time in seconds during which viewport, camera and settings properties are
+        read from the client-side cache. Older state is synchronized with Brayns on the next
+        read. None keeps the cache until sync() is called
+        :param coalesce: If True, viewport, camera and settings setters return immediately and
+        only the latest state is sent in the background, see coalesce()
+        :param max_rate: Maximum number of updates per second and endpoint when coalescing
+        :param binary: If True, frames are asked for as binary data with their metadata in
+        headers, instead of base64 in Json. Brayns versions that do not support it answer with
+        Json, which is decoded as before
+        :param compression: If True, responses may be compressed with any encoding the HTTP
+        client can decode, e.g. gzip, deflate, or zstd when available
+        :param retry: RetryPolicy object deciding which failed requests are retried, defaults to
+        retrying GETs three times with jittered backoff. NO_RETRY disables retries
+        :param deadline: Default time budget in seconds of every call, retries included, see
+        deadline(). None for no limit
+        :param replicas: Urls of other Brayns instances serving the same scene. Updates are sent
+        to all of them, and frame or state requests slower than usual are duplicated to a
+        replica, the first answer being used
+        :param hedge_percentile: Latency percentile of an endpoint after which a request is
+        duplicated to a replica, None to never duplicate requests
+        :param cache: brayns.cache.RenderCache object serving the frames of viewport, camera
+        and settings states already rendered, None to always ask Brayns. Unless the cache only
+        holds converged frames, a cached frame is the first one rendered for its state
+        :raise BraynsError: if Brayns could not be reached
         """
+        if output == OUTPUT_ARRAY:
+            _require_numpy()
         self._url = url
-        self.viewport = Viewport(url)
-        self.camera = Camera(url)
-        self.settings = Settings(url)
+        self.output = output
+        self._transport = Transport(pool_size=pool_size, timeout=timeout,
+                                    compression=compression, retry=retry, deadline=deadline,
+                                    replicas=replicas, hedge_percentile=hedge_percentile)
+        self.viewport = Viewport(url, self._transport)
+        self.camera = Camera(url, self._transport)
+        self.settings = Settings(url, self._transport)
+        for wrapper in (self.viewport, self.camera, self.settings):
+            wrapper.ttl = ttl
+        self._image_jpeg = ImageJPEG(url, self._transport)
+        self._frame_buffers = FrameBuffers(url, self._transport)
+        self._image_jpeg.binary = self._frame_buffers.binary = binary
+        self._coalescer = None
+        self.cache = cache
+        if coalesce:
+            self.coalesce(True, max_rate)
+
+    @property
+    def url(self):
+        return self._url
+
+    @property
+    def statistics(self):
+        """
+        Statistics of the requests sent to Brayns, see brayns.stats.Statistics. Hooks can be
+        added to it to receive every request and decoding event as it happens
+        """
+        return self._transport.statistics
+
+    def stats(self, reset=False):
+        """
+        :param reset: If True, clears the statistics once they are read
+        :return: Dictionary indexed by endpoint path, e.g. '/v1/frame-buffers', with the number
+        of requests and errors, the bytes sent and received, and the count, mean and p50, p95,
+        p99 latencies in seconds of each phase: 'network', 'json', 'base64' and 'image'
+        """
+        return self.statistics.summary(reset)
+
+    def coalesce(self, enabled=True, max_rate=DEFAULT_MAX_RATE):
+        """
+        Enables or disables latest-wins coalescing of viewport, camera and settings updates.
+        When enabled, setters return immediately and a background flusher sends only the
+        newest pending state of each endpoint, at most max_rate times per second. Frames are
+        always fetched after the pending updates are sent
+        :param enabled: True to coalesce updates, False to send them synchronously again
+        :param max_rate: Maximum number of updates per second and endpoint, None for no limit
+        """
+        previous = self._coalescer
+        self._coalescer = Coalescer(max_rate) if enabled else None
+        for wrapper in (self.viewport, self.camera, self.settings):
+            wrapper.coalesce(self._coalescer)
+        if previous is not None:
+            previous.close()
+
+    def flush(self, timeout=None):
+        """
+        Waits until all coalesced updates have been sent to Brayns
+        :param timeout: Maximum time to wait in seconds, None to wait forever
+        :return: True if everything was sent, False on timeout
+        """
+        if self._coalescer is None:
+            return True
+        return self._coalescer.flush(timeout)
+
+    def sync(self):
+        """
+        Synchronizes the cached viewport, camera and settings with Brayns
+        """
+        for wrapper in (self.viewport, self.camera, self.settings):
+            wrapper.sync()
+
+    def deadline(self, seconds):
+        """
+        Bounds every call made by the calling thread inside the block, retries included:
+
+            with brayns.deadline(0.1):
+                image = brayns.image_jpeg
+
+        :param seconds: Time budget of each call, None for no limit
+        :return: Context manager
+        """
+        return self._transport.deadline(seconds)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Records the viewport, camera and settings changes made inside the block and sends them
+        when the block exits, with at most one request per endpoint
+        """
+        with self.viewport.batch(), self.camera.batch(), self.settings.batch():
+            yield self
+
+    def snapshot(self):
+        """
+        Captures the state of the viewport, camera and settings, including the changes not
+        sent yet
+        :return: brayns.snapshot.Snapshot object
+        """
+        return Snapshot(dict((wrapper._PATH, wrapper._values())  # pylint: disable=W0212
+                             for wrapper in (self.viewport, self.camera, self.settings)))
+
+    def restore(self, snapshot, sync=False):
+        """
+        Brings viewport, camera and settings back to a snapshot, sending only the fields that
+        differ from the cached state, with at most one request per endpoint
+        :param snapshot: Snapshot object returned by snapshot() or Snapshot.from_json
+        :param sync: If True, the cached state is synchronized with Brayns first, in case
+        another client modified it
+        :return: Dictionary indexed by endpoint path of the Json keys that were sent
+        """
+        if sync:
+            self.sync()
+        changes = {}
+        with self.transaction():
+            for wrapper in (self.viewport, self.camera, self.settings):
+                changed = wrapper._restore(snapshot.values(wrapper._PATH))  # pylint: disable=W0212
+                if changed:
+                    changes[wrapper._PATH] = changed  # pylint: disable=W0212
+        return changes
+
+    def close(self):
+        """
+        Sends the pending updates and closes all connections to Brayns
+        """
+        if self._coalescer is not None:
+            self.coalesce(False)
+        self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def fetch_frame(self, kind=FRAME_JPEG, deadline=None, cached=True):
+        """
+        Get a frame from Brayns
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param deadline: Time budget in seconds of this call, overriding the default one
+        :param cached: If False, the frame is rendered by Brayns even if the render cache holds
+        it, e.g. to follow progressive refinement
+        :return: Pillow Image object or numpy array depending on the output mode, None if the
+        frame could not be retrieved
+        :raise BraynsTimeoutError: if the frame could not be fetched within the deadline
+        """
+        if deadline is not None:
+            with self.deadline(deadline):
+                return self.fetch_frame(kind, cached=cached)
+        if kind not in (FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH):
+            raise ValueError('Invalid frame kind: {}'.format(kind))
+        return self._frame(kind, cached)
+
+    def _cached_frame(self, suffix, fetch, get, put):
+        """
+        Looks a frame up in the render cache. On a miss, the state is synchronized with Brayns
+        before the frame is fetched, which only costs a 304 per object when it is unchanged, so
+        that the frame is never stored under the key of stale state
+        :param suffix: 'jpg' or 'buffers'
+        :param fetch: Function fetching the frame from Brayns
+        :param get: Function reading a frame from the cache by key
+        :param put: Function storing a frame in the cache by key
+        :return: Frame, None if it could not be retrieved
+        """
+        key = self.cache.key(self.snapshot(), suffix)
+        frame = get(key)
+        if frame is not None:
+            return frame
+        self.sync()
+        fresh = self.cache.key(self.snapshot(), suffix)
+        if fresh != key:
+            frame = get(fresh)
+            if frame is not None:
+                return frame
+        frame = fetch()
+        if frame is not None and not self.cache.converged_only:
+            put(fresh, frame)
+        return frame
+
+    def _jpeg_data(self, cached=True):
+        """
+        :param cached: If False, the render cache is bypassed
+        :return: Encoded JPEG bytes, from the render cache if enabled and holding the current
+        state. None if the image could not be retrieved
+        """
+        if self.cache is None or not cached:
+            return self._image_jpeg.get_data()
+        return self._cached_frame('jpg', self._image_jpeg.get_data, self.cache.get_jpeg,
+                                  self.cache.put_jpeg)
+
+    def _frame_buffers_snapshot(self, cached=True):
+        """
+        :param cached: If False, the render cache is bypassed
+        :return: FrameBufferSnapshot object, from the render cache if enabled and holding the
+        current state. None if the frame buffers could not be retrieved
+        """
+        if self.cache is None or not cached:
+            return self._frame_buffers.snapshot()
+        return self._cached_frame('buffers', self._frame_buffers.snapshot,
+                                  self.cache.get_frame_buffers, self.cache.put_frame_buffers)
+
+    def _raw_frame(self, kind, cached=True):
+        """
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param cached: If False, the render cache is bypassed
+        :return: Encoded JPEG bytes for FRAME_JPEG, FrameBufferSnapshot object otherwise. None
+        if the frame could not be retrieved
+        """
+        if kind == FRAME_JPEG:
+            return self._jpeg_data(cached)
+        return self._frame_buffers_snapshot(cached)
+
+    def _decode_frame(self, kind, raw):
+        """
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param raw: Frame as returned by _raw_frame()
+        :return: Frame decoded according to the output mode, None if raw is None
+        """
+        if raw is None:
+            return None
+        if kind == FRAME_JPEG:
+            headers = {'Content-Type': CONTENT_TYPE_JPEG}
+            if self.output == OUTPUT_ARRAY:
+                return self._image_jpeg._decode_array(raw, headers)  # pylint: disable=W0212
+            return self._image_jpeg._decode(raw, headers)  # pylint: disable=W0212
+        if kind == FRAME_COLOR:
+            return raw.color_array() if self.output == OUTPUT_ARRAY else raw.color
+        return raw.depth_array() if self.output == OUTPUT_ARRAY else raw.depth
+
+    def _store_frame(self, kind, raw):
+        """
+        Stores a frame in the render cache under the current state, whatever the converged_only
+        option of the cache
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param raw: Frame as returned by _raw_frame()
+        """
+        if self.cache is None or raw is None:
+            return
+        if kind == FRAME_JPEG:
+            self.cache.put_jpeg(self.cache.key(self.snapshot(), 'jpg'), raw)
+        else:
+            self.cache.put_frame_buffers(self.cache.key(self.snapshot(), 'buffers'), raw)
+
+    def _frame(self, kind, cached=True):
+        """
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param cached: If False, the render cache is bypassed
+        :return: Frame decoded according to the output mode, None if it could not be retrieved
+        """
+        self.flush()
+        if kind == FRAME_JPEG and (self.cache is None or not cached):
+            if self.output == OUTPUT_ARRAY:
+                return self._image_jpeg.get_array()
+            return self._image_jpeg.get()
+        return self._decode_frame(kind, self._raw_frame(kind, cached))
+
+    def stream(self, kind=FRAME_JPEG, fps=None, max_frames=None, queue_size=4, workers=1,
+               policy=STREAM_BLOCK):
+        """
+        Streams frames fetched and decoded in background threads while the caller processes
+        the previous ones:
+
+            with brayns.stream('jpeg', max_frames=100) as frames:
+                for frame in frames:
+                    ...
+
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param fps: Maximum number of frames fetched per second, None for as fast as possible
+        :param max_frames: Number of frames after which the stream ends, None for no limit
+        :param queue_size: Maximum number of decoded frames waiting to be consumed
+        :param workers: Number of frames fetched concurrently
+        :param policy: STREAM_BLOCK to pause fetching when the consumer is slow, STREAM_DROP to
+        discard the oldest waiting frame instead
+        :return: FrameStream iterator
+        """
+        if kind not in (FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH):
+            raise ValueError('Invalid frame kind: {}'.format(kind))
+        return FrameStream(lambda: self.fetch_frame(kind), fps=fps, max_frames=max_frames,
+                           queue_size=queue_size, workers=workers, policy=policy)
+
+    def render_tiled(self, width, height, tile=(512, 512), kind=FRAME_COLOR, pool=None, out=None,
+                     path=None):
+        """
+        Renders an image larger than a single frame as tiles stitched together, see
+        brayns.tiling.render_tiled. Requires numpy
+        :return: Numpy array of shape (height, width) for depth, (height, width, channels)
+        otherwise
+        """
+        from brayns.tiling import render_tiled
+        return render_tiled(self, width, height, tile, kind, pool, out, path)
+
+    def capture_converged(self, tolerance=2e-3, max_frames=64, timeout=None, kind=FRAME_JPEG,
+                          **kwargs):
+        """
+        Fetches successive frames while Brayns accumulates samples, and returns as soon as the
+        image stops changing, see brayns.convergence.capture_converged. Requires numpy
+        :param tolerance: Root mean square error between consecutive frames, relative to the
+        range of the pixel values, under which the frame is considered converged
+        :param max_frames: Maximum number of frames fetched
+        :param timeout: Maximum time in seconds spent fetching frames, None for no limit
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param kwargs: Options of brayns.convergence.capture_converged, e.g. cache=True to store
+        the converged frame in the render cache
+        :return: Capture object, whose frame attribute holds the last frame in the output mode
+        """
+        _require_numpy()
+        from brayns.convergence import capture_converged
+        return capture_converged(self, kind, tolerance, max_frames, timeout, **kwargs)
+
+    def sweep(self, parameters, directory, **kwargs):
+        """
+        Renders every combination of parameter values to disk, ordered so that consecutive
+        frames differ by a single parameter, see brayns.sweep.Sweep
+        :param parameters: List of (name, values) pairs, e.g. [('settings.shadows', [0, 1])]
+        :param directory: Output directory, where an interrupted sweep resumes from
+        :param kwargs: Options of brayns.sweep.Sweep.run, e.g. kind or resume
+        :return: List of the paths of the frames written
+        """
+        from brayns.sweep import Sweep
+        return Sweep(parameters).run(self, directory, **kwargs)
+
+    def point_cloud(self, depth_range, path=None, colors=True, **kwargs):
+        """
+        Fetches the frame buffers and unprojects the depth buffer to world coordinates with the
+        current camera, see brayns.pointcloud. Requires numpy
+        :param depth_range: (near, far) distances in world units mapped to the minimum and
+        maximum values of the 16-bit depth buffer sent by Brayns. The camera exposes no clipping
+        planes, hence they have to be given
+        :param path: Optional path of a .ply or .npy file to write the points to
+        :param colors: If True, the points are colored with the color buffer of the same frame
+        :param kwargs: Other options of brayns.pointcloud.iter_points
+        :return: Number of points written if path is given, otherwise (points, colors) tuple of
+        numpy arrays. None if the frame buffers could not be retrieved
+        """
+        _require_numpy()
+        from brayns.pointcloud import point_cloud, save_point_cloud
+        self.flush()
+        snapshot = self._frame_buffers_snapshot()
+        if snapshot is None:
+            return None
+        color = snapshot.color_array() if colors else None
+        if path is not None:
+            return save_point_cloud(path, snapshot.depth_array(), self.camera, color,
+                                    depth_range=depth_range, **kwargs)
+        return point_cloud(snapshot.depth_array(), self.camera, color, depth_range=depth_range,
+                           **kwargs)
 
     @property
     def image_jpeg(self):
         """
         Get JPEG image from Brayns
-        :return: Pillow Image object, None if image could not be retrieved
+        :return: Pillow Image object or numpy array depending on the output mode, None if image
+        could not be retrieved
+        """
+        return self._frame(FRAME_JPEG)
+
+    @property
+    def image_jpeg_data(self):
+        """
+        Get JPEG image from Brayns without decoding it
+        :return: Encoded JPEG bytes, None if image could not be retrieved
+        """
+        self.flush()
+        return self._jpeg_data()
+
+    @property
+    def frame_buffers(self):
+        """
+        Get color and depth frame buffers of the same frame in a single request
+        :return: FrameBufferSnapshot object, None if frame buffers could not be retrieved
         """
-        return ImageJPEG(self._url).get()
+        self.flush()
+        return self._frame_buffers_snapshot()
 
     @property
     def color_frame_buffer(self):
         """
         Get color frame buffer for Brayns
-        :return: Pillow Image object, None if image could not be retrieved or frame_type is invalid
+        :return: Pillow Image object or numpy array depending on the output mode, None if image
+        could not be retrieved or frame_type is invalid
         """
-        return FrameBuffers(self._url).color()
+        return self._frame(FRAME_COLOR)
 
     @property
     def depth_frame_buffer(self):
         """
         Get depth frame buffer for Brayns
-        :return: Pillow Image object, None if image could not be retrieved or frame_type is invalid
+        :return: Pillow Image object or numpy array depending on the output mode, None if image
+        could not be retrieved or frame_type is invalid
         """
-        return FrameBuffers(self._url).depth()
+        return self._frame(FRAME_DEPTH)
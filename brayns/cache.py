@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Persistent cache of rendered frames, keyed by the state of the viewport, camera and settings
+and an identifier of the loaded scene:
+
+    brayns = Brayns('http://localhost:5000', cache=RenderCache('cache', scene='circuit-v3'))
+
+JPEG images are stored as sent by Brayns. Color and depth buffers are stored raw in one file
+which is memory-mapped when read, so that hits cost neither a copy nor any decoding. The
+total size is bounded; the least recently used frames are evicted first. Last use is tracked
+with the modification time of the files, hence recency survives restarts and is shared by the
+processes using the same directory.
+
+The scene identifier is the only way for the cache to tell scenes apart: it has to change
+whenever the data loaded in Brayns does.
+
+On a miss, the client state is synchronized with Brayns before the frame is fetched, so that
+frames are stored under the state they were actually rendered with. A frame fetched right after
+a change is however stored as Brayns sent it, before progressive refinement accumulated more
+samples. Caches created with converged_only=True are only filled by
+Brayns.capture_converged(..., cache=True), which stores the converged frame:
+
+    brayns = Brayns(url, cache=RenderCache('cache', scene='circuit-v3', converged_only=True))
+    brayns.capture_converged(cache=True)
+"""
+
+from collections import OrderedDict
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from brayns.brayns import FrameBufferSnapshot
+
+# Default maximum size of a cache, in bytes
+DEFAULT_MAX_BYTES = 1 << 30
+
+_JPEG = 'jpg'
+_BUFFERS = 'buffers'
+
+# Header of cached frame buffers: magic, width, height, color size and depth size
+_HEADER = struct.Struct('<8sIIQQ')
+_MAGIC = b'BRAYNSFB'
+
+
+class RenderCache(object):
+    """
+    Size-bounded on-disk cache of frames. Thread-safe, and safe to share between processes
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, scene='', converged_only=False):
+        """
+        :param directory: Directory of the cache, created if needed
+        :param max_bytes: Maximum total size of the cached frames
+        :param scene: Identifier of the data loaded in Brayns, part of every key
+        :param converged_only: If True, frames are read from the cache but only stored by
+        converged captures, otherwise every frame fetched on a miss is stored
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.scene = scene
+        self.converged_only = converged_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        entries = []
+        for name in os.listdir(directory):
+            if os.path.splitext(name)[1][1:] in (_JPEG, _BUFFERS):
+                try:
+                    info = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, name, info.st_size))
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+            self._bytes += size
+
+    @property
+    def size(self):
+        """
+        :return: Total size in bytes of the cached frames
+        """
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, snapshot, kind):
+        """
+        :param snapshot: brayns.snapshot.Snapshot of the state the frame is rendered with
+        :param kind: 'jpg' for JPEG images, 'buffers' for color and depth buffers
+        :return: Name of the cache entry
+        """
+        digest = hashlib.sha1('\0'.join((self.scene, snapshot.to_json())).encode('utf-8'))
+        return '{}.{}'.format(digest.hexdigest(), kind)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _hit(self, name, size):
+        """
+        Marks an entry as the most recently used
+        """
+        with self._lock:
+            self.hits += 1
+            if name not in self._entries:
+                # Added by another process
+                self._bytes += size
+            self._entries[name] = size
+            self._entries.move_to_end(name)
+        try:
+            os.utime(self._path(name), None)
+        except OSError:
+            pass
+
+    def _miss(self, name):
+        with self._lock:
+            self.misses += 1
+            if name in self._entries:
+                # Evicted by another process
+                self._bytes -= self._entries.pop(name)
+
+    def _store(self, name, chunks):
+        """
+        Writes an entry atomically and evicts the least recently used ones beyond the limit
+        :param name: Name of the entry
+        :param chunks: Sequence of bytes-like objects making up the content
+        """
+        size = sum(len(chunk) for chunk in chunks)
+        if size > self.max_bytes:
+            return
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            os.replace(temporary, self._path(name))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        evicted = []
+        with self._lock:
+            self._bytes += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            while self._bytes > self.max_bytes:
+                oldest, oldest_size = self._entries.popitem(last=False)
+                self._bytes -= oldest_size
+                evicted.append(oldest)
+        for oldest in evicted:
+            try:
+                os.remove(self._path(oldest))
+            except OSError:
+                pass
+
+    def get_jpeg(self, name):
+        """
+        :param name: Key of the frame, see key()
+        :return: Encoded JPEG bytes, None on miss
+        """
+        try:
+            with open(self._path(name), 'rb') as data:
+                content = data.read()
+        except (IOError, OSError):
+            self._miss(name)
+            return None
+        self._hit(name, len(content))
+        return content
+
+    def put_jpeg(self, name, data):
+        """
+        :param name: Key of the frame, see key()
+        :param data: Encoded JPEG bytes
+        """
+        self._store(name, [data])
+
+    def get_frame_buffers(self, name):
+        """
+        :param name: Key of the frame, see key()
+        :return: FrameBufferSnapshot whose buffers are memory-mapped from the cache, None on
+        miss
+        """
+        try:
+            with open(self._path(name), 'rb') as data:
+                mapped = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, OSError, ValueError):
+            self._miss(name)
+            return None
+        view = memoryview(mapped)
+        if len(view) < _HEADER.size:
+            self._miss(name)
+            return None
+        magic, width, height, color_size, depth_size = _HEADER.unpack_from(view)
+        if magic != _MAGIC or len(view) != _HEADER.size + color_size + depth_size:
+            self._miss(name)
+            return None
+        self._hit(name, len(view))
+        # The mapping stays open as long as the views over it are referenced
+        start = _HEADER.size
+        return FrameBufferSnapshot.from_buffers(
+            width, height, view[start:start + color_size], view[start + color_size:])
+
+    def put_frame_buffers(self, name, snapshot):
+        """
+        :param name: Key of the frame, see key()
+        :param snapshot: FrameBufferSnapshot object
+        """
+        color = snapshot._buffer('diffuse')  # pylint: disable=W0212
+        depth = snapshot._buffer('depth')  # pylint: disable=W0212
+        self._store(name, [_HEADER.pack(_MAGIC, snapshot.width, snapshot.height, len(color),
+                                        len(depth)), color, depth])
+
+    def clear(self):
+        """
+        Removes every cached frame
+        """
+        with self._lock:
+            names = list(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        for name in names:
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
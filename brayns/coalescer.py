@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import threading
+import time
+import weakref
+
+# Default maximum number of updates sent per second and endpoint
+DEFAULT_MAX_RATE = 60
+
+
+class _Flusher(object):
+    """
+    State and thread of a Coalescer. The thread only references this object, so that the
+    Coalescer can be garbage collected while the thread runs
+    """
+    def __init__(self, max_rate):
+        """
+        :param max_rate: Maximum number of flushes per second, None for no limit
+        """
+        self._interval = 1.0 / max_rate if max_rate else 0.0
+        self._condition = threading.Condition()
+        self._pending = []
+        self._flushing = False
+        self._waiters = 0
+        self._stopped = False
+        self._errors = []
+        self._thread = threading.Thread(target=self._run, name='brayns-coalescer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def schedule(self, wrapper):
+        """
+        Schedules the pending changes of an object to be sent by the flusher
+        :param wrapper: HTTPWrapper object with changes to send
+        """
+        with self._condition:
+            if wrapper not in self._pending:
+                self._pending.append(wrapper)
+                self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                wrappers, self._pending = self._pending, []
+                self._flushing = True
+            start = time.time()
+            for wrapper in wrappers:
+                try:
+                    wrapper._commit()  # pylint: disable=W0212
+                except BaseException as error:  # pylint: disable=W0703
+                    with self._condition:
+                        self._errors.append(error)
+            # The wrappers reference the Coalescer, which must not be kept alive while waiting
+            wrappers = wrapper = None
+            with self._condition:
+                self._flushing = False
+                self._condition.notify_all()
+                # Hold the next flush back to honor the rate, unless someone waits for it
+                while not self._stopped and not self._waiters:
+                    remaining = start + self._interval - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+    def flush(self, timeout=None):
+        """
+        Waits until every change scheduled so far has been sent
+        :param timeout: Maximum time to wait in seconds, None to wait forever
+        :return: True if everything was sent, False on timeout
+        :raise: The first error raised while sending, if any
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            self._waiters += 1
+            self._condition.notify_all()
+            try:
+                while self._pending or self._flushing:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._waiters -= 1
+            if self._errors:
+                error = self._errors[0]
+                self._errors = []
+                raise error
+        return True
+
+    def stop(self):
+        """
+        Makes the thread exit once the remaining changes are sent
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def join(self):
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+class Coalescer(object):
+    """
+    Background flusher for high-frequency updates. Objects with pending changes are scheduled
+    instead of sending them right away; the flusher thread then sends the latest state of
+    each scheduled object, so that intermediate values are never sent and setters never wait
+    for the network. The thread stops on close(), or once the Coalescer is garbage collected.
+    """
+    def __init__(self, max_rate=DEFAULT_MAX_RATE):
+        """
+        :param max_rate: Maximum number of flushes per second, None for no limit
+        """
+        self._flusher = _Flusher(max_rate)
+        self._finalizer = weakref.finalize(self, self._flusher.stop)
+
+    def schedule(self, wrapper):
+        """
+        Schedules the pending changes of an object to be sent by the flusher
+        :param wrapper: HTTPWrapper object with changes to send
+        """
+        self._flusher.schedule(wrapper)
+
+    def flush(self, timeout=None):
+        """
+        Waits until every change scheduled so far has been sent
+        :param timeout: Maximum time to wait in seconds, None to wait forever
+        :return: True if everything was sent, False on timeout
+        :raise: The first error raised while sending, if any
+        """
+        return self._flusher.flush(timeout)
+
+    def close(self):
+        """
+        Sends the remaining changes and stops the flusher thread
+        """
+        self._finalizer()
+        self._flusher.join()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Capture of frames rendered progressively. Brayns accumulates samples over successive frames
+while the scene does not change; frames are fetched until two consecutive ones differ by less
+than a tolerance, measured as the root mean square error between downsampled copies, for
+several consecutive frames. Fetching faster than Brayns renders returns the same frame again;
+such repeats carry no new samples, they are skipped instead of being taken for convergence.
+"""
+
+import time
+import numpy as np
+from brayns.brayns import FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH
+
+# Frames are compared on a grid of at most this many blocks along their shorter side
+DEFAULT_COMPARE_SIZE = 128
+
+# Time in seconds to wait after fetching a frame identical to the previous one
+DEFAULT_REPEAT_INTERVAL = 0.01
+
+
+class Capture(object):
+    """
+    Result of capture_converged
+    """
+    def __init__(self, frame, converged, frames, error, errors):
+        """
+        :param frame: Last frame fetched, as returned by Brayns.fetch_frame
+        :param converged: True if the frame converged, False if max_frames or timeout was hit
+        :param frames: Number of frames fetched
+        :param error: Difference between the last two frames, None if only one was fetched
+        :param errors: Differences between successive frames, in fetch order
+        """
+        self.frame = frame
+        self.converged = converged
+        self.frames = frames
+        self.error = error
+        self.errors = errors
+
+
+def downsample(array, factor):
+    """
+    Averages blocks of factor x factor pixels
+    :param array: Numpy array of shape (height, width) or (height, width, channels)
+    :param factor: Size of the blocks in pixels. Pixels beyond the last whole block are ignored
+    :return: float32 numpy array of shape (height // factor, width // factor[, channels]),
+    scaled to [0, 1] for integer input
+    """
+    scale = float(np.iinfo(array.dtype).max) if array.dtype.kind in 'ui' else 1.0
+    height = array.shape[0] // factor * factor
+    width = array.shape[1] // factor * factor
+    blocks = array[:height, :width].reshape(
+        (height // factor, factor, width // factor, factor) + array.shape[2:])
+    return blocks.mean(axis=(1, 3), dtype=np.float32) / scale
+
+
+def rmse(first, second):
+    """
+    :return: Root mean square error between two arrays of the same shape
+    """
+    difference = first - second
+    return float(np.sqrt(np.mean(difference * difference)))
+
+
+def capture_converged(brayns, kind=FRAME_JPEG, tolerance=2e-3, max_frames=64, timeout=None,
+                      compare_size=DEFAULT_COMPARE_SIZE, interval=0.0, patience=2,
+                      repeat_interval=DEFAULT_REPEAT_INTERVAL, cache=False):
+    """
+    Fetches successive frames until the image stops changing
+    :param brayns: Brayns object
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :param tolerance: Root mean square error between consecutive frames, relative to the range
+    of the pixel values, under which the frame is considered converged
+    :param max_frames: Maximum number of frames fetched
+    :param timeout: Maximum time in seconds spent fetching frames, None for no limit
+    :param compare_size: Frames are compared on a grid of at most this many blocks along their
+    shorter side, which makes the comparison cheap and insensitive to per-pixel noise
+    :param interval: Time in seconds to wait between two fetches, to let Brayns accumulate
+    more samples
+    :param patience: Number of consecutive frames that must each differ from the previous one
+    by less than the tolerance
+    :param repeat_interval: Time in seconds to wait after a frame identical to the previous
+    one, which Brayns has not rendered yet. Repeated frames count towards max_frames, but not
+    towards patience
+    :param cache: If True, the converged frame is stored in the render cache of brayns, if any,
+    even if the cache is restricted to converged frames
+    :return: Capture object holding the last frame
+    """
+    if kind not in (FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH):
+        raise ValueError('Invalid frame kind: {}'.format(kind))
+    deadline = None if timeout is None else time.time() + timeout
+    frame = None
+    previous = None
+    previous_array = None
+    errors = []
+    frames = 0
+    stable = 0
+    while frames < max_frames:
+        if cache:
+            brayns.flush()
+            raw = brayns._raw_frame(kind, cached=False)  # pylint: disable=W0212
+            frame = brayns._decode_frame(kind, raw)  # pylint: disable=W0212
+        else:
+            frame = brayns.fetch_frame(kind, cached=False)
+        if frame is None:
+            raise IOError('Failed to fetch frame from Brayns')
+        frames += 1
+        array = np.asarray(frame)
+        if previous_array is not None and np.array_equal(array, previous_array):
+            if deadline is not None and time.time() + repeat_interval >= deadline:
+                break
+            time.sleep(repeat_interval)
+            continue
+        previous_array = array
+        factor = max(1, min(array.shape[:2]) // compare_size)
+        current = downsample(array, factor)
+        if previous is not None and previous.shape == current.shape:
+            errors.append(rmse(previous, current))
+            stable = stable + 1 if errors[-1] < tolerance else 0
+            if stable >= patience:
+                if cache:
+                    brayns._store_frame(kind, raw)  # pylint: disable=W0212
+                return Capture(frame, True, frames, errors[-1], errors)
+        previous = current
+        if deadline is not None and time.time() + interval >= deadline:
+            break
+        if interval:
+            time.sleep(interval)
+    return Capture(frame, False, frames, errors[-1] if errors else None, errors)
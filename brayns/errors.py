@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+
+class BraynsError(Exception):
+    """
+    Base class of the errors raised when talking to Brayns
+    """
+    pass
+
+
+class BraynsConnectionError(BraynsError, IOError):
+    """
+    Brayns could not be reached
+    """
+    def __init__(self, url, reason=None):
+        super(BraynsConnectionError, self).__init__(
+            'Failed to connect to Brayns at {}, did you start it with the '
+            '--zeroeq-http-server command line option?{}'.format(
+                url, ' ({})'.format(reason) if reason else ''))
+        self.url = url
+
+
+class BraynsTimeoutError(BraynsError, IOError):
+    """
+    Brayns did not answer in time, or the deadline of the call was exceeded
+    """
+    def __init__(self, url, reason=None):
+        super(BraynsTimeoutError, self).__init__(
+            'Brayns at {} did not answer in time{}'.format(
+                url, ' ({})'.format(reason) if reason else ''))
+        self.url = url
+
+
+class BraynsHTTPError(BraynsError, IOError):
+    """
+    Brayns answered with an error status
+    """
+    def __init__(self, url, status):
+        super(BraynsHTTPError, self).__init__(
+            'Brayns at {} answered with status {}'.format(url, status))
+        self.url = url
+        self.status = status
+
+
+class Failure(object):
+    """
+    Carries an exception raised in a worker thread to the thread consuming its results
+    """
+    def __init__(self, error):
+        """
+        :param error: Exception raised by the worker
+        """
+        self.error = error
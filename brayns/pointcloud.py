@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Reconstruction of world-space point clouds from depth buffers. Every pixel is unprojected along
+the ray of a pinhole camera defined by the origin, look-at point, up vector and vertical field
+of view of Brayns' camera. Rows are processed in chunks, and only the pixels that hit the scene
+are unprojected, so that memory stays bounded whatever the size of the frame.
+"""
+
+import math
+import os
+import numpy as np
+
+# Meaning of the depth values: distance from the camera origin along the ray of the pixel, or
+# distance along the viewing direction
+DEPTH_DISTANCE = 'distance'
+DEPTH_Z = 'z'
+
+# Maximum number of pixels unprojected at once
+DEFAULT_CHUNK_PIXELS = 1 << 20
+
+_PLY_COLOR_FIELDS = [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+_POINT_FIELDS = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+
+
+def camera_basis(origin, look_at, up_vector):
+    """
+    :param origin: Position of the camera
+    :param look_at: Point the camera looks at
+    :param up_vector: Up direction of the camera, need not be orthogonal to the view direction
+    :return: (forward, right, up) orthonormal float64 numpy vectors
+    :raise ValueError: if the camera looks at its own origin or along its up vector
+    """
+    forward = np.asarray(look_at, dtype=np.float64) - np.asarray(origin, dtype=np.float64)
+    right = np.cross(forward, np.asarray(up_vector, dtype=np.float64))
+    forward_norm = np.linalg.norm(forward)
+    right_norm = np.linalg.norm(right)
+    if forward_norm == 0 or right_norm == 0:
+        raise ValueError('Degenerate camera: origin {}, look at {}, up {}'.format(
+            origin, look_at, up_vector))
+    forward /= forward_norm
+    right /= right_norm
+    return forward, right, np.cross(right, forward)
+
+
+def _background(depth, background):
+    """
+    :param depth: Numpy array of depth values
+    :param background: Depth value of the pixels that hit nothing, None for the default:
+    the maximum value of integer buffers, non-finite or non-positive values of float buffers
+    :return: Boolean numpy array, True where the pixel hits the scene
+    """
+    if background is not None:
+        return depth != background
+    if depth.dtype.kind in 'ui':
+        return depth != np.iinfo(depth.dtype).max
+    return np.isfinite(depth) & (depth > 0)
+
+
+def _scale(values, dtype, depth_range):
+    """
+    :param values: Depth values of the pixels that hit the scene
+    :param dtype: Type of the depth buffer
+    :param depth_range: (near, far) distances integer buffers are normalized to
+    :return: float32 numpy array of distances in world units
+    """
+    values = values.astype(np.float32)
+    if dtype.kind in 'ui':
+        near, far = depth_range
+        values *= (far - near) / float(np.iinfo(dtype).max)
+        values += near
+    return values
+
+
+def iter_points(depth, camera, colors=None, depth_range=None, depth_mode=DEPTH_DISTANCE,
+                background=None, chunk_pixels=DEFAULT_CHUNK_PIXELS):
+    """
+    Unprojects a depth buffer to world coordinates, a chunk of rows at a time
+    :param depth: (height, width) numpy array or Pillow Image object, row 0 at the top of the
+    frame. Float values are distances in world units, integer values are normalized to
+    depth_range
+    :param camera: Camera object, or any object with origin, look_at, up_vector and
+    field_of_view attributes
+    :param colors: Optional (height, width, 3 or 4) uint8 color buffer of the same frame
+    :param depth_range: (near, far) distances mapped to the minimum and maximum values of
+    integer depth buffers. Required for integer buffers, ignored for float ones
+    :param depth_mode: DEPTH_DISTANCE or DEPTH_Z
+    :param background: Depth value of the pixels that hit nothing, see _background
+    :param chunk_pixels: Maximum number of pixels processed at once
+    :return: Iterator over (points, colors) tuples, where points is an (n, 3) float32 numpy
+    array and colors an (n, 3) uint8 numpy array, None without color buffer
+    :raise ValueError: on invalid parameters
+    """
+    depth = np.asarray(depth)
+    if depth.ndim != 2:
+        raise ValueError('Depth buffer of shape {} is not 2-dimensional'.format(depth.shape))
+    if depth.dtype.kind in 'ui' and depth_range is None:
+        raise ValueError('depth_range is required to unproject integer depth buffers')
+    if depth_mode not in (DEPTH_DISTANCE, DEPTH_Z):
+        raise ValueError('Invalid depth mode: {}'.format(depth_mode))
+    height, width = depth.shape
+    if colors is not None:
+        colors = np.asarray(colors)
+        if colors.shape[:2] != depth.shape:
+            raise ValueError('Color buffer of shape {} does not match depth buffer of shape {}'
+                             .format(colors.shape, depth.shape))
+
+    forward, right, up = [vector.astype(np.float32) for vector in
+                          camera_basis(camera.origin, camera.look_at, camera.up_vector)]
+    origin = np.asarray(camera.origin, dtype=np.float32)
+    # Offsets of the pixel centers on the image plane at distance 1
+    tan_half = math.tan(math.radians(camera.field_of_view) / 2.0)
+    aspect = float(width) / height
+    horizontal = ((np.arange(width, dtype=np.float32) + 0.5) * (2.0 / width) - 1.0) * \
+        np.float32(tan_half * aspect)
+    vertical = (1.0 - (np.arange(height, dtype=np.float32) + 0.5) * (2.0 / height)) * \
+        np.float32(tan_half)
+
+    rows_per_chunk = max(1, chunk_pixels // width)
+    for start in range(0, height, rows_per_chunk):
+        chunk = depth[start:start + rows_per_chunk]
+        rows, columns = np.nonzero(_background(chunk, background))
+        if not len(rows):
+            continue
+        values = _scale(chunk[rows, columns], depth.dtype, depth_range)
+        directions = forward + horizontal[columns, None] * right + \
+            vertical[rows + start, None] * up
+        if depth_mode == DEPTH_DISTANCE:
+            values /= np.sqrt(np.einsum('ij,ij->i', directions, directions))
+        directions *= values[:, None]
+        directions += origin
+        chunk_colors = None
+        if colors is not None:
+            chunk_colors = colors[start + rows, columns, :3]
+        yield directions, chunk_colors
+
+
+def point_cloud(depth, camera, colors=None, **kwargs):
+    """
+    Unprojects a whole depth buffer to world coordinates, see iter_points for the parameters
+    :return: (points, colors) tuple, where points is an (n, 3) float32 numpy array and colors
+    an (n, 3) uint8 numpy array, None without color buffer
+    """
+    chunks = list(iter_points(depth, camera, colors, **kwargs))
+    points = np.concatenate([chunk[0] for chunk in chunks]) if chunks else \
+        np.empty((0, 3), dtype=np.float32)
+    if colors is None:
+        return points, None
+    point_colors = np.concatenate([chunk[1] for chunk in chunks]) if chunks else \
+        np.empty((0, 3), dtype=np.uint8)
+    return points, point_colors
+
+
+def _vertices(points, colors):
+    """
+    :return: Structured numpy array with x, y, z and optionally red, green, blue fields
+    """
+    fields = _POINT_FIELDS + (_PLY_COLOR_FIELDS if colors is not None else [])
+    vertices = np.empty(len(points), dtype=fields)
+    for axis, name in enumerate('xyz'):
+        vertices[name] = points[:, axis]
+    if colors is not None:
+        for channel, (name, _) in enumerate(_PLY_COLOR_FIELDS):
+            vertices[name] = colors[:, channel]
+    return vertices
+
+
+def _ply_header(count, colors):
+    lines = ['ply', 'format binary_little_endian 1.0', 'element vertex {}'.format(count),
+             'property float x', 'property float y', 'property float z']
+    if colors:
+        lines += ['property uchar {}'.format(name) for name, _ in _PLY_COLOR_FIELDS]
+    lines.append('end_header')
+    return ('\n'.join(lines) + '\n').encode('ascii')
+
+
+def save_point_cloud(path, depth, camera, colors=None, file_format=None, **kwargs):
+    """
+    Unprojects a depth buffer and writes the points a chunk at a time, see iter_points for the
+    parameters
+    :param path: Path of the output file
+    :param file_format: 'ply' for binary PLY, 'npy' for a numpy file. Defaults to the extension
+    of path. The numpy file holds an (n, 3) float32 array, or with colors a structured array
+    with the same fields as the PLY vertices
+    :return: Number of points written
+    :raise ValueError: on invalid parameters or unknown file format
+    """
+    if file_format is None:
+        file_format = os.path.splitext(path)[1][1:].lower()
+    if file_format not in ('ply', 'npy'):
+        raise ValueError('Unknown point cloud format: {}'.format(file_format))
+    depth = np.asarray(depth)
+    # The number of points goes in the header, it is counted before unprojecting anything
+    count = int(np.count_nonzero(_background(depth, kwargs.get('background'))))
+    chunks = iter_points(depth, camera, colors, **kwargs)
+    if file_format == 'npy':
+        if colors is None:
+            dtype, shape = np.float32, (count, 3)
+        else:
+            dtype, shape = _POINT_FIELDS + _PLY_COLOR_FIELDS, (count,)
+        if not count:
+            # Empty files cannot be memory-mapped
+            np.save(path, np.empty(shape, dtype=dtype))
+            return 0
+        output = np.lib.format.open_memmap(path, 'w+', dtype, shape)
+        offset = 0
+        for points, point_colors in chunks:
+            if colors is None:
+                output[offset:offset + len(points)] = points
+            else:
+                output[offset:offset + len(points)] = _vertices(points, point_colors)
+            offset += len(points)
+        output.flush()
+        del output
+        return count
+    with open(path, 'wb') as output:
+        output.write(_ply_header(count, colors is not None))
+        for points, point_colors in chunks:
+            _vertices(points, point_colors).tofile(output)
+    return count
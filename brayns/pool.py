@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import threading
+import time
+from brayns.brayns import Brayns, FRAME_JPEG
+from brayns.errors import Failure
+
+# Weight of the latest job in the moving average of the job duration of each server
+_LATENCY_SMOOTHING = 0.2
+
+
+def apply_pose(brayns, pose):
+    """
+    Sets the camera of a Brayns instance in a single request
+    :param brayns: Brayns object
+    :param pose: Dictionary indexed by camera property name, e.g. {'origin': [0, 0, 1]}
+    """
+    with brayns.camera.batch():
+        for name, value in pose.items():
+            setattr(brayns.camera, name, value)
+
+
+class _Schedule(object):
+    """
+    Jobs shared by the workers of a BraynsPool. Each server takes the next job as soon as it is
+    done with the previous one, so faster servers take more jobs. Results are handed back in
+    job order, and workers never run more than window jobs ahead of the consumer
+    """
+    def __init__(self, jobs, window):
+        self.jobs = jobs
+        self.window = window
+        self.condition = threading.Condition()
+        self.next_job = 0
+        self.next_result = 0
+        self.results = {}
+        self.stopped = False
+
+    def take(self):
+        """
+        :return: Index of the next job, None when there is none left
+        """
+        with self.condition:
+            while not self.stopped and self.next_job < len(self.jobs) and \
+                    self.next_job >= self.next_result + self.window:
+                self.condition.wait()
+            if self.stopped or self.next_job >= len(self.jobs):
+                return None
+            index = self.next_job
+            self.next_job += 1
+            return index
+
+    def done(self, index, result):
+        with self.condition:
+            self.results[index] = result
+            self.condition.notify_all()
+
+    def result(self, index):
+        """
+        :return: Result of a job, waiting for it if needed
+        """
+        with self.condition:
+            while index not in self.results:
+                self.condition.wait()
+            self.next_result = index + 1
+            self.condition.notify_all()
+            return self.results.pop(index)
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+
+class BraynsPool(object):
+    """
+    Set of Brayns instances serving identical scenes. Settings are replicated to every server
+    and jobs, such as camera poses to render, are spread across them:
+
+        with BraynsPool(['http://node1:5000', 'http://node2:5000']) as pool:
+            pool.replicate(settings={'samples_per_pixel': 16})
+            images = pool.render(poses)
+    """
+    def __init__(self, urls, **kwargs):
+        """
+        :param urls: Urls of the Brayns instances
+        :param kwargs: Options given to every Brayns object, see Brayns
+        """
+        if not urls:
+            raise ValueError('At least one Brayns url is required')
+        self.instances = [Brayns(url, **kwargs) for url in urls]
+        self._lock = threading.Lock()
+        self._jobs = [0] * len(self.instances)
+        self._latencies = [None] * len(self.instances)
+
+    def __len__(self):
+        return len(self.instances)
+
+    def close(self):
+        """
+        Closes all connections to the Brayns instances
+        """
+        for instance in self.instances:
+            instance.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def apply(self, function):
+        """
+        Calls a function with every Brayns instance, concurrently
+        :param function: Callable taking a Brayns object
+        :return: List of the results, in the order of the urls
+        """
+        results = [None] * len(self.instances)
+
+        def run(index):
+            try:
+                results[index] = function(self.instances[index])
+            except Exception as error:  # pylint: disable=W0703
+                results[index] = Failure(error)
+
+        threads = [threading.Thread(target=run, args=(index,))
+                   for index in range(len(self.instances))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for result in results:
+            if isinstance(result, Failure):
+                raise result.error
+        return results
+
+    def replicate(self, settings=None, camera=None, viewport=None):
+        """
+        Applies the same state to every Brayns instance, with at most one request per endpoint
+        and server
+        :param settings: Dictionary indexed by Settings property name
+        :param camera: Dictionary indexed by Camera property name
+        :param viewport: Dictionary indexed by Viewport property name
+        """
+        def replicate(brayns):
+            with brayns.transaction():
+                for target, values in ((brayns.settings, settings), (brayns.camera, camera),
+                                       (brayns.viewport, viewport)):
+                    for name, value in (values or {}).items():
+                        setattr(target, name, value)
+
+        self.apply(replicate)
+
+    def _work(self, index, function, schedule):
+        brayns = self.instances[index]
+        while True:
+            job = schedule.take()
+            if job is None:
+                return
+            start = time.time()
+            try:
+                result = function(brayns, schedule.jobs[job])
+            except Exception as error:  # pylint: disable=W0703
+                result = Failure(error)
+            elapsed = time.time() - start
+            with self._lock:
+                self._jobs[index] += 1
+                latency = self._latencies[index]
+                self._latencies[index] = elapsed if latency is None else \
+                    latency + _LATENCY_SMOOTHING * (elapsed - latency)
+            schedule.done(job, result)
+
+    def imap(self, function, jobs, window=None):
+        """
+        Runs jobs across the servers. Each server takes a new job as soon as it is free, which
+        balances the load according to the actual speed of each server
+        :param function: Callable taking a Brayns object and a job
+        :param jobs: Iterable of jobs
+        :param window: Maximum number of jobs run ahead of the consumer, bounds the number of
+        results kept in memory. Defaults to four per server
+        :return: Generator of the results, in job order
+        """
+        schedule = _Schedule(list(jobs), window or 4 * len(self.instances))
+        threads = [threading.Thread(target=self._work, args=(index, function, schedule))
+                   for index in range(len(self.instances))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            for index in range(len(schedule.jobs)):
+                result = schedule.result(index)
+                if isinstance(result, Failure):
+                    raise result.error
+                yield result
+        finally:
+            schedule.stop()
+            for thread in threads:
+                thread.join()
+
+    def map(self, function, jobs, window=None):
+        """
+        Same as imap, but returns a list
+        """
+        return list(self.imap(function, jobs, window))
+
+    def render(self, poses, kind=FRAME_JPEG, window=None):
+        """
+        Renders camera poses across the servers
+        :param poses: Iterable of dictionaries indexed by Camera property name
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param window: See imap
+        :return: List of frames, in the order of the poses
+        """
+        return self.map(lambda brayns, pose: _render_pose(brayns, pose, kind), poses, window)
+
+    def statistics(self):
+        """
+        :return: List with, for every server, its url, the number of jobs it ran and the moving
+        average of its job duration in seconds
+        """
+        with self._lock:
+            return [{'url': instance.url, 'jobs': jobs, 'latency': latency}
+                    for instance, jobs, latency in zip(self.instances, self._jobs,
+                                                       self._latencies)]
+
+
+def _render_pose(brayns, pose, kind):
+    apply_pose(brayns, pose)
+    return brayns.fetch_frame(kind)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Adaptive quality for interactive viewers. A QualityController measures how long each frame
+takes to fetch and walks a ladder of quality levels to hold a frame rate target while the camera
+moves: samples per pixel are lowered first, then the JPEG quality, then the resolution. Once the
+camera stops, quality is stepped back up one level per frame until the full quality is reached.
+
+    controller = QualityController(brayns, target_fps=20)
+    while viewing:
+        brayns.camera.origin = next_origin()
+        show(controller.fetch())
+"""
+
+import time
+from brayns.brayns import FRAME_JPEG
+
+# Quality levels, from the full quality down. 'samples' scales samples_per_pixel (never below
+# one), 'jpeg_compression' caps the JPEG quality (None keeps the full quality) and 'scale'
+# scales the viewport and JPEG sizes
+DEFAULT_LEVELS = (
+    {'samples': 1.0, 'jpeg_compression': None, 'scale': 1.0},
+    {'samples': 0.5, 'jpeg_compression': None, 'scale': 1.0},
+    {'samples': 0.25, 'jpeg_compression': 85, 'scale': 1.0},
+    {'samples': 0.0, 'jpeg_compression': 75, 'scale': 1.0},
+    {'samples': 0.0, 'jpeg_compression': 65, 'scale': 0.75},
+    {'samples': 0.0, 'jpeg_compression': 55, 'scale': 0.5},
+    {'samples': 0.0, 'jpeg_compression': 45, 'scale': 0.25}
+)
+
+_CAMERA_PROPERTIES = ('origin', 'look_at', 'up_vector', 'field_of_view')
+
+
+class QualityController(object):
+    """
+    Lowers the rendering and transfer quality of a Brayns instance when frames take longer
+    than the frame budget, and restores it when the camera stops
+    """
+    def __init__(self, brayns, target_fps, kind=FRAME_JPEG, levels=DEFAULT_LEVELS,
+                 smoothing=0.3, hysteresis=0.2, cooldown=3, settle_frames=2):
+        """
+        :param brayns: Brayns object. Its current viewport size, JPEG size and quality, and
+        samples per pixel define the full quality
+        :param target_fps: Frame rate to hold while the camera moves
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH, frames fetched by fetch()
+        :param levels: Quality levels from the full quality down, see DEFAULT_LEVELS
+        :param smoothing: Weight of the latest frame time in its moving average
+        :param hysteresis: Fraction of the frame budget by which the average frame time must
+        exceed it to lower the quality, or be below it to raise the quality
+        :param cooldown: Number of frames measured at a new level before changing it again
+        :param settle_frames: Number of consecutive frames without camera change after which
+        the camera is considered stopped
+        """
+        self._brayns = brayns
+        self.target_fps = target_fps
+        self.kind = kind
+        self.levels = levels
+        self.smoothing = smoothing
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.settle_frames = settle_frames
+        self._full = {
+            'size': list(brayns.viewport.size),
+            'jpeg_size': list(brayns.settings.jpeg_size),
+            'jpeg_compression': brayns.settings.jpeg_compression,
+            'samples_per_pixel': brayns.settings.samples_per_pixel
+        }
+        self._level = 0
+        self._frame_time = None
+        self._measured = 0
+        self._camera = None
+        self._still = 0
+
+    @property
+    def level(self):
+        """
+        Index of the current quality level, 0 being the full quality
+        """
+        return self._level
+
+    @property
+    def frame_time(self):
+        """
+        Moving average of the frame time in seconds at the current level, None until measured
+        """
+        return self._frame_time
+
+    def _values(self, level):
+        """
+        :return: Settings and viewport values of a quality level
+        """
+        full = self._full
+        description = self.levels[level]
+        scale = description.get('scale', 1.0)
+        compression = description.get('jpeg_compression')
+        return {
+            'size': [max(1, int(round(value * scale))) for value in full['size']],
+            'jpeg_size': [max(1, int(round(value * scale))) for value in full['jpeg_size']],
+            'jpeg_compression': full['jpeg_compression'] if compression is None
+                                else min(compression, full['jpeg_compression']),
+            'samples_per_pixel': max(1, int(round(
+                full['samples_per_pixel'] * description.get('samples', 1.0))))
+        }
+
+    def set_level(self, level):
+        """
+        Applies a quality level, with at most one request per endpoint
+        :param level: Index of the level, 0 being the full quality
+        """
+        level = max(0, min(level, len(self.levels) - 1))
+        values = self._values(level)
+        brayns = self._brayns
+        with brayns.transaction():
+            brayns.viewport.size = values['size']
+            brayns.settings.jpeg_size = values['jpeg_size']
+            brayns.settings.jpeg_compression = values['jpeg_compression']
+            brayns.settings.samples_per_pixel = values['samples_per_pixel']
+        if level != self._level:
+            self._level = level
+            self._frame_time = None
+            self._measured = 0
+
+    def reset(self):
+        """
+        Restores the full quality
+        """
+        self.set_level(0)
+        self._still = 0
+
+    def _camera_moved(self):
+        camera = self._brayns.camera
+        state = [getattr(camera, name) for name in _CAMERA_PROPERTIES]
+        moved = self._camera is not None and state != self._camera
+        self._camera = state
+        return moved
+
+    def record(self, frame_time):
+        """
+        Accounts for a frame fetched outside of fetch(), and adjusts the quality for the next
+        one
+        :param frame_time: Time in seconds it took to fetch the frame
+        """
+        if self._camera_moved():
+            self._still = 0
+        else:
+            self._still += 1
+        if self._frame_time is None:
+            self._frame_time = frame_time
+        else:
+            self._frame_time += self.smoothing * (frame_time - self._frame_time)
+        self._measured += 1
+
+        if self._still >= self.settle_frames:
+            # The camera stopped, frame rate no longer matters
+            if self._level > 0:
+                self.set_level(self._level - 1)
+            return
+        if self._measured < self.cooldown:
+            return
+        budget = 1.0 / self.target_fps
+        if self._frame_time > budget * (1.0 + self.hysteresis):
+            if self._level < len(self.levels) - 1:
+                self.set_level(self._level + 1)
+        elif self._frame_time < budget * (1.0 - self.hysteresis) and self._level > 0:
+            self.set_level(self._level - 1)
+
+    def fetch(self):
+        """
+        Fetches a frame, measures how long it took and adjusts the quality for the next one
+        :return: Frame as returned by Brayns.fetch_frame
+        """
+        start = time.time()
+        frame = self._brayns.fetch_frame(self.kind, cached=False)
+        self.record(time.time() - start)
+        return frame
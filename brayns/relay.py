@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Relay serving one Brayns session to many viewers. The relay speaks the same REST interface as
+Brayns: each new frame is fetched from Brayns once, however many viewers ask for it, and served
+to all of them from memory. Camera, viewport and settings updates of the viewers are coalesced
+and sent to Brayns by a single client, the latest values winning:
+
+    python -m brayns.relay http://render-node:5000 --port 5001 --fps 30
+
+Viewers then point at http://relay-host:5001 instead of Brayns. Frames are sent as binary data
+to viewers that accept it, and as base64 in Json otherwise, each form being encoded once per
+frame. Frames and states carry an ETag, so that polling an unchanged frame gets 304 Not
+Modified.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import sys
+import threading
+import time
+from brayns.brayns import Brayns, CONTENT_TYPE_JPEG, CONTENT_TYPE_BINARY, \
+    HEADER_WIDTH, HEADER_HEIGHT, HEADER_COLOR_SIZE, HEADER_DEPTH_SIZE
+from brayns.coalescer import DEFAULT_MAX_RATE
+from brayns.errors import BraynsError
+from brayns.server import RequestHandler, ThreadingServer, accepts
+
+# Default number of frames per second fetched from Brayns at most
+DEFAULT_FPS = 30
+
+_JPEG_PATH = '/v1/image-jpeg'
+_FRAME_BUFFERS_PATH = '/v1/frame-buffers'
+
+
+def _etag(data):
+    return '"{}"'.format(hashlib.sha1(data).hexdigest()[:16])
+
+
+class _SharedFrame(object):
+    """
+    Latest frame of an endpoint. Only one request at a time fetches it from Brayns, and frames
+    younger than max_age are served without fetching; requests arriving while a fetch is in
+    flight wait for its result instead of fetching again
+    """
+    def __init__(self, fetch, max_age):
+        """
+        :param fetch: Callable returning the frame from Brayns
+        :param max_age: Time in seconds during which a frame is served without fetching
+        """
+        self._fetch = fetch
+        self.max_age = max_age
+        self._condition = threading.Condition()
+        self._fetching = False
+        self._completed = 0
+        self._frame = None
+        self._error = None
+        self._fetched_at = 0.0
+        self._invalidations = 0
+        self._forms = {}
+        self.fetches = 0
+
+    def invalidate(self):
+        """
+        Makes the next request fetch a new frame, e.g. after the camera changed
+        """
+        with self._condition:
+            self._fetched_at = 0.0
+            self._invalidations += 1
+
+    def get(self):
+        """
+        :return: Latest frame
+        :raise BraynsError: if the fetch this request made or waited for failed
+        """
+        with self._condition:
+            if self._frame is not None and time.time() - self._fetched_at < self.max_age:
+                return self._frame
+            if self._fetching:
+                completed = self._completed
+                while self._completed == completed:
+                    self._condition.wait()
+                if self._error is not None:
+                    raise self._error
+                return self._frame
+            self._fetching = True
+            invalidations = self._invalidations
+        frame = error = None
+        try:
+            frame = self._fetch()
+        except BaseException as exception:  # pylint: disable=W0703
+            error = exception
+        with self._condition:
+            self._fetching = False
+            self._completed += 1
+            self._error = error
+            self.fetches += 1
+            if error is None:
+                if frame is None:
+                    error = self._error = BraynsError('Brayns did not send a frame')
+                else:
+                    self._frame = frame
+                    self._forms = {}
+                    # A frame fetched while the state changed is served to the requests that
+                    # waited for it, but not to the next ones
+                    if invalidations == self._invalidations:
+                        self._fetched_at = time.time()
+            self._condition.notify_all()
+        if error is not None:
+            raise error
+        return frame
+
+    def form(self, frame, name, encode):
+        """
+        :param frame: Frame returned by get()
+        :param name: Name of the encoded form
+        :param encode: Callable encoding the frame to the form, called once per frame
+        :return: (body, headers) tuple of the frame in the given form
+        """
+        with self._condition:
+            form = self._forms.get(name) if frame is self._frame else None
+        if form is None:
+            form = encode(frame)
+            with self._condition:
+                if frame is self._frame:
+                    self._forms[name] = form
+        return form
+
+
+def _jpeg_binary(data):
+    return data, {'Content-Type': CONTENT_TYPE_JPEG, 'ETag': _etag(data)}
+
+
+def _jpeg_json(data):
+    body = json.dumps({'data': base64.b64encode(data).decode('ascii')}).encode('utf-8')
+    return body, {'Content-Type': 'application/json', 'ETag': _etag(data)}
+
+
+def _buffers(snapshot):
+    color = snapshot._buffer('diffuse')  # pylint: disable=W0212
+    depth = snapshot._buffer('depth')  # pylint: disable=W0212
+    return color, depth
+
+
+def _frame_buffers_binary(snapshot):
+    color, depth = _buffers(snapshot)
+    body = bytes(color) + bytes(depth)
+    return body, {
+        'Content-Type': CONTENT_TYPE_BINARY,
+        'ETag': _etag(body),
+        HEADER_WIDTH: str(snapshot.width),
+        HEADER_HEIGHT: str(snapshot.height),
+        HEADER_COLOR_SIZE: str(len(color)),
+        HEADER_DEPTH_SIZE: str(len(depth))
+    }
+
+
+def _frame_buffers_json(snapshot):
+    color, depth = _buffers(snapshot)
+    body = json.dumps({
+        'width': snapshot.width,
+        'height': snapshot.height,
+        'diffuse': base64.b64encode(color).decode('ascii'),
+        'depth': base64.b64encode(depth).decode('ascii')
+    }).encode('utf-8')
+    return body, {'Content-Type': 'application/json', 'ETag': _etag(body)}
+
+
+class _Handler(RequestHandler):
+    def _reply_cached(self, body, headers):
+        """
+        Replies 304 Not Modified if the viewer already has this version
+        """
+        if self.headers.get('If-None-Match') == headers['ETag']:
+            self._reply(304, headers={'ETag': headers['ETag']})
+        else:
+            self._reply(200, body, headers)
+
+    def do_GET(self):  # pylint: disable=C0103
+        relay = self.server.relay
+        relay.count_request()
+        try:
+            if self.path == _JPEG_PATH:
+                binary = accepts(self.headers.get('Accept'), CONTENT_TYPE_JPEG)
+                frame = relay.jpeg.get()
+                self._reply_cached(*relay.jpeg.form(
+                    frame, 'binary' if binary else 'json', _jpeg_binary if binary else _jpeg_json))
+            elif self.path == _FRAME_BUFFERS_PATH:
+                binary = accepts(self.headers.get('Accept'), CONTENT_TYPE_BINARY)
+                frame = relay.frame_buffers.get()
+                self._reply_cached(*relay.frame_buffers.form(
+                    frame, 'binary' if binary else 'json',
+                    _frame_buffers_binary if binary else _frame_buffers_json))
+            else:
+                wrapper = relay.wrapper(self.path)
+                if wrapper is None:
+                    self._reply(404)
+                    return
+                body = json.dumps(wrapper._values()).encode('utf-8')  # pylint: disable=W0212
+                self._reply_cached(body, {'Content-Type': 'application/json',
+                                          'ETag': _etag(body)})
+        except BraynsError:
+            self._reply(502)
+
+    def do_PUT(self):  # pylint: disable=C0103
+        relay = self.server.relay
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        wrapper = relay.wrapper(self.path)
+        if wrapper is None:
+            self._reply(404)
+            return
+        try:
+            values = json.loads(body.decode('utf-8')) if body else {}
+        except ValueError:
+            self._reply(400)
+            return
+        if not isinstance(values, dict):
+            self._reply(400)
+            return
+        relay.update(wrapper, values)
+        self._reply(200)
+
+
+class Relay(object):
+    """
+    HTTP server relaying one Brayns instance to many viewers, see module documentation.
+    Either serve in the calling thread:
+
+        relay = Relay('http://render-node:5000', port=5001)
+        try:
+            relay.serve_forever()
+        finally:
+            relay.stop()
+
+    or in a background thread for the duration of a block:
+
+        with Relay('http://render-node:5000') as relay:
+            brayns = Brayns(relay.url)
+    """
+    def __init__(self, brayns, host='127.0.0.1', port=0, fps=DEFAULT_FPS,
+                 max_rate=DEFAULT_MAX_RATE):
+        """
+        :param brayns: Brayns object or url. Its updates are coalesced from then on
+        :param host: Address to listen on
+        :param port: Port to listen on, 0 picks a free one
+        :param fps: Maximum number of frames per second fetched from Brayns, per endpoint
+        :param max_rate: Maximum number of updates per second sent to Brayns, per endpoint
+        """
+        self.brayns = brayns if isinstance(brayns, Brayns) else Brayns(brayns)
+        self.brayns.coalesce(True, max_rate)
+        max_age = 1.0 / fps if fps else 0.0
+        self.jpeg = _SharedFrame(lambda: self.brayns.image_jpeg_data, max_age)
+        self.frame_buffers = _SharedFrame(lambda: self.brayns.frame_buffers, max_age)
+        self.served = 0
+        self._lock = threading.Lock()
+        self._wrappers = dict((wrapper._PATH, wrapper)  # pylint: disable=W0212
+                              for wrapper in (self.brayns.viewport, self.brayns.camera,
+                                              self.brayns.settings))
+        self._server = ThreadingServer((host, port), _Handler)
+        self._server.relay = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    @property
+    def fetches(self):
+        """
+        :return: Number of frames fetched from Brayns, per endpoint path
+        """
+        return {_JPEG_PATH: self.jpeg.fetches, _FRAME_BUFFERS_PATH: self.frame_buffers.fetches}
+
+    def count_request(self):
+        with self._lock:
+            self.served += 1
+
+    def wrapper(self, path):
+        """
+        :param path: Path of a request
+        :return: Viewport, Camera or Settings object of the path, None if there is none
+        """
+        return self._wrappers.get(path)
+
+    def update(self, wrapper, values):
+        """
+        Applies the values sent by a viewer. Only the fields that change are scheduled to be
+        sent to Brayns, and frames are fetched again once they are
+        :param wrapper: Viewport, Camera or Settings object
+        :param values: Dictionary of field values indexed by Json key
+        """
+        if wrapper._restore(values):  # pylint: disable=W0212
+            self.jpeg.invalidate()
+            self.frame_buffers.invalidate()
+
+    def serve_forever(self):
+        """
+        Serves requests in the calling thread until stop() is called
+        """
+        self._server.serve_forever()
+
+    def start(self):
+        """
+        Starts serving requests in a background thread
+        :return: self
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, name='brayns-relay')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving requests, closes the listening socket and the connections to Brayns
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.brayns.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Relay serving one Brayns to many viewers')
+    parser.add_argument('url', help='Url of Brayns')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=5001, help='Port to listen on')
+    parser.add_argument('--fps', type=float, default=DEFAULT_FPS,
+                        help='Maximum number of frames per second fetched from Brayns')
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_MAX_RATE,
+                        help='Maximum number of updates per second sent to Brayns')
+    args = parser.parse_args(argv)
+
+    relay = Relay(args.url, args.host, args.port, args.fps, args.max_rate)
+    sys.stderr.write('Relaying {} on {}\n'.format(args.url, relay.url))
+    try:
+        relay.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        relay.stop()
+
+
+if __name__ == '__main__':
+    main()
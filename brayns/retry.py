@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Request deadlines and retry policy. A deadline bounds the total time of a call, retries and
+hedged requests included; a retry policy decides which failures are retried and how long to
+wait before the next attempt.
+"""
+
+import random
+import time
+from brayns.errors import BraynsTimeoutError, BraynsHTTPError
+
+# Statuses of temporary server failures, worth retrying
+DEFAULT_RETRY_STATUSES = (502, 503, 504)
+
+
+class RetryPolicy(object):
+    """
+    Retries failed requests with exponential backoff and full jitter: the n-th retry waits a
+    random time between 0 and min(max_backoff, backoff * 2^n) seconds, which spreads the
+    retries of many clients hitting a restarting server
+    """
+    def __init__(self, retries=3, backoff=0.05, max_backoff=2.0, statuses=DEFAULT_RETRY_STATUSES,
+                 methods=('GET',)):
+        """
+        :param retries: Maximum number of retries after the first attempt
+        :param backoff: Base delay in seconds
+        :param max_backoff: Maximum delay in seconds
+        :param statuses: HTTP statuses retried, in addition to connection errors and timeouts
+        :param methods: HTTP methods retried. Only GETs by default, since a PUT that failed on
+        the way back may already have been applied
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = tuple(statuses)
+        self.methods = tuple(methods)
+
+    def retryable(self, method, error):
+        """
+        :param method: HTTP method of the failed request
+        :param error: BraynsError raised by the request
+        :return: True if the request may be sent again
+        """
+        if method not in self.methods:
+            return False
+        if isinstance(error, BraynsHTTPError):
+            return error.status in self.statuses
+        return True
+
+    def delay(self, attempt):
+        """
+        :param attempt: Number of retries already made
+        :return: Time in seconds to wait before the next retry
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+# Policy that never retries
+NO_RETRY = RetryPolicy(retries=0)
+
+
+class Deadline(object):
+    """
+    Point in time by which a call must be done
+    """
+    def __init__(self, seconds=None):
+        """
+        :param seconds: Time budget of the call, None for no deadline
+        """
+        self.expires = None if seconds is None else time.time() + seconds
+
+    def remaining(self):
+        """
+        :return: Time left in seconds, None if there is no deadline
+        """
+        if self.expires is None:
+            return None
+        return self.expires - time.time()
+
+    def timeout(self, timeout, url=None):
+        """
+        Bounds the timeout of a request by the time left
+        :param timeout: Timeout of the request, a number or a (connect, read) tuple, None for no
+        timeout
+        :param url: Url of the request, for the error message
+        :return: Timeout to give to the request
+        :raise BraynsTimeoutError: if the deadline has passed
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise BraynsTimeoutError(url, 'deadline exceeded')
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, (tuple, list)):
+            return tuple(remaining if value is None else min(value, remaining)
+                         for value in timeout)
+        return min(timeout, remaining)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Building blocks of the small HTTP servers speaking the REST interface of Brayns, such as the
+relay and the mock server of the benchmarks
+"""
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+def accepts(header, value):
+    """
+    :param header: Value of an Accept or Accept-Encoding header, None if missing
+    :param value: Media type or encoding
+    :return: True if the header lists value with a non-zero quality
+    """
+    for item in (header or '').split(','):
+        parts = [part.strip() for part in item.split(';')]
+        if parts[0].lower() == value and 'q=0' not in parts[1:]:
+            return True
+    return False
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Silent request handler keeping connections alive
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in as few packets as possible, without waiting for
+    # delayed acknowledgements
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, *args):  # pylint: disable=W0221
+        pass
+
+    def _reply(self, status, body=b'', headers=None):
+        """
+        Sends a complete response
+        :param status: HTTP status code
+        :param body: Bytes of the body
+        :param headers: Dictionary of additional headers
+        """
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server handling each connection in a daemon thread
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    # Viewers connecting at once beyond the default backlog of 5 would be refused
+    request_queue_size = 128
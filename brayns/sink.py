@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Saving of frames off the fetch path. Frames handed to a FrameSink are encoded and written by a
+pool of threads or processes, while the caller goes on fetching the next ones:
+
+    with FrameSink('frames', image_format='png') as sink:
+        for _ in range(100):
+            sink.write(brayns.frame_buffers, FRAME_COLOR)
+    print(sink.failures)
+
+The number and the size of the frames waiting to be written are bounded: write() blocks, or
+drops the frame if asked not to block, until enough of them are done.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from io import BytesIO
+import os
+import threading
+import time
+from PIL import Image
+from brayns.brayns import FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH, FrameBufferSnapshot, np
+
+# Pools encoding the frames
+SINK_THREADS = 'threads'
+SINK_PROCESSES = 'processes'
+
+# Image format used when none is given, per kind of frame
+DEFAULT_FORMATS = {FRAME_JPEG: 'jpg', FRAME_COLOR: 'png', FRAME_DEPTH: 'tiff'}
+
+_JPEG_FORMATS = ('jpg', 'jpeg')
+
+
+def _image(kind, data, size):
+    """
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :param data: Encoded JPEG bytes or raw frame buffer bytes, Pillow Image or numpy array
+    :param size: [width, height] of raw frame buffers
+    :return: Pillow Image object
+    """
+    if isinstance(data, Image.Image):
+        return data
+    if np is not None and isinstance(data, np.ndarray):
+        return Image.fromarray(data)
+    if size is None:
+        return Image.open(BytesIO(data))
+    if kind == FRAME_COLOR:
+        return Image.frombytes('RGBA', size, data)
+    mode = 'I;16' if len(data) == 2 * size[0] * size[1] else 'F'
+    return Image.frombytes(mode, size, data)
+
+
+def write_frame(path, kind, image_format, data, size=None):
+    """
+    Encodes a frame and writes it to disk. Encoded JPEG frames saved as JPEG are written as
+    they are, without re-encoding
+    :param path: Path of the file to write
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :param image_format: File format, e.g. 'jpg', 'png', 'tiff' or 'npy'
+    :param data: Encoded JPEG bytes or raw frame buffer bytes, Pillow Image or numpy array
+    :param size: [width, height] of raw frame buffer bytes, None otherwise
+    """
+    if image_format in _JPEG_FORMATS and size is None and isinstance(data, (bytes, bytearray)):
+        with open(path, 'wb') as output:
+            output.write(data)
+        return
+    if image_format == 'npy':
+        if np is None:
+            raise ImportError('numpy is required to write .npy files')
+        array = data if isinstance(data, np.ndarray) else np.asarray(_image(kind, data, size))
+        np.save(path, array)
+        return
+    image = _image(kind, data, size)
+    if image_format in _JPEG_FORMATS and image.mode == 'RGBA':
+        image = image.convert('RGB')
+    image.save(path)
+
+
+def _frame_data(frame, kind):
+    """
+    Extracts what the workers need from a frame, without decoding it
+    :param frame: Encoded JPEG bytes, FrameBufferSnapshot, Pillow Image or numpy array
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :return: (data, size, number of bytes) tuple
+    """
+    if isinstance(frame, FrameBufferSnapshot):
+        data = frame.depth_data if kind == FRAME_DEPTH else frame.color_data
+        return data, frame.size, len(data)
+    if isinstance(frame, (bytes, bytearray)):
+        return bytes(frame), None, len(frame)
+    if isinstance(frame, Image.Image):
+        depth = {'I;16': 2, 'I': 4, 'F': 4}.get(frame.mode, 1)
+        return frame, None, len(frame.getbands()) * frame.size[0] * frame.size[1] * depth
+    if np is not None and isinstance(frame, np.ndarray):
+        return frame, None, frame.nbytes
+    raise TypeError('Unsupported frame type: {}'.format(type(frame).__name__))
+
+
+class FrameSink(object):
+    """
+    Writes frames to disk in the background, with bounded memory. Failed writes do not stop the
+    sink; they are collected in failures and passed to the on_error callback
+    """
+    def __init__(self, directory='.', image_format=None, pattern='frame_{:06d}.{}', workers=None,
+                 pool=SINK_THREADS, max_pending=None, max_bytes=None, on_error=None,
+                 on_written=None):
+        """
+        :param directory: Output directory, created if needed
+        :param image_format: File extension selecting the format of every frame, e.g. 'jpg',
+        'png', 'tiff' or 'npy'. Defaults to 'jpg' for JPEG frames, 'png' for color and 'tiff'
+        for depth buffers
+        :param pattern: File name pattern, formatted with the frame number and the extension
+        :param workers: Number of threads or processes encoding frames, defaults to the number
+        of CPUs
+        :param pool: SINK_THREADS or SINK_PROCESSES. Processes scale better for formats whose
+        encoder holds the GIL, at the cost of copying every frame to a worker
+        :param max_pending: Maximum number of frames waiting to be written. Defaults to twice
+        the number of workers
+        :param max_bytes: Maximum size in bytes of the frames waiting to be written, None for
+        no limit. A frame larger than the limit is accepted when nothing else is pending
+        :param on_error: Optional callable taking the path and the exception of a failed write
+        :param on_written: Optional callable taking the path of every frame written
+        """
+        if pool not in (SINK_THREADS, SINK_PROCESSES):
+            raise ValueError('Invalid pool: {}'.format(pool))
+        self.directory = directory
+        self.image_format = image_format.lower() if image_format else None
+        self.pattern = pattern
+        self.on_error = on_error
+        self.on_written = on_written
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        workers = workers or os.cpu_count() or 1
+        self._max_pending = max_pending or 2 * workers
+        self._max_bytes = max_bytes
+        executor = ThreadPoolExecutor if pool == SINK_THREADS else ProcessPoolExecutor
+        self._executor = executor(workers)
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._pending_bytes = 0
+        self._number = 0
+        self.written = 0
+        self.dropped = 0
+        self.failures = []
+
+    def _full(self, size):
+        if self._pending >= self._max_pending:
+            return True
+        return self._max_bytes is not None and self._pending > 0 and \
+            self._pending_bytes + size > self._max_bytes
+
+    def write(self, frame, kind=FRAME_JPEG, path=None, block=True, timeout=None):
+        """
+        Queues a frame to be written
+        :param frame: Encoded JPEG bytes as returned by Brayns.image_jpeg_data, FrameBufferSnapshot
+        as returned by Brayns.frame_buffers, Pillow Image or numpy array
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH. Selects the buffer of a
+        FrameBufferSnapshot and the default format
+        :param path: Path of the file, defaults to the next file name of the pattern
+        :param block: If False, the frame is dropped instead of waiting when the sink is full
+        :param timeout: Maximum time in seconds to wait when the sink is full, None to wait
+        forever. The frame is dropped on timeout
+        :return: Path of the file to be written, None if the frame was dropped
+        """
+        if kind not in (FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH):
+            raise ValueError('Invalid frame kind: {}'.format(kind))
+        data, size, nbytes = _frame_data(frame, kind)
+        image_format = self.image_format or DEFAULT_FORMATS[kind]
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._full(nbytes):
+                remaining = None if deadline is None else deadline - time.time()
+                if not block or (remaining is not None and remaining <= 0):
+                    self.dropped += 1
+                    return None
+                self._condition.wait(remaining)
+            if path is None:
+                path = os.path.join(self.directory, self.pattern.format(self._number, image_format))
+            self._number += 1
+            self._pending += 1
+            self._pending_bytes += nbytes
+        future = self._executor.submit(write_frame, path, kind, image_format, data, size)
+        future.add_done_callback(lambda done: self._done(path, nbytes, done))
+        return path
+
+    def _done(self, path, nbytes, future):
+        error = future.exception()
+        with self._condition:
+            self._pending -= 1
+            self._pending_bytes -= nbytes
+            if error is None:
+                self.written += 1
+            else:
+                self.failures.append((path, error))
+            self._condition.notify_all()
+        if error is not None and self.on_error is not None:
+            self.on_error(path, error)
+        elif error is None and self.on_written is not None:
+            self.on_written(path)
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued frame has been written or has failed
+        :param timeout: Maximum time to wait in seconds, None to wait forever
+        :return: True if nothing is pending anymore, False on timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self):
+        """
+        Writes the pending frames and stops the workers
+        """
+        self.flush()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
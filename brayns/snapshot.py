@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import hashlib
+import json
+
+
+def _freeze(value):
+    """
+    :return: Hashable copy of a Json value, lists become tuples and dictionaries sorted tuples
+    of items
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _thaw(value):
+    """
+    :return: Json value of a frozen one, tuples become lists
+    """
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class Snapshot(object):
+    """
+    Immutable state of the viewport, camera and settings of Brayns, as returned by
+    Brayns.snapshot. Snapshots are hashable, compare by value and convert to and from Json:
+
+        views = [brayns.snapshot() for _ in range(3)]
+        data = views[0].to_json()
+        brayns.restore(Snapshot.from_json(data))
+    """
+    def __init__(self, state):
+        """
+        :param state: Dictionary indexed by endpoint path, e.g. '/v1/camera', of dictionaries
+        of field values indexed by Json key
+        """
+        self._state = tuple(sorted(
+            (path, tuple(sorted((key, _freeze(value)) for key, value in values.items())))
+            for path, values in state.items()))
+        self._hash = hash(self._state)
+
+    @property
+    def endpoints(self):
+        """
+        :return: Paths of the endpoints held by the snapshot
+        """
+        return [path for path, _ in self._state]
+
+    def values(self, path):
+        """
+        :param path: Path of an endpoint, e.g. '/v1/camera'
+        :return: Dictionary of the field values of the endpoint indexed by Json key, empty if
+        the snapshot does not hold it
+        """
+        for endpoint, values in self._state:
+            if endpoint == path:
+                return dict((key, _thaw(value)) for key, value in values)
+        return {}
+
+    def diff(self, other):
+        """
+        :param other: Snapshot object, None for an empty one
+        :return: Dictionary indexed by endpoint path of the field values of this snapshot that
+        differ in other, without the endpoints that do not differ
+        """
+        before = dict(other._state) if other is not None else {}  # pylint: disable=W0212
+        changes = {}
+        for path, values in self._state:
+            previous = dict(before.get(path, ()))
+            changed = dict((key, _thaw(value)) for key, value in values
+                           if key not in previous or previous[key] != value)
+            if changed:
+                changes[path] = changed
+        return changes
+
+    def to_dict(self):
+        """
+        :return: Dictionary indexed by endpoint path of dictionaries of field values
+        """
+        return dict((path, self.values(path)) for path in self.endpoints)
+
+    def to_json(self):
+        """
+        :return: Canonical Json representation, identical for equal snapshots
+        """
+        return json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':'))
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(json.loads(data))
+
+    def digest(self):
+        """
+        :return: Hexadecimal SHA-1 of the canonical Json representation, stable across
+        processes unlike hash()
+        """
+        return hashlib.sha1(self.to_json().encode('utf-8')).hexdigest()
+
+    def __eq__(self, other):
+        return isinstance(other, Snapshot) and self._state == other._state
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._hash
+
+    def __getstate__(self):
+        return self._state
+
+    def __setstate__(self, state):
+        self._state = state
+        self._hash = hash(state)
+
+    def __repr__(self):
+        return 'Snapshot({})'.format(self.to_json())
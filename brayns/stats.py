@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import math
+import threading
+import time
+
+# Phases timed for every request
+PHASE_NETWORK = 'network'
+PHASE_JSON = 'json'
+PHASE_BASE64 = 'base64'
+PHASE_IMAGE = 'image'
+
+# Latency histogram buckets grow geometrically from 1 microsecond, by 2^(1/8) per bucket,
+# which bounds the error of the reported percentiles to about 5%
+_BUCKET_MIN = 1e-6
+_BUCKET_GROWTH = 2 ** 0.125
+_BUCKET_COUNT = 256
+
+
+class Histogram(object):
+    """
+    Latency histogram with logarithmic buckets, of constant size whatever the number of samples
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self._buckets = [0] * _BUCKET_COUNT
+
+    def add(self, value):
+        """
+        :param value: Duration in seconds
+        """
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        if value <= _BUCKET_MIN:
+            index = 0
+        else:
+            index = int(math.log(value / _BUCKET_MIN, _BUCKET_GROWTH)) + 1
+        self._buckets[min(index, _BUCKET_COUNT - 1)] += 1
+
+    def percentile(self, fraction):
+        """
+        :param fraction: Fraction of the samples, e.g. 0.95
+        :return: Duration under which that fraction of the samples falls, None if empty
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        cumulated = 0
+        for index, count in enumerate(self._buckets):
+            cumulated += count
+            if cumulated >= rank and count:
+                if index == 0:
+                    return self.minimum
+                if index == _BUCKET_COUNT - 1:
+                    # Unbounded overflow bucket
+                    return self.maximum
+                # Geometric middle of the bucket, within the observed range
+                value = _BUCKET_MIN * _BUCKET_GROWTH ** (index - 0.5)
+                return min(max(value, self.minimum), self.maximum)
+        return self.maximum
+
+    def summary(self):
+        """
+        :return: Dictionary with count, total, mean, min, max, p50, p95 and p99
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.minimum,
+            'max': self.maximum,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99)
+        }
+
+
+class _EndpointStatistics(object):
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.phases = {}
+
+    def summary(self):
+        summary = {
+            'requests': self.requests,
+            'errors': self.errors,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received
+        }
+        for phase, histogram in self.phases.items():
+            summary[phase] = histogram.summary()
+        return summary
+
+
+class _Timer(object):
+    """
+    Context manager recording the duration of a phase
+    """
+    def __init__(self, statistics, endpoint, phase):
+        self._statistics = statistics
+        self._endpoint = endpoint
+        self._phase = phase
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._statistics.record(self._endpoint, self._phase, time.time() - self._start)
+
+
+class _NoTimer(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(statistics, endpoint, phase):
+    """
+    :param statistics: Statistics object, or None when nothing is recorded
+    :param endpoint: Path of the endpoint, e.g. '/v1/frame-buffers'
+    :param phase: PHASE_NETWORK, PHASE_JSON, PHASE_BASE64 or PHASE_IMAGE
+    :return: Context manager timing the enclosed code
+    """
+    if statistics is None:
+        return _NO_TIMER
+    return statistics.timer(endpoint, phase)
+
+
+class Statistics(object):
+    """
+    Request counts, transferred bytes and latency histograms per endpoint and phase: network
+    round-trip, Json parsing, base64 decoding and image decoding. Hooks are called with every
+    recorded event, e.g. to forward them to a monitoring system:
+
+        brayns.statistics.add_hook(lambda event: print(event))
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._hooks = []
+
+    def add_hook(self, hook):
+        """
+        :param hook: Callable taking an event dictionary with the endpoint, the phase, the
+        duration in seconds, and for network events the bytes sent and received and whether
+        the request failed
+        """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def _endpoint(self, endpoint):
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = _EndpointStatistics()
+        return self._endpoints[endpoint]
+
+    def record(self, endpoint, phase, duration, bytes_sent=0, bytes_received=0, error=False):
+        """
+        Records a timed phase
+        :param endpoint: Path of the endpoint, e.g. '/v1/frame-buffers'
+        :param phase: PHASE_NETWORK, PHASE_JSON, PHASE_BASE64 or PHASE_IMAGE
+        :param duration: Duration in seconds
+        :param bytes_sent: Size of the request body, for network phases
+        :param bytes_received: Size of the response body, for network phases
+        :param error: True if the request failed, for network phases
+        """
+        with self._lock:
+            statistics = self._endpoint(endpoint)
+            if phase == PHASE_NETWORK:
+                statistics.requests += 1
+                statistics.errors += int(error)
+                statistics.bytes_sent += bytes_sent
+                statistics.bytes_received += bytes_received
+            if phase not in statistics.phases:
+                statistics.phases[phase] = Histogram()
+            statistics.phases[phase].add(duration)
+            hooks = list(self._hooks)
+        if hooks:
+            event = {'endpoint': endpoint, 'phase': phase, 'duration': duration}
+            if phase == PHASE_NETWORK:
+                event.update(bytes_sent=bytes_sent, bytes_received=bytes_received, error=error)
+            for hook in hooks:
+                hook(event)
+
+    def timer(self, endpoint, phase):
+        """
+        :return: Context manager recording the duration of the enclosed code
+        """
+        return _Timer(self, endpoint, phase)
+
+    def percentile(self, endpoint, phase, fraction, min_count=1):
+        """
+        :param endpoint: Path of the endpoint
+        :param phase: PHASE_NETWORK, PHASE_JSON, PHASE_BASE64 or PHASE_IMAGE
+        :param fraction: Fraction of the samples, e.g. 0.95
+        :param min_count: Minimum number of samples for the percentile to be meaningful
+        :return: Duration in seconds, None if fewer samples were recorded
+        """
+        with self._lock:
+            statistics = self._endpoints.get(endpoint)
+            histogram = statistics.phases.get(phase) if statistics is not None else None
+            if histogram is None or histogram.count < min_count:
+                return None
+            return histogram.percentile(fraction)
+
+    def summary(self, reset=False):
+        """
+        :param reset: If True, clears the statistics in the same step
+        :return: Dictionary indexed by endpoint, with request count, bytes sent and received,
+        and latency summary per phase
+        """
+        with self._lock:
+            summary = dict((endpoint, statistics.summary())
+                           for endpoint, statistics in self._endpoints.items())
+            if reset:
+                self._endpoints = {}
+        return summary
+
+    def reset(self):
+        """
+        Clears all recorded statistics. Hooks are kept
+        """
+        with self._lock:
+            self._endpoints = {}
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+from collections import deque
+import threading
+import time
+from brayns.errors import Failure
+
+# What workers do when the consumer is slower than the stream
+STREAM_BLOCK = 'block'
+STREAM_DROP = 'drop'
+
+# Marks the end of the stream in the queue
+_END = object()
+
+
+class FrameStream(object):
+    """
+    Iterator over frames fetched and decoded by worker threads ahead of the consumer. Network,
+    parsing and decoding of the next frames overlap with the processing of the current one.
+    Up to queue_size decoded frames are kept, plus one in flight per worker. Only frames are
+    ever dropped: a worker failure always reaches the consumer.
+    """
+    def __init__(self, fetch, fps=None, max_frames=None, queue_size=4, workers=1,
+                 policy=STREAM_BLOCK):
+        """
+        :param fetch: Callable returning the next decoded frame
+        :param fps: Maximum number of fetches started per second, None for as fast as possible
+        :param max_frames: Number of frames after which the stream ends, None for no limit
+        :param queue_size: Maximum number of decoded frames waiting for the consumer
+        :param workers: Number of frames fetched concurrently
+        :param policy: STREAM_BLOCK to pause the workers when the queue is full, STREAM_DROP to
+        discard the oldest queued frame instead
+        """
+        if policy not in (STREAM_BLOCK, STREAM_DROP):
+            raise ValueError('Invalid stream policy: {}'.format(policy))
+        self._fetch = fetch
+        self._period = 1.0 / fps if fps else 0.0
+        self._max_frames = max_frames
+        self._policy = policy
+        self._queue = deque()
+        self._queue_size = max(1, queue_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._queue_changed = threading.Condition(threading.Lock())
+        self._next_start = time.time()
+        self._started = 0
+        self._yielded = 0
+        self._running = workers
+        self.dropped = 0
+        self._workers = [threading.Thread(target=self._work, name='brayns-stream-{}'.format(i))
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.daemon = True
+            worker.start()
+
+    def _claim(self):
+        """
+        Waits for the next fetch slot allowed by the frame rate
+        :return: False if the stream is over
+        """
+        with self._lock:
+            if self._policy == STREAM_BLOCK and self._max_frames is not None and \
+                    self._started >= self._max_frames:
+                return False
+            self._started += 1
+            now = time.time()
+            start = max(now, self._next_start)
+            self._next_start = start + self._period
+        if start > now:
+            self._stop.wait(start - now)
+        return not self._stop.is_set()
+
+    def _put(self, item):
+        """
+        Queues an item according to the stream policy. Failures and the end of the stream are
+        queued even if the queue is full, and never dropped
+        :param item: Frame, Failure object or _END
+        """
+        frame = item is not _END and not isinstance(item, Failure)
+        with self._queue_changed:
+            while frame and len(self._queue) >= self._queue_size and not self._stop.is_set():
+                if self._policy == STREAM_BLOCK:
+                    self._queue_changed.wait()
+                    continue
+                oldest = next((index for index, queued in enumerate(self._queue)
+                               if queued is not _END and not isinstance(queued, Failure)), None)
+                if oldest is None:
+                    break
+                del self._queue[oldest]
+                self.dropped += 1
+            if not self._stop.is_set():
+                self._queue.append(item)
+                self._queue_changed.notify_all()
+
+    def _work(self):
+        try:
+            while self._claim():
+                try:
+                    frame = self._fetch()
+                except Exception as error:  # pylint: disable=W0703
+                    self._put(Failure(error))
+                    return
+                self._put(frame)
+        finally:
+            with self._lock:
+                self._running -= 1
+                last = self._running == 0
+            if last:
+                self._put(_END)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._max_frames is not None and self._yielded >= self._max_frames:
+            self.close()
+        with self._queue_changed:
+            while not self._queue and not self._stop.is_set():
+                self._queue_changed.wait()
+            item = _END if self._stop.is_set() else self._queue.popleft()
+            self._queue_changed.notify_all()
+        if isinstance(item, Failure):
+            self.close()
+            raise item.error
+        if item is _END:
+            self.close()
+            raise StopIteration
+        self._yielded += 1
+        return item
+
+    next = __next__
+
+    def close(self):
+        """
+        Stops the workers and discards the frames that were not consumed
+        """
+        with self._queue_changed:
+            self._stop.set()
+            self._queue_changed.notify_all()
+        for worker in self._workers:
+            if worker is not threading.current_thread():
+                worker.join()
+        with self._queue_changed:
+            self._queue.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
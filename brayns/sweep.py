@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Parameter sweeps over the Cartesian product of camera, viewport and settings values:
+
+    sweep = Sweep([('settings.shader', ['basic', 'scientific_visualization']),
+                   ('settings.shadows', [0.0, 0.5, 1.0]),
+                   (('camera.origin', 'camera.look_at'), poses)])
+    sweep.run(brayns, 'sweep')
+
+Jobs are ordered as a reflected mixed-radix Gray code: consecutive jobs differ by a single
+parameter, so that every step reconfigures Brayns with one request whatever the number of
+parameters. The first parameter changes the least often, the last one at every step. Frames
+are written in the background, and every written frame is recorded in a manifest from which an
+interrupted sweep resumes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from brayns.brayns import Camera, Viewport, Settings, FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH
+from brayns.sink import FrameSink, SINK_THREADS, DEFAULT_FORMATS
+
+# Name of the file recording the frames of a sweep written so far, in its output directory
+MANIFEST = 'sweep.jsonl'
+
+_ENDPOINTS = {'camera': Camera, 'viewport': Viewport, 'settings': Settings}
+
+
+def gray_indices(job, sizes):
+    """
+    :param job: Number of the job, in [0, product of sizes)
+    :param sizes: Number of values of each parameter
+    :return: Index of the value of each parameter for the job, in reflected Gray code order:
+    consecutive jobs differ by one index, by one
+    """
+    indices = []
+    divisor = 1
+    for size in sizes:
+        divisor *= size
+    for size in sizes:
+        higher = job // divisor
+        divisor //= size
+        digit = (job // divisor) % size
+        # The digit runs backwards when the digits before it form an odd number
+        indices.append(size - 1 - digit if higher % 2 else digit)
+    return indices
+
+
+def _plain(value):
+    """
+    :return: Json-serializable copy of a value, numpy arrays and scalars become lists and
+    numbers
+    """
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _property(name):
+    """
+    :param name: Property name qualified by its endpoint, e.g. 'settings.shadows'
+    :return: (endpoint, property) tuple
+    :raise ValueError: if no such property exists
+    """
+    endpoint, _, attribute = name.partition('.')
+    wrapper = _ENDPOINTS.get(endpoint)
+    if wrapper is None or not isinstance(getattr(wrapper, attribute, None), property):
+        raise ValueError('Unknown sweep parameter: {}'.format(name))
+    return endpoint, attribute
+
+
+class Sweep(object):
+    """
+    Cartesian product of parameter values, in Gray code order
+    """
+    def __init__(self, parameters):
+        """
+        :param parameters: List of (name, values) pairs, or an ordered dictionary, from the
+        parameter changing the least often to the one changing the most often. Names are
+        qualified by their endpoint, e.g. 'camera.origin'. A tuple of names sweeps properties
+        together, e.g. a camera pose, with a tuple of values per step
+        :raise ValueError: on unknown properties or empty value lists
+        """
+        if hasattr(parameters, 'items'):
+            parameters = list(parameters.items())
+        self.parameters = []
+        for names, values in parameters:
+            names = (names,) if isinstance(names, str) else tuple(names)
+            values = list(values)
+            if not values:
+                raise ValueError('No values for sweep parameter {}'.format(', '.join(names)))
+            for name in names:
+                _property(name)
+            if len(names) > 1 and any(len(value) != len(names) for value in values):
+                raise ValueError('Every value of {} must have {} items'.format(
+                    ', '.join(names), len(names)))
+            self.parameters.append((names, values))
+        self.sizes = [len(values) for _, values in self.parameters]
+
+    def __len__(self):
+        count = 1
+        for size in self.sizes:
+            count *= size
+        return count
+
+    def job(self, number):
+        """
+        :param number: Number of the job, in sweep order
+        :return: Dictionary of the property values of the job indexed by qualified name
+        """
+        if not 0 <= number < len(self):
+            raise IndexError('Sweep job {} out of range'.format(number))
+        values = {}
+        for (names, choices), index in zip(self.parameters, gray_indices(number, self.sizes)):
+            if len(names) == 1:
+                values[names[0]] = choices[index]
+            else:
+                values.update(zip(names, choices[index]))
+        return values
+
+    def __iter__(self):
+        """
+        :return: Iterator over the property values of the jobs, in sweep order
+        """
+        return (self.job(number) for number in range(len(self)))
+
+    def digest(self):
+        """
+        :return: Hexadecimal SHA-1 identifying the parameters and values of the sweep, to
+        check that a sweep is resumed with the same grid
+        """
+        grid = [[list(names), _plain(values)] for names, values in self.parameters]
+        return hashlib.sha1(json.dumps(grid, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def apply(brayns, values):
+        """
+        Sets property values, sending only those that change, with at most one request per
+        endpoint
+        :param brayns: Brayns object
+        :param values: Dictionary of property values indexed by qualified name
+        """
+        with brayns.transaction():
+            for name, value in values.items():
+                endpoint, attribute = _property(name)
+                setattr(getattr(brayns, endpoint), attribute, value)
+
+    def _completed(self, manifest):
+        """
+        :param manifest: Path of the manifest of a previous run
+        :return: Numbers of the jobs whose frame was written
+        :raise ValueError: if the manifest belongs to a different sweep
+        """
+        completed = set()
+        with open(manifest) as lines:
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Last line cut short by an interruption
+                    continue
+                if 'sweep' in record and record['sweep'] != self.digest():
+                    raise ValueError('{} belongs to a different sweep'.format(manifest))
+                if 'job' in record:
+                    completed.add(record['job'])
+        return completed
+
+    def run(self, brayns, directory, kind=FRAME_JPEG, image_format=None,
+            pattern='sweep_{:06d}.{}', resume=True, workers=None, pool=SINK_THREADS,
+            max_pending=None):
+        """
+        Renders every job of the sweep to disk. For each job, Brayns is reconfigured and the
+        frame fetched, while previous frames are written by a FrameSink
+        :param brayns: Brayns object
+        :param directory: Output directory, created if needed
+        :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+        :param image_format: File extension selecting the format, see FrameSink
+        :param pattern: File name pattern, formatted with the job number and the extension
+        :param resume: If True, the jobs recorded in the manifest of a previous run are skipped,
+        otherwise the sweep starts over
+        :param workers: Number of encoding threads or processes, see FrameSink
+        :param pool: SINK_THREADS or SINK_PROCESSES
+        :param max_pending: Maximum number of frames waiting to be written, see FrameSink
+        :return: List of the paths of the frames written by this run
+        """
+        if kind not in (FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH):
+            raise ValueError('Invalid frame kind: {}'.format(kind))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        manifest = os.path.join(directory, MANIFEST)
+        completed = set()
+        if resume and os.path.exists(manifest):
+            completed = self._completed(manifest)
+        extension = image_format.lower() if image_format else DEFAULT_FORMATS[kind]
+        jobs = dict((os.path.join(directory, pattern.format(number, extension)), number)
+                    for number in range(len(self)) if number not in completed)
+        lock = threading.Lock()
+        paths = []
+        with open(manifest, 'a' if completed else 'w') as output:
+            if not completed:
+                output.write(json.dumps({'sweep': self.digest(), 'jobs': len(self)}) + '\n')
+                output.flush()
+
+            def written(path):
+                number = jobs[path]
+                record = {'job': number, 'path': os.path.basename(path),
+                          'values': _plain(self.job(number))}
+                with lock:
+                    output.write(json.dumps(record, sort_keys=True) + '\n')
+                    output.flush()
+
+            with FrameSink(directory, image_format, workers=workers, pool=pool,
+                           max_pending=max_pending, on_written=written) as sink:
+                for path, number in sorted(jobs.items(), key=lambda item: item[1]):
+                    self.apply(brayns, self.job(number))
+                    # Undecoded frames, decoded by the workers
+                    frame = brayns.image_jpeg_data if kind == FRAME_JPEG else \
+                        brayns.frame_buffers
+                    if frame is None:
+                        raise IOError('Failed to fetch the frame of sweep job {}'.format(number))
+                    paths.append(sink.write(frame, kind, path))
+                    if sink.failures:
+                        break
+        if sink.failures:
+            raise sink.failures[0][1]
+        return paths
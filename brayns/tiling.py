@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+"""
+Tiled rendering of images larger than what Brayns can render or transfer in one frame. The
+camera frustum is split into one sub-frustum per tile, each tile is rendered at its own size
+and the tiles are stitched row by row.
+
+Brayns cameras are symmetric, so every tile is rendered by the camera turned towards the center
+of the tile, with a field of view covering it and a small margin. Turning a pinhole camera about
+its center maps its image plane to the one of the full camera by a homography: each tile is
+warped with it onto the full image before being pasted, so that tiles line up exactly whatever
+the field of view. Color tiles are resampled bilinearly, depth tiles with the nearest pixel,
+their values being distances along the rays which the rotation does not change.
+"""
+
+from io import BytesIO
+import math
+import numpy as np
+from PIL import Image
+from brayns.brayns import FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH
+
+# Pixels rendered around every tile, so that bilinear resampling never reads outside of it
+DEFAULT_MARGIN = 2
+
+# Rows of a tile warped at once
+_WARP_ROWS = 256
+
+
+def _normalize(vector):
+    return vector / np.linalg.norm(vector)
+
+
+def _intrinsics(width, height, half_width, half_height):
+    """
+    :param width: Width of the image in pixels
+    :param height: Height of the image in pixels
+    :param half_width: Half width of the image plane at unit distance from the camera
+    :param half_height: Half height of the image plane at unit distance from the camera
+    :return: 3x3 matrix mapping camera coordinates (right, up, forward) to homogeneous pixel
+    coordinates, pixel centers being at integer positions and row 0 at the top
+    """
+    return np.array([[width / (2.0 * half_width), 0.0, width / 2.0 - 0.5],
+                     [0.0, -height / (2.0 * half_height), height / 2.0 - 0.5],
+                     [0.0, 0.0, 1.0]])
+
+
+def tile_jobs(camera, width, height, tile, margin=DEFAULT_MARGIN):
+    """
+    Computes the camera and viewport of every tile
+    :param camera: Camera object of the full image
+    :param width: Width of the full image in pixels
+    :param height: Height of the full image in pixels
+    :param tile: (width, height) of the tiles in pixels. Tiles of the last row and column are
+    cropped to the image
+    :param margin: Pixels rendered around every tile
+    :return: List of rows, each row being a list of dictionaries with the 'x', 'y' position
+    of the tile in the image, its 'size', the 'render_size' of the frame rendered for it, its
+    'camera' properties and the 'homography' mapping pixels of the full image to pixels of
+    the rendered frame
+    """
+    origin = np.asarray(camera.origin, dtype=float)
+    direction = np.asarray(camera.look_at, dtype=float) - origin
+    distance = np.linalg.norm(direction)
+    forward = direction / distance
+    right = _normalize(np.cross(forward, camera.up_vector))
+    up = np.cross(right, forward)
+    half_height = math.tan(math.radians(camera.field_of_view) / 2.0)
+    half_width = half_height * width / float(height)
+    # Size of a pixel of the full image at unit distance, the tiles are rendered with the same
+    pitch = 2.0 * half_height / height
+    basis = np.stack([right, up, forward])
+    full_inverse = np.linalg.inv(_intrinsics(width, height, half_width, half_height))
+
+    rows = []
+    for y in range(0, height, tile[1]):
+        row = []
+        tile_height = min(tile[1], height - y)
+        for x in range(0, width, tile[0]):
+            tile_width = min(tile[0], width - x)
+            # Center of the tile on the image plane at unit distance from the origin
+            center_x = ((2.0 * x + tile_width) / width - 1.0) * half_width
+            center_y = (1.0 - (2.0 * y + tile_height) / height) * half_height
+            tile_forward = _normalize(forward + center_x * right + center_y * up)
+            tile_up = _normalize(np.cross(np.cross(tile_forward, up), tile_forward))
+            tile_right = np.cross(tile_forward, tile_up)
+            # Full camera coordinates to tile camera coordinates
+            rotation = np.stack([tile_right, tile_up, tile_forward]).dot(basis.T)
+            # The outer edges of the tile project to a quadrilateral on the tile image plane,
+            # the rendered frame is made large enough to hold it
+            corners = np.array([[u, v, 1.0] for u in (x - 0.5, x + tile_width - 0.5)
+                                for v in (y - 0.5, y + tile_height - 0.5)]).T
+            projected = rotation.dot(full_inverse.dot(corners))
+            extent_x = np.max(np.abs(projected[0] / projected[2]))
+            extent_y = np.max(np.abs(projected[1] / projected[2]))
+            render_size = [2 * (int(math.ceil(extent_x / pitch - 1e-9)) + margin),
+                           2 * (int(math.ceil(extent_y / pitch - 1e-9)) + margin)]
+            render_half_width = render_size[0] * pitch / 2.0
+            render_half_height = render_size[1] * pitch / 2.0
+            homography = _intrinsics(render_size[0], render_size[1], render_half_width,
+                                     render_half_height).dot(rotation).dot(full_inverse)
+            row.append({
+                'x': x, 'y': y, 'size': [tile_width, tile_height],
+                'render_size': render_size,
+                'camera': {
+                    'look_at': (origin + tile_forward * distance).tolist(),
+                    'up_vector': tile_up.tolist(),
+                    'field_of_view': 2.0 * math.degrees(math.atan(render_half_height))
+                },
+                'homography': homography.tolist()
+            })
+        rows.append(row)
+    return rows
+
+
+def warp_tile(array, job, kind=FRAME_COLOR):
+    """
+    Resamples a rendered tile onto the pixels of the full image it covers
+    :param array: Frame rendered for the tile, of the job's render size
+    :param job: Tile description returned by tile_jobs
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :return: Numpy array of the job's size, with the type of array
+    """
+    width, height = job['size']
+    homography = np.asarray(job['homography'])
+    last_x = array.shape[1] - 1
+    last_y = array.shape[0] - 1
+    out = np.empty((height, width) + array.shape[2:], dtype=array.dtype)
+    columns = np.arange(job['x'], job['x'] + width, dtype=np.float64)
+    for start in range(0, height, _WARP_ROWS):
+        rows = np.arange(job['y'] + start, job['y'] + min(start + _WARP_ROWS, height),
+                         dtype=np.float64)
+        u, v = np.meshgrid(columns, rows)
+        w = homography[2, 0] * u + homography[2, 1] * v + homography[2, 2]
+        source_x = (homography[0, 0] * u + homography[0, 1] * v + homography[0, 2]) / w
+        source_y = (homography[1, 0] * u + homography[1, 1] * v + homography[1, 2]) / w
+        target = out[start:start + len(rows)]
+        if kind == FRAME_DEPTH:
+            target[...] = array[np.clip(np.rint(source_y).astype(np.intp), 0, last_y),
+                                np.clip(np.rint(source_x).astype(np.intp), 0, last_x)]
+            continue
+        left = np.clip(np.floor(source_x).astype(np.intp), 0, last_x - 1)
+        top = np.clip(np.floor(source_y).astype(np.intp), 0, last_y - 1)
+        weight_x = np.clip(source_x - left, 0.0, 1.0).astype(np.float32)
+        weight_y = np.clip(source_y - top, 0.0, 1.0).astype(np.float32)
+        if array.ndim == 3:
+            weight_x = weight_x[..., None]
+            weight_y = weight_y[..., None]
+        upper = array[top, left] * (1 - weight_x) + array[top, left + 1] * weight_x
+        lower = array[top + 1, left] * (1 - weight_x) + array[top + 1, left + 1] * weight_x
+        value = upper * (1 - weight_y) + lower * weight_y
+        if array.dtype.kind in 'ui':
+            value = np.rint(value)
+        target[...] = value
+    return out
+
+
+def _fetch_array(brayns, kind):
+    """
+    :return: Frame as a numpy array, whatever the output mode of brayns
+    """
+    if kind == FRAME_JPEG:
+        data = brayns.image_jpeg_data
+        return None if data is None else np.asarray(Image.open(BytesIO(data)))
+    snapshot = brayns.frame_buffers
+    if snapshot is None:
+        return None
+    return snapshot.color_array() if kind == FRAME_COLOR else snapshot.depth_array()
+
+
+def render_tile(brayns, job, kind=FRAME_COLOR):
+    """
+    Renders a single tile
+    :param brayns: Brayns object
+    :param job: Tile description returned by tile_jobs
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :return: Numpy array of the tile, warped onto the pixels of the full image it covers
+    """
+    with brayns.transaction():
+        brayns.viewport.size = job['render_size']
+        if kind == FRAME_JPEG:
+            brayns.settings.jpeg_size = job['render_size']
+        for name, value in job['camera'].items():
+            setattr(brayns.camera, name, value)
+    array = _fetch_array(brayns, kind)
+    if array is None:
+        raise IOError('Failed to fetch tile at {}, {} from Brayns'.format(job['x'], job['y']))
+    if list(array.shape[1::-1]) != job['render_size']:
+        raise ValueError('Brayns returned a {}x{} tile instead of {}x{}'.format(
+            array.shape[1], array.shape[0], job['render_size'][0], job['render_size'][1]))
+    return warp_tile(array, job, kind)
+
+
+def render_tiled(brayns, width, height, tile=(512, 512), kind=FRAME_COLOR, pool=None, out=None,
+                 path=None):
+    """
+    Renders an image of any size as tiles, and stitches them one row at a time. Only the tiles
+    of the row being stitched are kept in memory, in addition to the output
+    :param brayns: Brayns object whose camera defines the full image
+    :param width: Width of the image in pixels
+    :param height: Height of the image in pixels
+    :param tile: (width, height) of the tiles in pixels. The frames rendered for them are
+    slightly larger, to cover the tile once the camera is turned towards it, and the margin
+    :param kind: FRAME_JPEG, FRAME_COLOR or FRAME_DEPTH
+    :param pool: Optional BraynsPool serving the same scene, to render tiles in parallel
+    across its servers
+    :param out: Optional preallocated array receiving the image
+    :param path: Optional path of a .npy file receiving the image through a memory map, so that
+    the image itself does not need to fit in memory
+    :return: Numpy array, or memory map if path is given, of shape (height, width) for depth
+    and (height, width, channels) otherwise
+    """
+    if kind not in (FRAME_JPEG, FRAME_COLOR, FRAME_DEPTH):
+        raise ValueError('Invalid frame kind: {}'.format(kind))
+    rows = tile_jobs(brayns.camera, width, height, tile)
+    columns = len(rows[0])
+    jobs = [job for row in rows for job in row]
+    instances = pool.instances if pool is not None else [brayns]
+    states = [instance.snapshot() for instance in instances]
+    try:
+        if pool is not None:
+            # Tiles only differ by their viewport and camera orientation, every server renders
+            # with the full camera and settings of brayns
+            state = brayns.snapshot()
+            pool.apply(lambda instance: instance.restore(state))
+            tiles = pool.imap(lambda instance, job: render_tile(instance, job, kind), jobs,
+                              window=columns)
+        else:
+            tiles = (render_tile(brayns, job, kind) for job in jobs)
+        for index, array in enumerate(tiles):
+            if out is None:
+                shape = (height, width) + array.shape[2:]
+                if path is not None:
+                    out = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype,
+                                                    shape=shape)
+                else:
+                    out = np.empty(shape, dtype=array.dtype)
+            job = jobs[index]
+            out[job['y']:job['y'] + array.shape[0], job['x']:job['x'] + array.shape[1]] = array
+            if path is not None and index % columns == columns - 1:
+                out.flush()
+    finally:
+        for instance, state in zip(instances, states):
+            instance.restore(state)
+    return out
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111,R0902,R0903
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+import threading
+import time
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from brayns.errors import BraynsConnectionError, BraynsTimeoutError, BraynsHTTPError
+from brayns.retry import RetryPolicy, Deadline
+from brayns.stats import Statistics, PHASE_NETWORK
+
+# Default number of keep-alive connections kept open per Brayns host
+DEFAULT_POOL_SIZE = 10
+
+# Content encodings the HTTP client decodes, e.g. gzip, deflate, and br or zstd when the
+# matching decoders are installed
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+# A GET is duplicated to a replica when it takes longer than this percentile of the latency
+# of its endpoint
+DEFAULT_HEDGE_PERCENTILE = 0.95
+
+# Number of requests an endpoint must have served before its latency percentile is trusted
+_HEDGE_MIN_SAMPLES = 20
+
+
+class Transport(object):
+    """
+    Keep-alive HTTP transport shared by all the objects talking to one Brayns instance.
+
+    Connections are kept in a pool owned by a single HTTP adapter. Each thread gets its own
+    session mounted on that adapter, so session state is never shared between threads while
+    the underlying connections are. Requests sent through the transport are accounted for in
+    its statistics.
+
+    Failed GETs are retried according to the retry policy, and every call is bounded by its
+    deadline. When replicas serving the same scene are given, updates are sent to all of them,
+    and a GET slower than usual is duplicated to a replica, the first answer being used.
+    """
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, pool_block=False, timeout=None,
+                 compression=True, retry=None, deadline=None, replicas=None,
+                 hedge_percentile=DEFAULT_HEDGE_PERCENTILE):
+        """
+        :param pool_size: Maximum number of connections kept alive in the pool, per host
+        :param pool_block: If True, wait for a free connection when the pool is exhausted
+        instead of opening a throw-away one
+        :param timeout: Default timeout in seconds of every request, either a number or a
+        (connect, read) tuple. None waits forever
+        :param compression: If True, accept every content encoding in ACCEPT_ENCODING,
+        otherwise ask for uncompressed responses
+        :param retry: RetryPolicy object, defaults to RetryPolicy()
+        :param deadline: Default time budget in seconds of every call, retries included. None
+        for no limit
+        :param replicas: Urls of Brayns instances serving the same scene, used for hedged
+        requests
+        :param hedge_percentile: Latency percentile after which a GET is duplicated to a
+        replica, None to never hedge
+        """
+        self.timeout = timeout
+        self.accept_encoding = ACCEPT_ENCODING if compression else 'identity'
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.default_deadline = deadline
+        self.replicas = [replica.rstrip('/') for replica in replicas or []]
+        self.hedge_percentile = hedge_percentile
+        self.statistics = Statistics()
+        self._adapter = HTTPAdapter(pool_connections=1 + len(self.replicas),
+                                    pool_maxsize=pool_size, pool_block=pool_block)
+        self._local = threading.local()
+        self._deadlines = threading.local()
+        # Sessions are owned by their thread, they go away with it
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._stale = set()
+        self._next_replica = 0
+        self._executor = ThreadPoolExecutor(pool_size) if self.replicas else None
+
+    def _session(self):
+        """
+        :return: Session of the calling thread, created on first use
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['Accept-Encoding'] = self.accept_encoding
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.add(session)
+        return session
+
+    @contextmanager
+    def deadline(self, seconds):
+        """
+        Bounds every call made by the calling thread inside the block
+        :param seconds: Time budget of each call, None for no limit
+        """
+        previous = getattr(self._deadlines, 'seconds', self)
+        self._deadlines.seconds = seconds
+        try:
+            yield
+        finally:
+            if previous is self:
+                del self._deadlines.seconds
+            else:
+                self._deadlines.seconds = previous
+
+    def _deadline(self):
+        """
+        :return: Deadline of a call starting now
+        """
+        return Deadline(getattr(self._deadlines, 'seconds', self.default_deadline))
+
+    def _attempt(self, method, url, endpoint, data, headers, deadline):
+        """
+        Sends a single request and reads the whole response, so that the connection goes back
+        to the pool
+        :return: requests.Response object
+        :raise BraynsError: if the request failed or Brayns answered with an error status
+        """
+        timeout = deadline.timeout(self.timeout, url)
+        start = time.time()
+        try:
+            response = self._session().request(method, url, data=data, headers=headers,
+                                               timeout=timeout)
+            content = response.content
+            response.close()
+        except requests.exceptions.Timeout as error:
+            self._record(endpoint, start, data, 0, True)
+            raise BraynsTimeoutError(url, error)
+        except requests.exceptions.ConnectionError as error:
+            self._record(endpoint, start, data, 0, True)
+            if deadline.remaining() is not None and deadline.remaining() <= 0:
+                raise BraynsTimeoutError(url, error)
+            raise BraynsConnectionError(url, error)
+        length = response.headers.get('Content-Length')
+        self._record(endpoint, start, data, int(length) if length else len(content),
+                     response.status_code >= 400)
+        if response.status_code >= 400:
+            raise BraynsHTTPError(url, response.status_code)
+        return response
+
+    def _record(self, endpoint, start, data, received, error):
+        self.statistics.record(endpoint, PHASE_NETWORK, time.time() - start,
+                               len(data) if data else 0, received, error)
+
+    def _replica(self):
+        """
+        :return: Url of the next replica in sync with the primary instance, None if none is
+        """
+        with self._lock:
+            replicas = [replica for replica in self.replicas if replica not in self._stale]
+            if not replicas:
+                return None
+            self._next_replica += 1
+            return replicas[self._next_replica % len(replicas)]
+
+    def _hedged(self, method, url, endpoint, data, headers, deadline):
+        """
+        Sends a GET, and a duplicate to a replica if the first one takes longer than the
+        hedging percentile of the endpoint
+        :return: First successful response
+        """
+        replica = self._replica() if self.hedge_percentile is not None else None
+        delay = None
+        if replica is not None:
+            delay = self.statistics.percentile(endpoint, PHASE_NETWORK, self.hedge_percentile,
+                                               _HEDGE_MIN_SAMPLES)
+        if delay is None:
+            return self._attempt(method, url, endpoint, data, headers, deadline)
+        remaining = deadline.remaining()
+        first = self._executor.submit(self._attempt, method, url, endpoint, data, headers,
+                                      deadline)
+        done, _ = wait([first], timeout=delay if remaining is None else min(delay, remaining))
+        if done:
+            return first.result()
+        second = self._executor.submit(self._attempt, method, replica + endpoint, endpoint,
+                                       data, headers, deadline)
+        pending = set([first, second])
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _replicate(self, method, endpoint, data, headers, deadline):
+        """
+        Sends an update to the replicas. Replicas that fail to apply it are no longer in sync
+        and are not used for hedging anymore
+        :return: Futures of the requests
+        """
+        with self._lock:
+            replicas = [replica for replica in self.replicas if replica not in self._stale]
+        return [(replica, self._executor.submit(self._attempt, method, replica + endpoint,
+                                                endpoint, data, headers, deadline))
+                for replica in replicas]
+
+    def request(self, method, url, endpoint, data=None, headers=None):
+        """
+        Sends a request to Brayns, retrying failed GETs according to the retry policy, within
+        the deadline of the call
+        :param method: 'GET' or 'PUT'
+        :param url: Url of the resource
+        :param endpoint: Path of the endpoint, used for statistics and replica urls
+        :param data: Body of the request
+        :param headers: Optional additional headers
+        :return: requests.Response object, whose content has been read
+        :raise BraynsError: once the retries are exhausted, or if the deadline is exceeded
+        """
+        deadline = self._deadline()
+        replicated = []
+        if method != 'GET' and self.replicas:
+            replicated = self._replicate(method, endpoint, data, headers, deadline)
+        attempt = 0
+        try:
+            while True:
+                try:
+                    if method == 'GET' and self.replicas:
+                        return self._hedged(method, url, endpoint, data, headers, deadline)
+                    return self._attempt(method, url, endpoint, data, headers, deadline)
+                except (BraynsConnectionError, BraynsTimeoutError, BraynsHTTPError) as error:
+                    if attempt >= self.retry.retries or not self.retry.retryable(method, error):
+                        raise
+                    delay = self.retry.delay(attempt)
+                    remaining = deadline.remaining()
+                    if remaining is not None and remaining <= delay:
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+        finally:
+            # Replicas are out of sync once they failed an update, whether the primary
+            # instance applied it or not
+            for replica, future in replicated:
+                if future.exception() is not None:
+                    with self._lock:
+                        self._stale.add(replica)
+
+    def close(self):
+        """
+        Closes all pooled connections
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+        with self._lock:
+            sessions, self._sessions = list(self._sessions), weakref.WeakSet()
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+        self._local = threading.local()
@@ -22,6 +22,7 @@
 # All rights reserved. Do not distribute without further notice.
 
 from brayns.brayns import *
+from brayns.sink import FrameSink
 
 # --------------------------------------------------
 # Initialize brayns with Brayns' url
@@ -39,48 +40,53 @@ viewport.size = [512, 256]
 # up vector, aperture and focal length
 # --------------------------------------------------
 camera = brayns.camera
-camera.origin = [0.5, 0.5, 2.0]
-camera.look_at = [0.5, 0.5, 0.5]
-camera.up_vector = [0, 1, 0]
+with camera.batch():
+    camera.origin = [0.5, 0.5, 2.0]
+    camera.look_at = [0.5, 0.5, 0.5]
+    camera.up_vector = [0, 1, 0]
 
 # --------------------------------------------------
-# Rendering settings
+# Rendering settings, sent to Brayns in a single
+# request when the batch block exits
 # --------------------------------------------------
 settings = brayns.settings
+with settings.batch():
+    # Set background color
+    settings.background_color = [0.1, 0.1, 0.5]
+    # Set number of samples per pixel
+    settings.samples_per_pixel = 1
+    # Activate basic shader
+    settings.shader = BRAYNS_SHADER_SCIENTIFIC_VISUALIZATION
+    # set ambient occlusion strength
+    settings.ambient_occlusion = 1
 
-# Set background color
-settings.background_color = [0.1, 0.1, 0.5]
-# set source image size
-settings.window_size = [512, 512]
-# Set number of samples per pixel
-settings.samples_per_pixel = 1
-# Activate basic shader
-settings.shader = BRAYNS_SHADER_SCIENTIFIC_VISUALIZATION
-# set ambient occlusion strength
-settings.ambient_occlusion = 1
+    # Activate shadows and make them soft
+    settings.shadows = 0.5
+    settings.soft_shadows = 0.02
 
-# Activate shadows and make them soft
-settings.shadows = 0.5
-settings.soft_shadows = 0.02
-
-# Epsilon
-settings.epsilon = 0.001
+    # Epsilon
+    settings.epsilon = 0.001
 
 # --------------------------------------------------
-# Get JPEG image back and save it to example.jpg
+# Get JPEG image back and save it to example.jpg.
+# Frames are written in background threads, the
+# JPEG image as sent by Brayns, without re-encoding
 # --------------------------------------------------
-settings.jpeg_size = [512, 512]
-settings.jpeg_compression = 100
-image = brayns.image_jpeg
-if image is not None:
-    image.save('example.jpg')
+with settings.batch():
+    settings.jpeg_size = [512, 512]
+    settings.jpeg_compression = 100
+with FrameSink() as sink:
+    image = brayns.image_jpeg_data
+    if image is not None:
+        sink.write(image, FRAME_JPEG, 'example.jpg')
 
-# --------------------------------------------------
-# Get frame buffers (Color and Depth)
-# --------------------------------------------------
-image = brayns.color_frame_buffer
-if image is not None:
-    image.save('fb_color.tif')
-image = brayns.depth_frame_buffer
-if image is not None:
-    image.save('fb_depth.tif')
+    # --------------------------------------------------
+    # Get frame buffers (Color and Depth) of the same
+    # frame in a single request
+    # --------------------------------------------------
+    frame_buffers = brayns.frame_buffers
+    if frame_buffers is not None:
+        sink.write(frame_buffers, FRAME_COLOR, 'fb_color.tif')
+        sink.write(frame_buffers, FRAME_DEPTH, 'fb_depth.tif')
+for path, error in sink.failures:
+    print('ERROR: Failed to write {}: {}'.format(path, error))
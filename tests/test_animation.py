@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import math
+import os
+import numpy as np
+import pytest
+from brayns.animation import interpolate, render, INTERPOLATION_CATMULL_ROM, \
+    INTERPOLATION_LINEAR, ORIENTATION_LOOK_AT, ORIENTATION_SLERP
+from brayns.brayns import Brayns
+
+
+def _keyframes(origins, look_ats):
+    return [{'origin': origin, 'look_at': look_at} for origin, look_at in zip(origins, look_ats)]
+
+
+@pytest.mark.parametrize('method', [INTERPOLATION_LINEAR, INTERPOLATION_CATMULL_ROM])
+@pytest.mark.parametrize('orientation', [ORIENTATION_SLERP, ORIENTATION_LOOK_AT])
+def test_frames_pass_through_the_keyframes(method, orientation):
+    keyframes = _keyframes([[0, 0, 0], [1, 2, 0], [3, 1, 1]], [[0, 0, -1], [1, 1, -2], [4, 1, 0]])
+    frames = interpolate(keyframes, 9, method=method, orientation=orientation)
+    for number, keyframe in zip([0, 4, 8], keyframes):
+        assert np.allclose(frames['origin'][number], keyframe['origin'])
+        assert np.allclose(frames['look_at'][number], keyframe['look_at'])
+
+
+def test_catmull_rom_reproduces_quadratic_motion():
+    # Finite differences are exact tangents for a parabola, hence the spline matches it
+    # between the inner keyframes
+    times = np.arange(5, dtype=float)
+    keyframes = _keyframes([[t * t, t, 0] for t in times], [[0, 0, -1]] * 5)
+    frames = interpolate(keyframes, 17, method=INTERPOLATION_CATMULL_ROM,
+                         orientation=ORIENTATION_LOOK_AT)
+    samples = np.linspace(0, 4, 17)
+    inner = (samples >= 1) & (samples <= 3)
+    assert np.allclose(frames['origin'][inner, 0], samples[inner] ** 2)
+    assert np.allclose(frames['origin'][:, 1], samples)
+
+
+def test_catmull_rom_supports_uneven_keyframe_times():
+    times = [0.0, 1.0, 4.0]
+    keyframes = _keyframes([[t, 0, 0] for t in times], [[0, 0, -1]] * 3)
+    frames = interpolate(keyframes, 9, times=times, method=INTERPOLATION_CATMULL_ROM)
+    assert np.allclose(frames['origin'][:, 0], np.linspace(0, 4, 9))
+
+
+def test_slerp_turns_at_constant_angular_speed():
+    keyframes = _keyframes([[0, 0, 0]] * 2, [[0, 0, -1], [-3, 0, 0]])
+    frames = interpolate(keyframes, 7, orientation=ORIENTATION_SLERP)
+    direction = frames['look_at'] - frames['origin']
+    distance = np.linalg.norm(direction, axis=1)
+    angles = np.arctan2(-direction[:, 0], -direction[:, 2])
+    assert np.allclose(angles, np.linspace(0, math.pi / 2, 7))
+    assert np.allclose(distance, np.linspace(1, 3, 7))
+    assert np.allclose(frames['up_vector'], [0, 1, 0])
+
+
+def test_slerp_takes_the_shortest_arc():
+    keyframes = _keyframes([[0, 0, 0]] * 2, [[1, 0, -1], [-1, 0, -1]])
+    frames = interpolate(keyframes, 3)
+    middle = frames['look_at'][1] - frames['origin'][1]
+    assert np.allclose(middle / np.linalg.norm(middle), [0, 0, -1])
+
+
+def test_invalid_keyframes_are_refused():
+    with pytest.raises(ValueError):
+        interpolate(_keyframes([[0, 0, 0]], [[0, 0, -1]]), 10)
+    with pytest.raises(ValueError):
+        interpolate(_keyframes([[0, 0, 0]] * 2, [[0, 0, -1]] * 2), 10, times=[1, 0])
+
+
+def test_render_writes_a_frame_per_camera(mock, tmpdir):
+    brayns = Brayns(mock.url)
+    keyframes = _keyframes([[0, 0, 0], [1, 0, 0]], [[0, 0, -1], [1, 0, -1]])
+    paths = render(brayns, interpolate(keyframes, 3), str(tmpdir), processes=1)
+    assert [os.path.basename(path) for path in paths] == \
+        ['frame_000000.jpg', 'frame_000001.jpg', 'frame_000002.jpg']
+    assert all(os.path.getsize(path) > 0 for path in paths)
+    assert mock.state('/v1/camera')['origin'] == [1, 0, 0]
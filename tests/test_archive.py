@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+from brayns.archive import ARCHIVE_APPEND, FrameArchive, capture
+from brayns.brayns import Brayns, OUTPUT_ARRAY
+
+
+def test_archive_holds_the_captured_frames(mock, tmpdir):
+    brayns = Brayns(mock.url, output=OUTPUT_ARRAY)
+    directory = str(tmpdir.join('archive'))
+    with FrameArchive(directory, ARCHIVE_APPEND) as archive:
+        capture(brayns, archive, 2)
+    archive = FrameArchive(directory)
+    assert len(archive) == 2
+    assert archive.depth(1).shape == (48, 64)
+    assert list(archive.index['origin'][0]) == [0, 0, -1]
+
+
+def test_successive_captures_keep_numbering_frames(mock, tmpdir):
+    brayns = Brayns(mock.url, output=OUTPUT_ARRAY)
+    directory = str(tmpdir.join('archive'))
+    with FrameArchive(directory, ARCHIVE_APPEND) as archive:
+        capture(brayns, archive, 3)
+    with FrameArchive(directory, ARCHIVE_APPEND) as archive:
+        capture(brayns, archive, 2)
+        capture(brayns, archive, 1, start=10)
+    archive = FrameArchive(directory)
+    assert list(archive.index['number']) == [0, 1, 2, 3, 4, 10]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import asyncio
+import pytest
+from brayns.async_brayns import AsyncBrayns
+from brayns.brayns import Brayns
+from brayns.errors import BraynsHTTPError
+from brayns.retry import NO_RETRY
+
+
+def _run(mock, test, **kwargs):
+    """
+    Runs a coroutine function with an AsyncBrayns connected to the mock server
+    """
+    async def main():
+        async with AsyncBrayns(mock.url, **kwargs) as brayns:
+            return await test(brayns)
+    return asyncio.run(main())
+
+
+def _puts(mock, path):
+    return mock.requests.get('PUT ' + path, 0)
+
+
+def test_update_sends_one_request(mock):
+    async def test(brayns):
+        await brayns.camera.update(origin=[1, 2, 3], field_of_view=30.0)
+    before = _puts(mock, '/v1/camera')
+    _run(mock, test)
+    assert _puts(mock, '/v1/camera') == before + 1
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+    assert mock.state('/v1/camera')['field_of_view'] == 30.0
+
+
+def test_assignments_are_sent_by_commit(mock):
+    async def test(brayns):
+        brayns.camera.origin = [1, 2, 3]
+        brayns.settings.shadows = 0.5
+        assert mock.state('/v1/camera')['origin'] == [0, 0, -1]
+        await brayns.commit()
+    _run(mock, test)
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+    assert mock.state('/v1/settings')['shadows'] == 0.5
+
+
+def test_frames_are_fetched_after_the_pending_changes_are_sent(mock):
+    async def test(brayns):
+        brayns.camera.origin = [1, 2, 3]
+        await brayns.image_jpeg
+        assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+        assert not brayns.camera.pending
+    _run(mock, test)
+
+
+def test_async_batch_sends_one_request(mock):
+    async def test(brayns):
+        async with brayns.camera.batch():
+            brayns.camera.origin = [1, 2, 3]
+            brayns.camera.look_at = [0, 1, 0]
+    before = _puts(mock, '/v1/camera')
+    _run(mock, test)
+    assert _puts(mock, '/v1/camera') == before + 1
+    assert mock.state('/v1/camera')['look_at'] == [0, 1, 0]
+
+
+def test_async_batch_discards_changes_on_exception(mock):
+    async def test(brayns):
+        with pytest.raises(RuntimeError):
+            async with brayns.camera.batch():
+                brayns.camera.origin = [1, 2, 3]
+                raise RuntimeError()
+        assert brayns.camera.origin == [0, 0, -1]
+        assert not brayns.camera.pending
+    _run(mock, test)
+
+
+def test_synchronous_updates_are_refused(mock):
+    async def test(brayns):
+        with pytest.raises(TypeError):
+            with brayns.camera.batch():
+                pass
+        with pytest.raises(NotImplementedError):
+            brayns.camera.coalesce(None)
+        brayns.camera.origin = [1, 2, 3]
+        await brayns.camera.flush()
+    _run(mock, test)
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+
+
+def test_closing_with_pending_changes_warns(mock):
+    async def test(brayns):
+        brayns.camera.origin = [1, 2, 3]
+    with pytest.warns(RuntimeWarning, match='/v1/camera'):
+        _run(mock, test)
+
+
+def test_failed_commit_is_sent_again(mock):
+    async def test(brayns):
+        brayns.camera.origin = [1, 2, 3]
+        mock.fail(1, 500)
+        with pytest.raises(BraynsHTTPError):
+            await brayns.commit()
+        assert brayns.camera.pending
+        await brayns.commit()
+    _run(mock, test, retry=NO_RETRY)
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+
+
+def test_value_modified_in_place_is_a_change(mock):
+    async def test(brayns):
+        origin = brayns.camera.origin
+        origin[2] = 5
+        await brayns.camera.update(origin=origin)
+    _run(mock, test)
+    assert mock.state('/v1/camera')['origin'] == [0, 0, 5]
+
+
+@pytest.mark.parametrize('binary', [True, False])
+def test_frames_match_the_synchronous_client(mock, binary):
+    async def test(brayns):
+        return await brayns.image_jpeg_data, await brayns.frame_buffers
+    data, snapshot = _run(mock, test, binary=binary)
+    brayns = Brayns(mock.url)
+    assert data == brayns.image_jpeg_data
+    expected = brayns.frame_buffers
+    assert snapshot.color.tobytes() == expected.color.tobytes()
+    assert snapshot.depth.tobytes() == expected.depth.tobytes()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import threading
+import time
+import pytest
+from brayns.brayns import Brayns
+from brayns.errors import BraynsHTTPError
+from brayns.retry import NO_RETRY
+
+
+def _puts(mock, path):
+    return mock.requests.get('PUT ' + path, 0)
+
+
+def test_setter_sends_the_change(mock):
+    brayns = Brayns(mock.url)
+    brayns.camera.origin = [1, 2, 3]
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+
+
+def test_unchanged_value_is_not_sent_again(mock):
+    brayns = Brayns(mock.url)
+    brayns.camera.origin = [1, 2, 3]
+    before = _puts(mock, '/v1/camera')
+    brayns.camera.origin = [1, 2, 3]
+    assert _puts(mock, '/v1/camera') == before
+
+
+def test_value_modified_in_place_and_assigned_back_is_sent(mock):
+    brayns = Brayns(mock.url)
+    origin = brayns.camera.origin
+    origin[2] = 5
+    assert brayns.camera.origin == [0, 0, -1]
+    brayns.camera.origin = origin
+    assert mock.state('/v1/camera')['origin'] == [0, 0, 5]
+    assert brayns.snapshot().values('/v1/camera')['origin'] == [0, 0, 5]
+
+
+def test_batch_sends_one_request(mock):
+    brayns = Brayns(mock.url)
+    before = _puts(mock, '/v1/camera')
+    with brayns.camera.batch():
+        brayns.camera.origin = [1, 2, 3]
+        brayns.camera.look_at = [0, 1, 0]
+        brayns.camera.field_of_view = 30.0
+    assert _puts(mock, '/v1/camera') == before + 1
+    state = mock.state('/v1/camera')
+    assert state['origin'] == [1, 2, 3]
+    assert state['look_at'] == [0, 1, 0]
+    assert state['field_of_view'] == 30.0
+
+
+def test_transaction_sends_one_request_per_modified_endpoint(mock):
+    brayns = Brayns(mock.url)
+    before = dict(mock.requests)
+    with brayns.transaction():
+        brayns.camera.origin = [1, 2, 3]
+        brayns.camera.field_of_view = 30.0
+        brayns.settings.shadows = 0.5
+        brayns.settings.samples_per_pixel = 4
+    assert _puts(mock, '/v1/camera') == before.get('PUT /v1/camera', 0) + 1
+    assert _puts(mock, '/v1/settings') == before.get('PUT /v1/settings', 0) + 1
+    assert _puts(mock, '/v1/viewport') == before.get('PUT /v1/viewport', 0)
+
+
+def test_batch_discards_changes_on_exception(mock):
+    brayns = Brayns(mock.url)
+    before = _puts(mock, '/v1/camera')
+    with pytest.raises(RuntimeError):
+        with brayns.camera.batch():
+            brayns.camera.origin = [1, 2, 3]
+            raise RuntimeError()
+    assert _puts(mock, '/v1/camera') == before
+    assert brayns.camera.origin == [0, 0, -1]
+    assert mock.state('/v1/camera')['origin'] == [0, 0, -1]
+
+
+def test_batch_of_another_thread_neither_holds_back_nor_discards_changes(mock):
+    brayns = Brayns(mock.url)
+    opened = threading.Event()
+
+    def abort():
+        with pytest.raises(RuntimeError):
+            with brayns.camera.batch():
+                brayns.camera.origin = [1, 2, 3]
+                opened.set()
+                time.sleep(0.2)
+                raise RuntimeError()
+
+    batch = threading.Thread(target=abort)
+    batch.start()
+    opened.wait()
+    brayns.camera.field_of_view = 30.0
+    batch.join()
+    state = mock.state('/v1/camera')
+    assert state['field_of_view'] == 30.0
+    assert state['origin'] == [0, 0, -1]
+
+
+def test_failed_changes_are_sent_again(mock):
+    brayns = Brayns(mock.url, retry=NO_RETRY)
+    mock.fail(1, 500)
+    with pytest.raises(BraynsHTTPError):
+        brayns.camera.origin = [1, 2, 3]
+    brayns.camera.field_of_view = 30.0
+    state = mock.state('/v1/camera')
+    assert state['origin'] == [1, 2, 3]
+    assert state['field_of_view'] == 30.0
+
+
+def test_failed_value_assigned_again_is_sent(mock):
+    brayns = Brayns(mock.url, retry=NO_RETRY)
+    mock.fail(1, 500)
+    with pytest.raises(BraynsHTTPError):
+        brayns.camera.origin = [1, 2, 3]
+    brayns.camera.origin = [1, 2, 3]
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+
+
+def test_failed_batch_is_sent_again(mock):
+    brayns = Brayns(mock.url, retry=NO_RETRY)
+    mock.fail(1, 500)
+    with pytest.raises(BraynsHTTPError):
+        with brayns.camera.batch():
+            brayns.camera.origin = [1, 2, 3]
+            brayns.camera.look_at = [0, 1, 0]
+    brayns.camera.flush()
+    state = mock.state('/v1/camera')
+    assert state['origin'] == [1, 2, 3]
+    assert state['look_at'] == [0, 1, 0]
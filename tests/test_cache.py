@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import requests
+from benchmarks.mock_server import MockBrayns
+from brayns.brayns import Brayns
+from brayns.cache import RenderCache
+
+
+class _RefiningMock(MockBrayns):
+    """
+    Mock server rendering a new frame on every request, as Brayns does while it accumulates
+    samples
+    """
+    def get(self, path, etag=None, accept=None, accept_encoding=None):
+        with self._lock:
+            self._frames.clear()
+            self._images.clear()
+        return super(_RefiningMock, self).get(path, etag, accept, accept_encoding)
+
+
+def test_cache_serves_frames_already_rendered(mock, tmpdir):
+    brayns = Brayns(mock.url, cache=RenderCache(str(tmpdir), scene='test'))
+    first = brayns.image_jpeg_data
+    fetches = mock.requests['GET /v1/image-jpeg']
+    assert brayns.image_jpeg_data == first
+    assert mock.requests['GET /v1/image-jpeg'] == fetches
+    assert (brayns.cache.hits, brayns.cache.misses) == (1, 1)
+
+
+def test_cache_is_keyed_by_scene(mock, tmpdir):
+    Brayns(mock.url, cache=RenderCache(str(tmpdir), scene='first')).image_jpeg_data
+    brayns = Brayns(mock.url, cache=RenderCache(str(tmpdir), scene='second'))
+    brayns.image_jpeg_data
+    assert brayns.cache.hits == 0
+    assert len(brayns.cache) == 2
+
+
+def test_cache_miss_stores_the_frame_under_the_state_of_brayns(mock, tmpdir):
+    brayns = Brayns(mock.url, cache=RenderCache(str(tmpdir), scene='test'))
+    stale = brayns.snapshot()
+    # Another client moves the camera: the state cached by brayns is now stale
+    requests.put(mock.url + '/v1/camera', json={'origin': [1, 2, 3]})
+    brayns.frame_buffers
+    assert brayns.camera.origin == [1, 2, 3]
+    cache = brayns.cache
+    assert cache.get_frame_buffers(cache.key(brayns.snapshot(), 'buffers')) is not None
+    assert cache.get_frame_buffers(cache.key(stale, 'buffers')) is None
+
+
+def test_converged_only_cache_stores_converged_captures(tmpdir):
+    with _RefiningMock(frame_size=[64, 48]) as server:
+        brayns = Brayns(server.url,
+                        cache=RenderCache(str(tmpdir), scene='test', converged_only=True))
+        brayns.image_jpeg_data
+        assert len(brayns.cache) == 0
+        capture = brayns.capture_converged(tolerance=1.0, cache=True, repeat_interval=0)
+        assert capture.converged
+        assert len(brayns.cache) == 1
+        fetches = server.requests['GET /v1/image-jpeg']
+        assert brayns.image_jpeg_data
+        assert server.requests['GET /v1/image-jpeg'] == fetches
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import gc
+from brayns.brayns import Brayns
+
+
+def _puts(mock, path):
+    return mock.requests.get('PUT ' + path, 0)
+
+
+def test_updates_collapse_into_one_request(mock):
+    brayns = Brayns(mock.url, coalesce=True)
+    before = _puts(mock, '/v1/camera')
+    mock.latency = 0.2
+    # Keeps the flusher busy while the camera is updated
+    brayns.settings.shadows = 0.5
+    for number in range(50):
+        brayns.camera.origin = [0, 0, number]
+    assert brayns.flush(5)
+    assert _puts(mock, '/v1/camera') == before + 1
+    assert mock.state('/v1/camera')['origin'] == [0, 0, 49]
+    brayns.close()
+
+
+def test_frames_are_fetched_after_the_updates_are_sent(mock):
+    brayns = Brayns(mock.url, coalesce=True)
+    brayns.camera.origin = [1, 2, 3]
+    brayns.image_jpeg_data
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
+    brayns.close()
+
+
+def test_flusher_stops_once_the_client_is_dropped(mock):
+    brayns = Brayns(mock.url, coalesce=True)
+    thread = brayns._coalescer._flusher._thread  # pylint: disable=W0212
+    brayns.camera.origin = [1, 2, 3]
+    del brayns
+    gc.collect()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert mock.state('/v1/camera')['origin'] == [1, 2, 3]
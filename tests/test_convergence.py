@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import numpy as np
+from brayns.brayns import FRAME_COLOR
+from brayns.convergence import capture_converged
+
+
+class _Renderer(object):
+    """
+    Stands for a Brayns instance refining a frame every few fetches, the fetches in between
+    returning the same frame again
+    """
+    def __init__(self, repeats):
+        self.repeats = repeats
+        self.fetches = 0
+        rng = np.random.RandomState(0)
+        self.target = rng.uniform(64, 192, (32, 32, 3))
+        self.noise = rng.normal(0, 1, (32, 32, 3))
+
+    def fetch_frame(self, kind, cached=True):  # pylint: disable=W0613
+        samples = self.fetches // (self.repeats + 1) + 1
+        self.fetches += 1
+        return np.clip(self.target + 64 * self.noise / samples, 0, 255).astype(np.uint8)
+
+
+def test_repeated_frames_are_not_taken_for_convergence():
+    renderer = _Renderer(repeats=3)
+    capture = capture_converged(renderer, FRAME_COLOR, tolerance=0.01, max_frames=200,
+                                repeat_interval=0)
+    assert capture.converged
+    assert 0 not in capture.errors
+    # A frame repeated patience times would have converged straight away
+    assert capture.frames > 8
+
+
+def test_repeated_frames_count_towards_max_frames():
+    renderer = _Renderer(repeats=1000)
+    capture = capture_converged(renderer, FRAME_COLOR, max_frames=10, repeat_interval=0)
+    assert not capture.converged
+    assert capture.frames == 10
+    assert capture.errors == []
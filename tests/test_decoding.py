@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import base64
+import numpy as np
+import pytest
+from benchmarks.mock_server import MockBrayns
+import brayns.brayns
+from brayns.brayns import Brayns, FrameBufferSnapshot, OUTPUT_ARRAY, _b64decode_into
+
+
+def _payload(width, height, depth_dtype, seed=0):
+    """
+    :return: Json payload of the frame-buffers endpoint with random buffers, and the buffers
+    """
+    rng = np.random.RandomState(seed)
+    color = rng.randint(0, 256, (height, width, 4)).astype(np.uint8)
+    if np.dtype(depth_dtype) == np.uint16:
+        depth = rng.randint(0, 1 << 16, (height, width)).astype('<u2')
+    else:
+        depth = rng.uniform(0, 100, (height, width)).astype('<f4')
+    return {'width': width, 'height': height,
+            'diffuse': base64.b64encode(color.tobytes()).decode('ascii'),
+            'depth': base64.b64encode(depth.tobytes()).decode('ascii')}, color, depth
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """
+    Decodes in chunks of a few bytes, so that payloads span many of them
+    """
+    monkeypatch.setattr(brayns.brayns, 'BASE64_CHUNK_SIZE', 64)
+
+
+@pytest.mark.parametrize('size', [0, 1, 2, 3, 47, 48, 49, 1000])
+@pytest.mark.parametrize('as_text', [True, False])
+def test_chunked_decoding_matches_one_shot_decoding(small_chunks, size, as_text):
+    data = np.random.RandomState(size).randint(0, 256, size).astype(np.uint8).tobytes()
+    encoded = base64.b64encode(data)
+    if as_text:
+        encoded = encoded.decode('ascii')
+    out = np.empty(size, dtype=np.uint8)
+    assert _b64decode_into(encoded, out)
+    assert out.tobytes() == base64.b64decode(encoded)
+
+
+def test_chunked_decoding_refuses_mismatched_buffers(small_chunks):
+    encoded = base64.b64encode(b'0123456789')
+    assert not _b64decode_into(encoded, np.empty(9, dtype=np.uint8))
+    assert not _b64decode_into(encoded, np.empty(11, dtype=np.uint8))
+    assert not _b64decode_into(encoded[:-1], np.empty(10, dtype=np.uint8))
+
+
+@pytest.mark.parametrize('depth_dtype', [np.uint16, np.float32])
+def test_decoding_into_caller_buffers_matches_one_shot_decoding(small_chunks, depth_dtype):
+    payload, color, depth = _payload(37, 21, depth_dtype)
+    color_out = np.zeros((21, 37, 4), dtype=np.uint8)
+    depth_out = np.zeros((21, 37), dtype=depth_dtype)
+    snapshot = FrameBufferSnapshot(dict(payload))
+    assert snapshot.color_array(out=color_out) is color_out
+    assert snapshot.depth_array(out=depth_out) is depth_out
+    one_shot = FrameBufferSnapshot(dict(payload))
+    assert np.array_equal(color_out, one_shot.color_array())
+    assert np.array_equal(depth_out, one_shot.depth_array())
+    assert np.array_equal(color_out, color)
+    assert np.array_equal(depth_out, depth)
+
+
+def test_caller_buffers_that_cannot_be_decoded_into_receive_a_copy(small_chunks):
+    payload, color, depth = _payload(16, 8, np.uint16)
+    snapshot = FrameBufferSnapshot(payload)
+    # Not contiguous, then of another type: decoded the regular way, then copied
+    color_out = np.zeros((8, 32, 4), dtype=np.uint8)[:, ::2]
+    depth_out = np.zeros((8, 16), dtype=np.float32)
+    assert snapshot.color_array(out=color_out) is color_out
+    assert snapshot.depth_array(out=depth_out) is depth_out
+    assert np.array_equal(color_out, color)
+    assert np.array_equal(depth_out, depth.astype(np.float32))
+
+
+@pytest.mark.parametrize('server_binary', [True, False])
+def test_binary_and_json_frames_decode_identically(server_binary):
+    with MockBrayns(frame_size=[64, 48], binary=server_binary) as server:
+        binary = Brayns(server.url, output=OUTPUT_ARRAY, binary=True)
+        json = Brayns(server.url, output=OUTPUT_ARRAY, binary=False)
+        assert np.array_equal(binary.image_jpeg, json.image_jpeg)
+        first, second = binary.frame_buffers, json.frame_buffers
+        assert (first.width, first.height) == (second.width, second.height) == (64, 48)
+        assert np.array_equal(first.color_array(), second.color_array())
+        assert np.array_equal(first.depth_array(), second.depth_array())
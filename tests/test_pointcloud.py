@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+from collections import namedtuple
+import numpy as np
+import pytest
+from brayns.brayns import Brayns, OUTPUT_ARRAY
+from brayns.pointcloud import DEPTH_Z, point_cloud, save_point_cloud
+
+Camera = namedtuple('Camera', 'origin look_at up_vector field_of_view')
+CAMERA = Camera([0, 0, -5], [0, 0, 0], [0, 1, 0], 90.0)
+
+
+def test_center_pixel_lies_along_the_view_direction():
+    depth = np.full((3, 3), 2.0, dtype=np.float32)
+    points, colors = point_cloud(depth, CAMERA)
+    assert colors is None
+    assert len(points) == 9
+    assert np.allclose(points[4], [0, 0, -3])
+    # Every point lies at the given distance from the camera origin
+    assert np.allclose(np.linalg.norm(points - CAMERA.origin, axis=1), 2.0)
+
+
+def test_z_depth_is_measured_along_the_view_direction():
+    depth = np.full((4, 6), 2.0, dtype=np.float32)
+    points, _ = point_cloud(depth, CAMERA, depth_mode=DEPTH_Z)
+    assert np.allclose(points[:, 2], -3)
+
+
+def test_integer_depth_is_scaled_to_the_depth_range():
+    depth = np.array([[0, 0xffff // 2, 0xffff]], dtype=np.uint16)
+    points, _ = point_cloud(depth, CAMERA, depth_range=(1.0, 3.0), depth_mode=DEPTH_Z)
+    # The maximum value is the background
+    assert np.allclose(points[:, 2], [-4, -3], atol=1e-3)
+    with pytest.raises(ValueError):
+        point_cloud(depth, CAMERA)
+
+
+def test_colors_follow_the_points():
+    depth = np.array([[1.0, 0.0], [1.0, 1.0]], dtype=np.float32)
+    colors = np.arange(16, dtype=np.uint8).reshape(2, 2, 4)
+    points, point_colors = point_cloud(depth, CAMERA, colors)
+    assert len(points) == 3
+    assert point_colors.tolist() == [[0, 1, 2], [8, 9, 10], [12, 13, 14]]
+
+
+@pytest.mark.parametrize('extension', ['ply', 'npy'])
+def test_saved_points_match(tmpdir, extension):
+    depth = np.random.RandomState(0).uniform(1, 2, (5, 7)).astype(np.float32)
+    depth[0, 0] = np.inf
+    path = str(tmpdir.join('points.' + extension))
+    assert save_point_cloud(path, depth, CAMERA, chunk_pixels=7) == 34
+    if extension == 'npy':
+        assert np.allclose(np.load(path), point_cloud(depth, CAMERA)[0])
+
+
+def test_brayns_point_cloud_requires_a_depth_range(mock):
+    brayns = Brayns(mock.url, output=OUTPUT_ARRAY)
+    with pytest.raises(TypeError):
+        brayns.point_cloud()  # pylint: disable=E1120
+    points, colors = brayns.point_cloud((1.0, 11.0))
+    assert len(points) == len(colors) == 64 * 48
+    distances = np.linalg.norm(points - np.asarray(brayns.camera.origin), axis=1)
+    assert distances.min() >= 1.0 - 1e-4 and distances.max() <= 11.0 + 1e-4
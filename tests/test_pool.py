@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import random
+import time
+import pytest
+from benchmarks.mock_server import MockBrayns
+from brayns.pool import BraynsPool
+
+
+@pytest.fixture
+def servers():
+    """
+    A fast and a slow mock server
+    """
+    with MockBrayns(frame_size=[64, 48]) as fast, \
+            MockBrayns(frame_size=[64, 48], latency=0.02) as slow:
+        yield fast, slow
+
+
+def test_faster_servers_take_more_jobs(servers):
+    fast, slow = servers
+    with BraynsPool([fast.url, slow.url]) as pool:
+        frames = pool.render([{'origin': [0, 0, number]} for number in range(30)])
+        statistics = pool.statistics()
+    assert len(frames) == 30 and all(frame is not None for frame in frames)
+    assert statistics[0]['jobs'] + statistics[1]['jobs'] == 30
+    assert statistics[0]['jobs'] > 2 * statistics[1]['jobs']
+    assert statistics[0]['latency'] < statistics[1]['latency']
+
+
+def test_results_are_returned_in_job_order(servers):
+    def run(brayns, job):
+        time.sleep(random.uniform(0, 0.01))
+        return brayns.url, job
+
+    fast, slow = servers
+    with BraynsPool([fast.url, slow.url]) as pool:
+        results = pool.map(run, range(40), window=4)
+    assert [job for _, job in results] == list(range(40))
+    assert set(url for url, _ in results) == set([fast.url, slow.url])
+
+
+def test_job_failures_are_raised_in_order(servers):
+    def run(_, job):
+        if job == 5:
+            raise ValueError(job)
+        return job
+
+    with BraynsPool([server.url for server in servers]) as pool:
+        results = pool.imap(run, range(10))
+        assert [next(results) for _ in range(5)] == list(range(5))
+        with pytest.raises(ValueError):
+            next(results)
+
+
+def test_replicate_applies_the_state_to_every_server(servers):
+    with BraynsPool([server.url for server in servers]) as pool:
+        pool.replicate(settings={'samples_per_pixel': 16}, camera={'origin': [1, 2, 3]})
+    for server in servers:
+        assert server.state('/v1/settings')['samples_per_pixel'] == 16
+        assert server.state('/v1/camera')['origin'] == [1, 2, 3]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+from brayns.brayns import Brayns
+from brayns.quality import QualityController, DEFAULT_LEVELS
+
+TARGET_FPS = 10
+SLOW = 0.5
+FAST = 0.01
+LAST = len(DEFAULT_LEVELS) - 1
+
+
+def _controller(mock):
+    brayns = Brayns(mock.url)
+    brayns.settings.samples_per_pixel = 8
+    return brayns, QualityController(brayns, TARGET_FPS, cooldown=2)
+
+
+def _move(brayns, controller, frame_time, frames):
+    levels = []
+    for _ in range(frames):
+        origin = brayns.camera.origin
+        brayns.camera.origin = [origin[0] + 1, origin[1], origin[2]]
+        controller.record(frame_time)
+        levels.append(controller.level)
+    return levels
+
+
+def test_slow_frames_step_down_the_ladder(mock):
+    brayns, controller = _controller(mock)
+    levels = _move(brayns, controller, SLOW, 2 * len(DEFAULT_LEVELS) + 2)
+    assert levels == sorted(levels)
+    assert levels[-1] == LAST
+    # One level at a time, each measured for the cooldown before the next one
+    assert all(after - before <= 1 for before, after in zip(levels, levels[1:]))
+    assert mock.state('/v1/viewport')['size'] == [16, 12]
+    assert mock.state('/v1/settings')['samples_per_pixel'] == 1
+    assert mock.state('/v1/settings')['jpeg_compression'] == 45
+
+
+def test_fast_frames_step_back_up_while_moving(mock):
+    brayns, controller = _controller(mock)
+    _move(brayns, controller, SLOW, 2 * len(DEFAULT_LEVELS) + 2)
+    levels = _move(brayns, controller, FAST, 2 * len(DEFAULT_LEVELS) + 2)
+    assert levels == sorted(levels, reverse=True)
+    assert levels[-1] == 0
+    assert mock.state('/v1/viewport')['size'] == [64, 48]
+    assert mock.state('/v1/settings')['samples_per_pixel'] == 8
+    assert mock.state('/v1/settings')['jpeg_compression'] == 100
+
+
+def test_frames_within_budget_keep_the_level(mock):
+    brayns, controller = _controller(mock)
+    _move(brayns, controller, SLOW, 4)
+    level = controller.level
+    assert 0 < level < LAST
+    assert set(_move(brayns, controller, 1.0 / TARGET_FPS, 10)) == {level}
+
+
+def test_stopped_camera_restores_full_quality_one_level_per_frame(mock):
+    brayns, controller = _controller(mock)
+    _move(brayns, controller, SLOW, 2 * len(DEFAULT_LEVELS) + 2)
+    levels = []
+    for _ in range(controller.settle_frames - 1 + LAST):
+        # Slow frames do not matter once the camera stopped
+        controller.record(SLOW)
+        levels.append(controller.level)
+    assert levels[controller.settle_frames - 1:] == list(range(LAST - 1, -1, -1))
+    assert mock.state('/v1/viewport')['size'] == [64, 48]
+
+
+def test_fetch_measures_frames(mock):
+    brayns, controller = _controller(mock)
+    assert controller.frame_time is None
+    assert controller.fetch().size == (64, 48)
+    assert controller.frame_time is not None
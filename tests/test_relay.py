@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import threading
+import requests
+from brayns.brayns import Brayns
+from brayns.relay import Relay
+from brayns.retry import NO_RETRY
+
+VIEWERS = 30
+POLLS = 5
+
+
+def _viewers(target):
+    """
+    Runs target(viewer) in as many threads as there are viewers, all starting together
+    """
+    barrier = threading.Barrier(VIEWERS)
+    errors = []
+
+    def run(viewer):
+        session = requests.Session()
+        barrier.wait()
+        try:
+            target(session, viewer)
+        except Exception as error:  # pylint: disable=W0703
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(viewer,)) for viewer in range(VIEWERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_viewers_share_the_frames_fetched_from_brayns(mock):
+    mock.latency = 0.05
+    with Relay(mock.url, fps=1) as relay:
+        fetches = mock.requests.get('GET /v1/image-jpeg', 0)
+        frames = []
+
+        def poll(session, _):
+            for _ in range(POLLS):
+                response = session.get(relay.url + '/v1/image-jpeg',
+                                       headers={'Accept': 'image/jpeg'})
+                assert response.status_code == 200
+                frames.append(response.content)
+
+        _viewers(poll)
+        upstream = mock.requests['GET /v1/image-jpeg'] - fetches
+        assert len(frames) == VIEWERS * POLLS
+        assert upstream == relay.fetches['/v1/image-jpeg']
+        assert 1 <= upstream <= 4
+        assert relay.served >= VIEWERS * POLLS
+
+
+def test_unchanged_frames_are_not_sent_again(mock):
+    with Relay(mock.url) as relay:
+        response = requests.get(relay.url + '/v1/image-jpeg')
+        etag = response.headers['ETag']
+        response = requests.get(relay.url + '/v1/image-jpeg', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+
+
+def test_viewer_writes_are_coalesced(mock):
+    with Relay(mock.url) as relay:
+        puts = mock.requests.get('PUT /v1/camera', 0)
+
+        def move(session, viewer):
+            response = session.put(relay.url + '/v1/camera', json={'origin': [viewer, 0, 0]})
+            assert response.status_code == 200
+
+        _viewers(move)
+        relay.brayns.flush()
+        origin = mock.state('/v1/camera')['origin']
+        assert origin == relay.brayns.camera.origin
+        assert origin[0] in range(VIEWERS)
+        assert mock.requests['PUT /v1/camera'] - puts < VIEWERS
+        assert requests.get(relay.url + '/v1/camera').json()['origin'] == origin
+
+
+def test_invalid_writes_are_refused(mock):
+    with Relay(mock.url) as relay:
+        assert requests.put(relay.url + '/v1/unknown', json={}).status_code == 404
+        assert requests.put(relay.url + '/v1/camera', data=b'[1, 2]').status_code == 400
+        assert requests.put(relay.url + '/v1/camera', data=b'{').status_code == 400
+
+
+def test_upstream_failures_are_reported_to_viewers(mock):
+    with Relay(Brayns(mock.url, retry=NO_RETRY)) as relay:
+        mock.fail(1, 500)
+        assert requests.get(relay.url + '/v1/image-jpeg').status_code == 502
+        assert requests.get(relay.url + '/v1/image-jpeg').status_code == 200
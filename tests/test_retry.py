@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import pytest
+from benchmarks.mock_server import MockBrayns
+from brayns.brayns import Brayns
+from brayns.errors import BraynsConnectionError, BraynsHTTPError, BraynsTimeoutError
+from brayns.retry import NO_RETRY, RetryPolicy
+
+
+def test_failed_gets_are_retried(mock):
+    brayns = Brayns(mock.url, retry=RetryPolicy(retries=3, backoff=0.001))
+    mock.fail(2, 503)
+    assert brayns.image_jpeg_data
+    assert mock.failure() is None
+
+
+def test_gets_fail_once_retries_are_exhausted(mock):
+    brayns = Brayns(mock.url, retry=RetryPolicy(retries=1, backoff=0.001))
+    mock.fail(2, 503)
+    with pytest.raises(BraynsHTTPError) as error:
+        brayns.image_jpeg_data
+    assert error.value.status == 503
+
+
+def test_puts_are_not_retried(mock):
+    brayns = Brayns(mock.url, retry=RetryPolicy(retries=3, backoff=0.001))
+    mock.fail(1, 503)
+    with pytest.raises(BraynsHTTPError):
+        brayns.camera.origin = [1, 2, 3]
+    assert mock.state('/v1/camera')['origin'] == [0, 0, -1]
+
+
+def test_unreachable_server_raises_connection_error():
+    with MockBrayns() as server:
+        url = server.url
+    with pytest.raises(BraynsConnectionError):
+        Brayns(url, retry=NO_RETRY).image_jpeg_data
+
+
+def test_deadline_bounds_slow_requests(mock):
+    brayns = Brayns(mock.url, retry=NO_RETRY)
+    mock.latency = 0.5
+    with pytest.raises(BraynsTimeoutError):
+        brayns.fetch_frame(deadline=0.05)
+
+
+@pytest.fixture
+def replica():
+    with MockBrayns(frame_size=[64, 48]) as server:
+        yield server
+
+
+def test_failed_replica_is_no_longer_updated(mock, replica):
+    brayns = Brayns(mock.url, retry=NO_RETRY, replicas=[replica.url])
+    brayns.camera.origin = [1, 2, 3]
+    assert replica.state('/v1/camera')['origin'] == [1, 2, 3]
+    replica.fail(1, 500)
+    brayns.camera.origin = [4, 5, 6]
+    brayns.camera.origin = [7, 8, 9]
+    assert mock.state('/v1/camera')['origin'] == [7, 8, 9]
+    assert replica.state('/v1/camera')['origin'] == [1, 2, 3]
+
+
+def test_replica_failing_with_the_primary_is_no_longer_updated(mock, replica):
+    brayns = Brayns(mock.url, retry=NO_RETRY, replicas=[replica.url])
+    mock.fail(1, 500)
+    replica.fail(1, 500)
+    with pytest.raises(BraynsHTTPError):
+        brayns.camera.origin = [1, 2, 3]
+    brayns.camera.origin = [4, 5, 6]
+    assert mock.state('/v1/camera')['origin'] == [4, 5, 6]
+    assert replica.state('/v1/camera')['origin'] == [0, 0, -1]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import os
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+import brayns.sink
+from brayns.brayns import Brayns, FRAME_COLOR, FRAME_DEPTH, FRAME_JPEG
+from brayns.sink import FrameSink, SINK_PROCESSES, SINK_THREADS
+
+
+def test_frames_are_written_in_their_format(mock, tmpdir):
+    brayns = Brayns(mock.url)
+    jpeg = brayns.image_jpeg_data
+    snapshot = brayns.frame_buffers
+    with FrameSink(str(tmpdir), workers=2) as sink:
+        jpeg_path = sink.write(jpeg, FRAME_JPEG)
+        color_path = sink.write(snapshot, FRAME_COLOR)
+        depth_path = sink.write(snapshot, FRAME_DEPTH)
+        array_path = sink.write(np.zeros((4, 8, 3), dtype=np.uint8), FRAME_COLOR)
+    assert sink.written == 4 and not sink.failures
+    with open(jpeg_path, 'rb') as data:
+        assert data.read() == jpeg
+    assert color_path.endswith('.png') and depth_path.endswith('.tiff')
+    assert Image.open(color_path).size == tuple(snapshot.size)
+    assert Image.open(array_path).size == (8, 4)
+
+
+@pytest.mark.parametrize('pool', [SINK_THREADS, SINK_PROCESSES])
+def test_failed_writes_are_reported(tmpdir, pool):
+    errors = []
+    written = []
+    frame = np.zeros((4, 8, 3), dtype=np.uint8)
+    with FrameSink(str(tmpdir), workers=1, pool=pool,
+                   on_error=lambda path, error: errors.append((path, error)),
+                   on_written=written.append) as sink:
+        missing = sink.write(frame, FRAME_COLOR, path=str(tmpdir.join('missing', 'frame.png')))
+        unknown = sink.write(frame, FRAME_COLOR, path=str(tmpdir.join('frame.unknown')))
+        valid = sink.write(frame, FRAME_COLOR)
+    assert sorted(path for path, _ in sink.failures) == sorted([missing, unknown])
+    assert sorted(path for path, _ in errors) == sorted([missing, unknown])
+    assert all(isinstance(error, Exception) for _, error in errors)
+    assert written == [valid] and sink.written == 1
+    assert os.path.exists(valid)
+
+
+def test_unsupported_frames_are_refused(tmpdir):
+    with FrameSink(str(tmpdir)) as sink:
+        with pytest.raises(TypeError):
+            sink.write(object())
+        with pytest.raises(ValueError):
+            sink.write(b'', 'movie')
+
+
+def test_full_sink_drops_frames_instead_of_blocking(tmpdir, monkeypatch):
+    release = threading.Event()
+
+    def blocked(*args):
+        release.wait()
+
+    monkeypatch.setattr(brayns.sink, 'write_frame', blocked)
+    with FrameSink(str(tmpdir), workers=1, max_pending=2) as sink:
+        assert sink.write(b'jpeg') is not None
+        assert sink.write(b'jpeg') is not None
+        assert sink.write(b'jpeg', block=False) is None
+        assert sink.write(b'jpeg', timeout=0.05) is None
+        assert not sink.flush(0.05)
+        release.set()
+    assert (sink.written, sink.dropped) == (2, 2)
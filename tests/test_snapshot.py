@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+from brayns.brayns import Brayns
+
+
+def _puts(mock, path):
+    return mock.requests.get('PUT ' + path, 0)
+
+
+def test_snapshot_diff(mock):
+    brayns = Brayns(mock.url)
+    before = brayns.snapshot()
+    brayns.camera.origin = [1, 2, 3]
+    brayns.settings.shadows = 0.5
+    after = brayns.snapshot()
+    assert after.diff(before) == {'/v1/camera': {'origin': [1, 2, 3]},
+                                  '/v1/settings': {'shadows': 0.5}}
+    assert after.diff(after) == {}
+    assert before.digest() != after.digest()
+
+
+def test_restore_sends_only_the_differences(mock):
+    brayns = Brayns(mock.url)
+    before = brayns.snapshot()
+    brayns.camera.origin = [1, 2, 3]
+    brayns.camera.field_of_view = 30.0
+    brayns.settings.shadows = 0.5
+    requests = dict(mock.requests)
+    changes = brayns.restore(before)
+    assert dict((path, sorted(keys)) for path, keys in changes.items()) == \
+        {'/v1/camera': ['field_of_view', 'origin'], '/v1/settings': ['shadows']}
+    assert _puts(mock, '/v1/camera') == requests.get('PUT /v1/camera', 0) + 1
+    assert _puts(mock, '/v1/settings') == requests.get('PUT /v1/settings', 0) + 1
+    assert _puts(mock, '/v1/viewport') == requests.get('PUT /v1/viewport', 0)
+    assert mock.state('/v1/camera')['origin'] == [0, 0, -1]
+    assert mock.state('/v1/camera')['field_of_view'] == 45.0
+    assert brayns.snapshot() == before
+    requests = dict(mock.requests)
+    assert brayns.restore(before) == {}
+    assert mock.requests == requests
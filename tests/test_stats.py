@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import numpy as np
+import pytest
+from brayns.brayns import Brayns
+from brayns.stats import Histogram, Statistics, PHASE_IMAGE, PHASE_NETWORK
+
+
+@pytest.mark.parametrize('fraction', [0.1, 0.5, 0.9, 0.95, 0.99])
+def test_histogram_percentiles_are_within_five_percent(fraction):
+    samples = np.random.RandomState(0).lognormal(np.log(0.01), 1.0, 10000)
+    histogram = Histogram()
+    for sample in samples:
+        histogram.add(sample)
+    exact = np.percentile(samples, 100 * fraction)
+    assert histogram.percentile(fraction) == pytest.approx(exact, rel=0.05)
+
+
+def test_histogram_percentiles_stay_within_the_observed_range():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) is None
+    histogram.add(0.0123)
+    assert histogram.percentile(0.01) == histogram.percentile(0.99) == 0.0123
+    histogram.add(0.0)
+    histogram.add(1e9)
+    assert histogram.percentile(0.01) == 0.0
+    assert histogram.percentile(1.0) == 1e9
+
+
+def test_histogram_summary():
+    histogram = Histogram()
+    for value in (0.001, 0.002, 0.003, 0.004):
+        histogram.add(value)
+    summary = histogram.summary()
+    assert summary['count'] == 4
+    assert summary['total'] == pytest.approx(0.01)
+    assert summary['mean'] == pytest.approx(0.0025)
+    assert (summary['min'], summary['max']) == (0.001, 0.004)
+    assert summary['min'] <= summary['p50'] <= summary['p95'] <= summary['p99'] <= summary['max']
+
+
+def test_statistics_count_requests_per_endpoint():
+    statistics = Statistics()
+    events = []
+    statistics.add_hook(events.append)
+    statistics.record('/v1/camera', PHASE_NETWORK, 0.01, 10, 100)
+    statistics.record('/v1/camera', PHASE_NETWORK, 0.02, 10, 0, error=True)
+    statistics.record('/v1/camera', PHASE_IMAGE, 0.005)
+    summary = statistics.summary()['/v1/camera']
+    assert (summary['requests'], summary['errors']) == (2, 1)
+    assert (summary['bytes_sent'], summary['bytes_received']) == (20, 100)
+    assert summary[PHASE_NETWORK]['count'] == 2
+    assert summary[PHASE_IMAGE]['count'] == 1
+    assert len(events) == 3 and events[1]['error']
+    assert statistics.percentile('/v1/camera', PHASE_NETWORK, 0.5, min_count=3) is None
+    assert statistics.percentile('/v1/camera', PHASE_NETWORK, 0.5) is not None
+    assert statistics.summary(reset=True)
+    assert statistics.summary() == {}
+
+
+def test_client_records_its_requests(mock):
+    brayns = Brayns(mock.url)
+    brayns.stats(reset=True)
+    for _ in range(3):
+        brayns.image_jpeg
+    stats = brayns.stats()['/v1/image-jpeg']
+    assert stats['requests'] == 3
+    assert stats['errors'] == 0
+    assert stats['bytes_received'] > 0
+    assert stats[PHASE_NETWORK]['count'] == 3
+    assert stats[PHASE_IMAGE]['count'] == 3
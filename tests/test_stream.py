@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import itertools
+import threading
+import time
+import pytest
+from brayns.stream import FrameStream, STREAM_BLOCK, STREAM_DROP
+
+
+class _Source(object):
+    """
+    Numbers the frames it is asked for, and fails when asked for frame fail_at
+    """
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self._numbers = itertools.count()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            number = next(self._numbers)
+        if number == self.fail_at:
+            raise ValueError(number)
+        return number
+
+    @property
+    def fetched(self):
+        with self._lock:
+            return next(self._numbers) - 1
+
+
+def test_block_yields_every_frame_in_order():
+    with FrameStream(_Source(), max_frames=20, queue_size=2) as stream:
+        assert list(stream) == list(range(20))
+
+
+def test_block_pauses_the_workers_when_the_consumer_is_slow():
+    source = _Source()
+    with FrameStream(source, queue_size=2, workers=2, policy=STREAM_BLOCK) as stream:
+        time.sleep(0.2)
+        # The queued frames, plus one in flight per worker
+        assert source.fetched <= 2 + 2
+        assert next(stream) == 0
+
+
+def test_drop_discards_the_oldest_frames():
+    source = _Source()
+    with FrameStream(source, queue_size=2, policy=STREAM_DROP) as stream:
+        time.sleep(0.1)
+        first = next(stream)
+        second = next(stream)
+    assert stream.dropped > 0
+    assert 0 < first < second
+
+
+def test_failures_are_raised_after_the_frames_fetched_before():
+    stream = FrameStream(_Source(fail_at=3), queue_size=8)
+    assert [next(stream) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError):
+        next(stream)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_drop_never_discards_failures(workers):
+    stream = FrameStream(_Source(fail_at=2), queue_size=1, workers=workers,
+                         policy=STREAM_DROP)
+    # Frames keep coming from the other workers while the consumer is away
+    time.sleep(0.2)
+    with pytest.raises(ValueError):
+        for _ in range(100):
+            next(stream)
+
+
+def test_fps_limits_the_fetch_rate():
+    start = time.time()
+    with FrameStream(_Source(), fps=50, max_frames=10, workers=2) as stream:
+        assert len(list(stream)) == 10
+    assert time.time() - start >= 9 / 50.0
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import itertools
+import pytest
+from brayns.sweep import gray_indices
+
+
+@pytest.mark.parametrize('sizes', [[5], [2, 3], [3, 1, 4], [2, 2, 2], [4, 3, 2]])
+def test_gray_indices_visit_every_combination_once(sizes):
+    jobs = [tuple(gray_indices(job, sizes)) for job in range(_product(sizes))]
+    assert sorted(jobs) == sorted(itertools.product(*[range(size) for size in sizes]))
+
+
+@pytest.mark.parametrize('sizes', [[5], [2, 3], [3, 1, 4], [2, 2, 2], [4, 3, 2]])
+def test_consecutive_gray_indices_differ_by_one_step(sizes):
+    previous = gray_indices(0, sizes)
+    assert previous == [0] * len(sizes)
+    for job in range(1, _product(sizes)):
+        current = gray_indices(job, sizes)
+        steps = [abs(a - b) for a, b in zip(previous, current)]
+        assert sorted(steps) == [0] * (len(sizes) - 1) + [1]
+        previous = current
+
+
+def _product(sizes):
+    total = 1
+    for size in sizes:
+        total *= size
+    return total
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=C0111
+
+# Copyright (c) 2016-2017, Blue Brain Project
+#                          Cyrille Favreau <cyrille.favreau@epfl.ch>
+#
+# This file is part of Brayns
+# <https://github.com/BlueBrain/Brayns>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License version 3.0 as published
+# by the Free Software Foundation.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# All rights reserved. Do not distribute without further notice.
+
+import math
+from types import SimpleNamespace
+import numpy as np
+from brayns.brayns import FRAME_COLOR, FRAME_DEPTH
+from brayns.pointcloud import camera_basis
+from brayns.tiling import tile_jobs, warp_tile
+
+
+def _project(camera, size, points):
+    """
+    Projects world points with a pinhole camera, pixel centers at integer positions and row 0
+    at the top
+    :return: (n, 2) array of pixel coordinates
+    """
+    forward, right, up = camera_basis(camera.origin, camera.look_at, camera.up_vector)
+    relative = points - np.asarray(camera.origin, dtype=float)
+    depth = relative.dot(forward)
+    half_height = math.tan(math.radians(camera.field_of_view) / 2.0)
+    half_width = half_height * size[0] / float(size[1])
+    x = relative.dot(right) / depth / half_width
+    y = relative.dot(up) / depth / half_height
+    return np.stack([(x + 1) * size[0] / 2.0 - 0.5, (1 - y) * size[1] / 2.0 - 0.5], axis=1)
+
+
+def _render(camera, size):
+    """
+    Renders a smooth color pattern depending on the direction of the rays only, like a scene
+    at infinity
+    """
+    forward, right, up = camera_basis(camera.origin, camera.look_at, camera.up_vector)
+    half_height = math.tan(math.radians(camera.field_of_view) / 2.0)
+    half_width = half_height * size[0] / float(size[1])
+    x = ((np.arange(size[0]) + 0.5) * 2.0 / size[0] - 1.0) * half_width
+    y = (1.0 - (np.arange(size[1]) + 0.5) * 2.0 / size[1]) * half_height
+    directions = forward + x[None, :, None] * right + y[:, None, None] * up
+    directions /= np.linalg.norm(directions, axis=2, keepdims=True)
+    color = 127.5 * (1.0 + np.sin(6.0 * directions))
+    return np.concatenate([color, np.full(color.shape[:2] + (1,), 255.0)], axis=2) \
+        .astype(np.uint8)
+
+
+def _tile_camera(camera, job):
+    return SimpleNamespace(origin=camera.origin, look_at=job['camera']['look_at'],
+                           up_vector=job['camera']['up_vector'],
+                           field_of_view=job['camera']['field_of_view'])
+
+
+CAMERA = SimpleNamespace(origin=[1.0, 2.0, 3.0], look_at=[0.5, 1.0, -4.0], up_vector=[0, 1, 0],
+                         field_of_view=45.0)
+
+
+def test_tiles_cover_the_image():
+    rows = tile_jobs(CAMERA, 1000, 700, (256, 256))
+    assert [job['x'] for job in rows[0]] == [0, 256, 512, 768]
+    assert [row[0]['y'] for row in rows] == [0, 256, 512]
+    assert rows[-1][-1]['size'] == [1000 - 768, 700 - 512]
+
+
+def test_points_land_where_the_full_camera_projects_them():
+    width, height = 4096, 4096
+    random = np.random.RandomState(0)
+    rows = tile_jobs(CAMERA, width, height, (2048, 2048))
+    for job in (job for row in rows for job in row):
+        # Points seen by the full camera inside the tile
+        pixels = np.stack([job['x'] + random.uniform(0, job['size'][0], 100) - 0.5,
+                           job['y'] + random.uniform(0, job['size'][1], 100) - 0.5], axis=1)
+        forward, right, up = camera_basis(CAMERA.origin, CAMERA.look_at, CAMERA.up_vector)
+        half_height = math.tan(math.radians(CAMERA.field_of_view) / 2.0)
+        x = ((pixels[:, 0] + 0.5) * 2.0 / width - 1.0) * half_height
+        y = (1.0 - (pixels[:, 1] + 0.5) * 2.0 / height) * half_height
+        points = np.asarray(CAMERA.origin) + \
+            (forward + x[:, None] * right + y[:, None] * up) * random.uniform(1, 50, (100, 1))
+        np.testing.assert_allclose(_project(CAMERA, (width, height), points), pixels, atol=1e-6)
+
+        # The homography sends them where the tile camera sees them
+        seen = _project(_tile_camera(CAMERA, job), job['render_size'], points)
+        homography = np.asarray(job['homography'])
+        mapped = homography.dot(np.vstack([pixels.T, np.ones(len(pixels))]))
+        np.testing.assert_allclose((mapped[:2] / mapped[2]).T, seen, atol=1e-6)
+        # Inside the rendered frame, with the margin
+        assert seen.min() >= 1.0
+        assert np.all(seen < np.asarray(job['render_size']) - 2.0)
+
+
+def test_single_tile_is_the_full_image():
+    job = tile_jobs(CAMERA, 320, 200, (320, 200))[0][0]
+    rendered = _render(_tile_camera(CAMERA, job), job['render_size'])
+    np.testing.assert_array_equal(warp_tile(rendered, job), _render(CAMERA, (320, 200)))
+
+
+def test_stitched_tiles_match_the_full_render():
+    width, height = 640, 360
+    full = _render(CAMERA, (width, height)).astype(int)
+    for job in (job for row in tile_jobs(CAMERA, width, height, (200, 150)) for job in row):
+        rendered = _render(_tile_camera(CAMERA, job), job['render_size'])
+        tile = warp_tile(rendered, job, FRAME_COLOR).astype(int)
+        expected = full[job['y']:job['y'] + job['size'][1], job['x']:job['x'] + job['size'][0]]
+        assert np.abs(tile - expected).max() <= 3
+
+
+def test_depth_is_resampled_without_blending():
+    job = tile_jobs(CAMERA, 64, 64, (32, 32))[0][1]
+    rendered = np.arange(job['render_size'][0] * job['render_size'][1], dtype=np.uint16) \
+        .reshape(job['render_size'][1], job['render_size'][0])
+    tile = warp_tile(rendered, job, FRAME_DEPTH)
+    assert tile.shape == (32, 32)
+    assert np.isin(tile, rendered).all()